@@ -1,4 +1,10 @@
-from .main import main
+import sys
+
+from .cli import COMMANDS
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        from .cli import main
+    else:
+        from .main import main
     raise SystemExit(main())
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import argparse
+import signal
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Sequence
+
+from app.infra.cancellation import CancelToken
+from app.infra.config import get_config
+from app.infra.db import ConnectionManager, Repository
+from app.infra.logger import setup_logging
+from app.infra.runtime import apply_runtime_config
+from app.usecases.batch_refresh import BatchProgress, batch_refresh_offers
+from app.usecases.compact_db import compact_database
+from app.usecases.refresh_offers import OfferInput
+
+COMMANDS = ("refresh", "compact", "archive")
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    config = get_config(args.config)
+    setup_logging()
+    apply_runtime_config(config)
+    manager = ConnectionManager(
+        config.db_path, config.db_profile, archive_path=config.archive_path
+    )
+    repo = Repository(manager)
+    try:
+        return args.handler(repo, config, args)
+    finally:
+        repo.close()
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config", help="config.json のパス")
+
+    parser = argparse.ArgumentParser(prog="python -m app")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    refresh = commands.add_parser(
+        "refresh", parents=[common], help="候補を一括更新します"
+    )
+    target = refresh.add_mutually_exclusive_group()
+    target.add_argument(
+        "--item",
+        dest="item_ids",
+        type=int,
+        action="append",
+        help="対象の商品ID（複数指定可）",
+    )
+    target.add_argument(
+        "--status",
+        choices=["considering", "active", "paused"],
+        help="指定した状態の商品だけを更新",
+    )
+    refresh.add_argument(
+        "--force", action="store_true", help="キャッシュを使わずに取得"
+    )
+    refresh.add_argument(
+        "--concurrency", type=int, default=4, help="同時に処理する商品数"
+    )
+    refresh.set_defaults(handler=_run_refresh)
+
+    compact = commands.add_parser(
+        "compact", parents=[common], help="保持期間を過ぎたデータを整理します"
+    )
+    compact.set_defaults(handler=_run_compact)
+
+    archive = commands.add_parser(
+        "archive", parents=[common], help="古い候補と履歴をアーカイブDBへ移します"
+    )
+    archive.add_argument(
+        "--days",
+        type=int,
+        help="この日数より古いデータを移動（既定: archive_after_days）",
+    )
+    archive.set_defaults(handler=_run_archive)
+    return parser
+
+
+def _run_refresh(repo: Repository, config, args: argparse.Namespace) -> int:
+    items = repo.list_items()
+    if args.item_ids:
+        wanted = set(args.item_ids)
+        items = [item for item in items if item.id in wanted]
+    elif args.status:
+        items = [item for item in items if item.status == args.status]
+    requests = [
+        OfferInput(item_id=item.id, search_keyword=item.search_keyword)
+        for item in items
+    ]
+    if not requests:
+        print("対象の商品がありません。")
+        return 0
+
+    token = CancelToken()
+    previous = signal.signal(signal.SIGINT, lambda *_: token.cancel())
+    try:
+        result = batch_refresh_offers(
+            repo,
+            requests,
+            config=config,
+            force_refresh=args.force,
+            max_in_flight=args.concurrency,
+            progress=_print_progress,
+            token=token,
+        )
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+    print(
+        f"完了: {result.completed}/{result.total} 件, 候補 {result.offers} 件"
+        + (" (中断)" if result.cancelled else "")
+    )
+    return 130 if result.cancelled else 0
+
+
+def _run_compact(repo: Repository, config, args: argparse.Namespace) -> int:
+    result = compact_database(repo, config=config)
+    print(
+        f"整理完了: 履歴 {result.price_history} 件, 候補 {result.offers} 件, "
+        f"計算 {result.calculations} 件, 相場 {result.market_refs} 件, "
+        f"解放 {result.freed_pages} ページ"
+    )
+    return 0
+
+
+def _run_archive(repo: Repository, config, args: argparse.Namespace) -> int:
+    days = args.days if args.days is not None else config.archive_after_days
+    if days <= 0:
+        print("--days か archive_after_days に 1 以上を指定してください。")
+        return 2
+    before = datetime.now(timezone.utc) - timedelta(days=days)
+    result = repo.archive_offers(before.isoformat())
+    print(
+        f"アーカイブ完了: 候補 {result.offers} 件, 履歴 {result.price_history} 件 "
+        f"-> {config.archive_path}"
+    )
+    return 0
+
+
+def _print_progress(progress: BatchProgress) -> None:
+    print(
+        f"[{progress.done}/{progress.total}] item {progress.item_id}: "
+        f"{progress.offers} 件",
+        flush=True,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
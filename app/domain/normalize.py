@@ -1 +1,14 @@
-"""Normalization helpers placeholders."""
+"""Normalization helpers."""
+
+from __future__ import annotations
+
+import unicodedata
+
+
+def listing_key(url: str | None, title: str | None) -> str:
+    # A listing is identified by its URL; results without one fall back to
+    # the normalized title.
+    if url and url.strip():
+        return "url:" + url.strip()
+    text = unicodedata.normalize("NFKC", title or "")
+    return "title:" + " ".join(text.split()).casefold()
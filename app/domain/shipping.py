@@ -1 +1,140 @@
-"""Shipping estimation placeholders."""
+"""Shipping zones and size bands."""
+
+from __future__ import annotations
+
+import unicodedata
+from dataclasses import dataclass
+
+# JIS X 0401 order, so a prefecture's index is its code minus one.
+PREFECTURES = (
+    "北海道",
+    "青森県",
+    "岩手県",
+    "宮城県",
+    "秋田県",
+    "山形県",
+    "福島県",
+    "茨城県",
+    "栃木県",
+    "群馬県",
+    "埼玉県",
+    "千葉県",
+    "東京都",
+    "神奈川県",
+    "新潟県",
+    "富山県",
+    "石川県",
+    "福井県",
+    "山梨県",
+    "長野県",
+    "岐阜県",
+    "静岡県",
+    "愛知県",
+    "三重県",
+    "滋賀県",
+    "京都府",
+    "大阪府",
+    "兵庫県",
+    "奈良県",
+    "和歌山県",
+    "鳥取県",
+    "島根県",
+    "岡山県",
+    "広島県",
+    "山口県",
+    "徳島県",
+    "香川県",
+    "愛媛県",
+    "高知県",
+    "福岡県",
+    "佐賀県",
+    "長崎県",
+    "熊本県",
+    "大分県",
+    "宮崎県",
+    "鹿児島県",
+    "沖縄県",
+)
+
+# Carrier tariffs are usually published per region; a tariff row naming a
+# region applies to every prefecture in it.
+REGIONS = {
+    "北海道": ("北海道",),
+    "北東北": ("青森県", "岩手県", "秋田県"),
+    "南東北": ("宮城県", "山形県", "福島県"),
+    "関東": (
+        "茨城県",
+        "栃木県",
+        "群馬県",
+        "埼玉県",
+        "千葉県",
+        "東京都",
+        "神奈川県",
+        "山梨県",
+    ),
+    "信越": ("新潟県", "長野県"),
+    "北陸": ("富山県", "石川県", "福井県"),
+    "中部": ("岐阜県", "静岡県", "愛知県", "三重県"),
+    "関西": ("滋賀県", "京都府", "大阪府", "兵庫県", "奈良県", "和歌山県"),
+    "中国": ("鳥取県", "島根県", "岡山県", "広島県", "山口県"),
+    "四国": ("徳島県", "香川県", "愛媛県", "高知県"),
+    "九州": (
+        "福岡県",
+        "佐賀県",
+        "長崎県",
+        "熊本県",
+        "大分県",
+        "宮崎県",
+        "鹿児島県",
+    ),
+    "沖縄": ("沖縄県",),
+}
+
+
+@dataclass(frozen=True)
+class SizeBand:
+    # size is the limit on length + width + height in cm.
+    size: int
+    max_weight: int
+
+
+SIZE_BANDS = (
+    SizeBand(60, 2_000),
+    SizeBand(80, 5_000),
+    SizeBand(100, 10_000),
+    SizeBand(120, 15_000),
+    SizeBand(140, 20_000),
+    SizeBand(160, 25_000),
+    SizeBand(180, 30_000),
+    SizeBand(200, 30_000),
+)
+
+
+def prefecture_index(value: str | int) -> int:
+    # Accepts a JIS code ("13", 13) or a name with or without its suffix.
+    text = unicodedata.normalize("NFKC", str(value)).strip()
+    if text.isdigit():
+        code = int(text)
+        if 1 <= code <= len(PREFECTURES):
+            return code - 1
+    for index, name in enumerate(PREFECTURES):
+        if text in (name, name[:-1]) and text != "北海":
+            return index
+    raise ValueError(f"unknown prefecture: {value}")
+
+
+def zone_indexes(value: str) -> tuple[int, ...]:
+    text = unicodedata.normalize("NFKC", value).strip()
+    if text in REGIONS:
+        return tuple(prefecture_index(name) for name in REGIONS[text])
+    return (prefecture_index(text),)
+
+
+def size_band_index(
+    length: int, width: int, height: int, weight: int, bands=SIZE_BANDS
+) -> int | None:
+    total = length + width + height
+    for index, band in enumerate(bands):
+        if total <= band.size and weight <= band.max_weight:
+            return index
+    return None
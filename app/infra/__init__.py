@@ -1,15 +1,34 @@
 """Infrastructure package."""
 
-from .config import AppConfig, load_config, save_config
+from .cancellation import CancelToken, OperationCancelled
+from .config import (
+    AppConfig,
+    get_config,
+    invalidate_config,
+    load_config,
+    save_config,
+)
 from .logger import setup_logging
-from .secrets import delete_secret, get_secret, set_secret
+from .secrets import (
+    delete_secret,
+    get_secret,
+    invalidate_secrets,
+    refresh_secrets,
+    set_secret,
+)
 
 __all__ = [
+    "CancelToken",
+    "OperationCancelled",
     "AppConfig",
+    "get_config",
+    "invalidate_config",
     "load_config",
     "save_config",
     "get_secret",
     "set_secret",
     "delete_secret",
+    "invalidate_secrets",
+    "refresh_secrets",
     "setup_logging",
 ]
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable
+
+
+class OperationCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: dict[int, Callable[[], None]] = {}
+        self._next_id = 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            callback()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise OperationCancelled()
+
+    def sleep(self, seconds: float) -> None:
+        if self._event.wait(seconds):
+            raise OperationCancelled()
+
+    def register(self, callback: Callable[[], None]) -> Callable[[], None]:
+        # The callback runs on the cancelling thread; the returned function
+        # unregisters it once the guarded work has finished.
+        with self._lock:
+            if not self._event.is_set():
+                key = self._next_id
+                self._next_id += 1
+                self._callbacks[key] = callback
+                return lambda: self._unregister(key)
+        callback()
+        return lambda: None
+
+    def _unregister(self, key: int) -> None:
+        with self._lock:
+            self._callbacks.pop(key, None)
@@ -1,148 +1,212 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
 import hashlib
 import hmac
 import json
-
-from app.infra.clients.http_client import HttpClient
-from app.infra.config import load_config
+import threading
+from functools import lru_cache
+
+from app.infra.cancellation import CancelToken
+from app.infra.clients.http_client import (
+    AsyncHttpClient,
+    get_shared_client,
+    run_coroutine,
+)
+from app.infra.config import get_config
 from app.infra.logger import setup_logging
 from app.infra.secrets import get_secret
 
+SEARCH_PARAMS = {
+    "Resources": [
+        "ItemInfo.Title",
+        "Offers.Listings.Price",
+    ],
+    "SearchIndex": "All",
+    "ItemCount": 10,
+}
+
+SERVICE = "ProductAdvertisingAPI"
+SEARCH_ITEMS_PATH = "/paapi5/searchitems"
+SEARCH_ITEMS_TARGET = "com.amazon.paapi5.v1.ProductAdvertisingAPIv1.SearchItems"
 
-def search_offers(keyword: str) -> list[dict]:
-    access_key = _get_secret_safe("amazon_access_key")
-    secret_key = _get_secret_safe("amazon_secret_key")
-    partner_tag = _get_secret_safe("amazon_partner_tag")
-    if not access_key or not secret_key or not partner_tag or not keyword:
+
+def search_offers(
+    keyword: str,
+    *,
+    locale: str | None = None,
+    token: CancelToken | None = None,
+) -> list[dict]:
+    return run_coroutine(search_offers_async(keyword, locale=locale), token=token)
+
+
+async def search_offers_async(
+    keyword: str,
+    *,
+    client: AsyncHttpClient | None = None,
+    locale: str | None = None,
+) -> list[dict]:
+    if not keyword:
+        return []
+    # keyring and config reads block, so they run off the shared event loop.
+    access_key, secret_key, partner_tag, locale = await asyncio.to_thread(
+        _load_settings, locale
+    )
+    if not access_key or not secret_key or not partner_tag:
         return []
 
-    config = load_config()
-    host, region = _amazon_host_region(config.amazon_locale)
-    service = "ProductAdvertisingAPI"
-    endpoint = f"https://{host}/paapi5/searchitems"
+    host, region = _amazon_host_region(locale)
+    endpoint = f"https://{host}{SEARCH_ITEMS_PATH}"
 
     payload = {
         "Keywords": keyword,
         "PartnerTag": partner_tag,
         "PartnerType": "Associates",
         "Marketplace": "www.amazon.co.jp",
-        "Resources": [
-            "ItemInfo.Title",
-            "Offers.Listings.Price",
-        ],
-        "SearchIndex": "All",
-        "ItemCount": 10,
+        **SEARCH_PARAMS,
     }
 
-    headers = _sign(
+    # The exact bytes that are hashed for the signature are sent as the body.
+    body = _encode_payload(payload)
+    signer = _get_signer(access_key, secret_key, host, region, SEARCH_ITEMS_TARGET)
+    headers = signer.sign(body)
+
+    client = client or get_shared_client()
+    response = await client.post(endpoint, content=body, headers=headers)
+    data = response.json()
+    items = data.get("SearchResult", {}).get("Items", []) or []
+    offers = []
+    for item in items:
+        title = (
+            item.get("ItemInfo", {}).get("Title", {}).get("DisplayValue")
+        )
+        listing = (
+            item.get("Offers", {})
+            .get("Listings", [{}])[0]
+            .get("Price", {})
+        )
+        price = listing.get("Amount")
+        offers.append(
+            {
+                "title": title,
+                "price": price,
+                "shipping": None,
+                "stock_status": None,
+                "url": item.get("DetailPageURL"),
+                "confidence": None,
+                "raw_text": None,
+            }
+        )
+    return offers
+
+
+class SigV4Signer:
+    algorithm = "AWS4-HMAC-SHA256"
+    signed_headers = "content-encoding;content-type;host;x-amz-date;x-amz-target"
+
+    def __init__(
+        self,
+        *,
+        access_key: str,
+        secret_key: str,
+        host: str,
+        region: str,
+        service: str,
+        amz_target: str,
+        canonical_uri: str = SEARCH_ITEMS_PATH,
+    ) -> None:
+        self._access_key = access_key
+        self._secret_key = secret_key
+        self._host = host
+        self._region = region
+        self._service = service
+        self._amz_target = amz_target
+        self._canonical_prefix = f"POST\n{canonical_uri}\n\n"
+        self._header_prefix = (
+            "content-encoding:amz-1.0\n"
+            "content-type:application/json; charset=utf-8\n"
+            f"host:{host}\n"
+        )
+        self._header_suffix = f"x-amz-target:{amz_target}\n"
+        self._lock = threading.Lock()
+        self._keys: dict[str, bytes] = {}
+
+    def signing_key(self, date_stamp: str) -> bytes:
+        with self._lock:
+            key = self._keys.get(date_stamp)
+            if key is None:
+                key = _get_signature_key(
+                    self._secret_key, date_stamp, self._region, self._service
+                )
+                # Only the current UTC day is ever needed again.
+                self._keys = {date_stamp: key}
+            return key
+
+    def sign(
+        self, body: bytes, now: datetime.datetime | None = None
+    ) -> dict[str, str]:
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date_stamp = amz_date[:8]
+
+        canonical_request = (
+            f"{self._canonical_prefix}"
+            f"{self._header_prefix}"
+            f"x-amz-date:{amz_date}\n"
+            f"{self._header_suffix}\n"
+            f"{self.signed_headers}\n"
+            f"{hashlib.sha256(body).hexdigest()}"
+        )
+        credential_scope = (
+            f"{date_stamp}/{self._region}/{self._service}/aws4_request"
+        )
+        string_to_sign = (
+            f"{self.algorithm}\n"
+            f"{amz_date}\n"
+            f"{credential_scope}\n"
+            f"{hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()}"
+        )
+        signature = hmac.new(
+            self.signing_key(date_stamp),
+            string_to_sign.encode("utf-8"),
+            hashlib.sha256,
+        ).hexdigest()
+
+        return {
+            "Content-Encoding": "amz-1.0",
+            "Content-Type": "application/json; charset=utf-8",
+            "Host": self._host,
+            "X-Amz-Date": amz_date,
+            "X-Amz-Target": self._amz_target,
+            "Authorization": (
+                f"{self.algorithm} "
+                f"Credential={self._access_key}/{credential_scope}, "
+                f"SignedHeaders={self.signed_headers}, "
+                f"Signature={signature}"
+            ),
+        }
+
+
+@lru_cache(maxsize=8)
+def _get_signer(
+    access_key: str, secret_key: str, host: str, region: str, amz_target: str
+) -> SigV4Signer:
+    return SigV4Signer(
         access_key=access_key,
         secret_key=secret_key,
         host=host,
         region=region,
-        service=service,
-        amz_target="com.amazon.paapi5.v1.ProductAdvertisingAPIv1.SearchItems",
-        payload=payload,
-    )
-
-    client = HttpClient(min_interval=1.0)
-    try:
-        response = client.post(endpoint, json=payload, headers=headers)
-        data = response.json()
-        items = data.get("SearchResult", {}).get("Items", []) or []
-        offers = []
-        for item in items:
-            title = (
-                item.get("ItemInfo", {}).get("Title", {}).get("DisplayValue")
-            )
-            listing = (
-                item.get("Offers", {})
-                .get("Listings", [{}])[0]
-                .get("Price", {})
-            )
-            price = listing.get("Amount")
-            offers.append(
-                {
-                    "title": title,
-                    "price": price,
-                    "shipping": None,
-                    "stock_status": None,
-                    "url": item.get("DetailPageURL"),
-                    "confidence": None,
-                    "raw_text": None,
-                }
-            )
-        return offers
-    finally:
-        client.close()
-
-
-def _sign(
-    *,
-    access_key: str,
-    secret_key: str,
-    host: str,
-    region: str,
-    service: str,
-    amz_target: str,
-    payload: dict,
-) -> dict[str, str]:
-    now = datetime.datetime.utcnow()
-    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
-    date_stamp = now.strftime("%Y%m%d")
-
-    payload_json = json.dumps(payload, separators=(",", ":"), ensure_ascii=True)
-    canonical_uri = "/paapi5/searchitems"
-    canonical_querystring = ""
-    canonical_headers = (
-        f"content-encoding:amz-1.0\n"
-        f"content-type:application/json; charset=utf-8\n"
-        f"host:{host}\n"
-        f"x-amz-date:{amz_date}\n"
-        f"x-amz-target:{amz_target}\n"
-    )
-    signed_headers = "content-encoding;content-type;host;x-amz-date;x-amz-target"
-    payload_hash = hashlib.sha256(payload_json.encode("utf-8")).hexdigest()
-    canonical_request = (
-        "POST\n"
-        f"{canonical_uri}\n"
-        f"{canonical_querystring}\n"
-        f"{canonical_headers}\n"
-        f"{signed_headers}\n"
-        f"{payload_hash}"
+        service=SERVICE,
+        amz_target=amz_target,
     )
 
-    algorithm = "AWS4-HMAC-SHA256"
-    credential_scope = f"{date_stamp}/{region}/{service}/aws4_request"
-    string_to_sign = (
-        f"{algorithm}\n"
-        f"{amz_date}\n"
-        f"{credential_scope}\n"
-        f"{hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()}"
-    )
 
-    signing_key = _get_signature_key(secret_key, date_stamp, region, service)
-    signature = hmac.new(
-        signing_key, string_to_sign.encode("utf-8"), hashlib.sha256
-    ).hexdigest()
-
-    authorization_header = (
-        f"{algorithm} "
-        f"Credential={access_key}/{credential_scope}, "
-        f"SignedHeaders={signed_headers}, "
-        f"Signature={signature}"
+def _encode_payload(payload: dict) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=True).encode(
+        "utf-8"
     )
 
-    return {
-        "Content-Encoding": "amz-1.0",
-        "Content-Type": "application/json; charset=utf-8",
-        "Host": host,
-        "X-Amz-Date": amz_date,
-        "X-Amz-Target": amz_target,
-        "Authorization": authorization_header,
-    }
-
 
 def _get_signature_key(
     key: str, date_stamp: str, region_name: str, service_name: str
@@ -167,6 +231,17 @@ def _amazon_host_region(locale: str) -> tuple[str, str]:
     return "webservices.amazon.co.jp", "us-west-2"
 
 
+def _load_settings(
+    locale: str | None,
+) -> tuple[str | None, str | None, str | None, str]:
+    return (
+        _get_secret_safe("amazon_access_key"),
+        _get_secret_safe("amazon_secret_key"),
+        _get_secret_safe("amazon_partner_tag"),
+        locale if locale is not None else get_config().amazon_locale,
+    )
+
+
 def _get_secret_safe(key: str) -> str | None:
     try:
         return get_secret(key)
@@ -1,11 +1,25 @@
 from __future__ import annotations
 
+import asyncio
+import atexit
+import importlib.util
+import threading
 import time
+from concurrent.futures import CancelledError, Future
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Coroutine, TypeVar
+from urllib.parse import urlsplit
 
 import httpx
 
+from app.infra.cancellation import CancelToken, OperationCancelled
+from app.infra.clients.rate_limit import TokenBucket, get_rate_limiter
+from app.infra.logger import setup_logging
+
+T = TypeVar("T")
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
 
 @dataclass
 class RetryPolicy:
@@ -14,19 +28,6 @@ class RetryPolicy:
     max_delay: float = 4.0
 
 
-class RateLimiter:
-    def __init__(self, min_interval: float = 1.0) -> None:
-        self._min_interval = min_interval
-        self._last_request = 0.0
-
-    def wait(self) -> None:
-        now = time.monotonic()
-        elapsed = now - self._last_request
-        if elapsed < self._min_interval:
-            time.sleep(self._min_interval - elapsed)
-        self._last_request = time.monotonic()
-
-
 class HttpClient:
     def __init__(
         self,
@@ -37,9 +38,11 @@ class HttpClient:
     ) -> None:
         self._client = httpx.Client(timeout=timeout)
         self._retry = retry_policy or RetryPolicy()
-        self._rate_limiter = RateLimiter(min_interval=min_interval)
+        self._min_interval = min_interval
 
-    def get(self, url: str, *, params: dict[str, Any] | None = None) -> httpx.Response:
+    def get(
+        self, url: str, *, params: dict[str, Any] | None = None
+    ) -> httpx.Response:
         return self._request("GET", url, params=params)
 
     def post(
@@ -47,9 +50,12 @@ class HttpClient:
         url: str,
         *,
         json: dict[str, Any] | None = None,
+        content: bytes | None = None,
         headers: dict[str, str] | None = None,
     ) -> httpx.Response:
-        return self._request("POST", url, json=json, headers=headers)
+        return self._request(
+            "POST", url, json=json, content=content, headers=headers
+        )
 
     def _request(
         self,
@@ -58,36 +64,262 @@ class HttpClient:
         *,
         params: dict[str, Any] | None = None,
         json: dict[str, Any] | None = None,
+        content: bytes | None = None,
         headers: dict[str, str] | None = None,
     ) -> httpx.Response:
+        rate_limiter = _rate_limiter_for(url, self._min_interval)
         last_exc: Exception | None = None
         for attempt in range(self._retry.max_retries + 1):
-            self._rate_limiter.wait()
+            rate_limiter.acquire()
             try:
                 response = self._client.request(
-                    method, url, params=params, json=json, headers=headers
+                    method,
+                    url,
+                    params=params,
+                    json=json,
+                    content=content,
+                    headers=headers,
                 )
-                if response.status_code in {429, 500, 502, 503, 504}:
-                    self._sleep_retry(response, attempt)
+                if response.status_code in RETRY_STATUS_CODES:
+                    self._sleep_retry(rate_limiter, response, attempt)
                     continue
                 response.raise_for_status()
                 return response
             except Exception as exc:  # pragma: no cover - network path
                 last_exc = exc
-                self._sleep_retry(None, attempt)
+                self._sleep_retry(rate_limiter, None, attempt)
         if last_exc:
             raise last_exc
         raise RuntimeError("Request failed without exception")
 
-    def _sleep_retry(self, response: httpx.Response | None, attempt: int) -> None:
-        if attempt >= self._retry.max_retries:
-            return
-        delay = min(self._retry.base_delay * (2**attempt), self._retry.max_delay)
-        if response is not None:
-            retry_after = response.headers.get("Retry-After")
-            if retry_after and retry_after.isdigit():
-                delay = max(delay, float(retry_after))
-        time.sleep(delay)
+    def _sleep_retry(
+        self,
+        rate_limiter: TokenBucket,
+        response: httpx.Response | None,
+        attempt: int,
+    ) -> None:
+        delay = _retry_delay(self._retry, rate_limiter, response, attempt)
+        if delay is not None:
+            time.sleep(delay)
 
     def close(self) -> None:
         self._client.close()
+
+
+class AsyncHttpClient:
+    def __init__(
+        self,
+        *,
+        timeout: float = 10.0,
+        retry_policy: RetryPolicy | None = None,
+        min_interval: float = 1.0,
+        http2: bool = False,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        if http2 and not _http2_available():
+            setup_logging().warning("h2 is not installed; falling back to HTTP/1.1")
+            http2 = False
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            transport=transport,
+        )
+        self._retry = retry_policy or RetryPolicy()
+        self._min_interval = min_interval
+
+    async def get(
+        self, url: str, *, params: dict[str, Any] | None = None
+    ) -> httpx.Response:
+        return await self._request("GET", url, params=params)
+
+    async def post(
+        self,
+        url: str,
+        *,
+        json: dict[str, Any] | None = None,
+        content: bytes | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> httpx.Response:
+        return await self._request(
+            "POST", url, json=json, content=content, headers=headers
+        )
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: dict[str, Any] | None = None,
+        json: dict[str, Any] | None = None,
+        content: bytes | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> httpx.Response:
+        rate_limiter = _rate_limiter_for(url, self._min_interval)
+        last_exc: Exception | None = None
+        for attempt in range(self._retry.max_retries + 1):
+            await rate_limiter.acquire_async()
+            try:
+                response = await self._client.request(
+                    method,
+                    url,
+                    params=params,
+                    json=json,
+                    content=content,
+                    headers=headers,
+                )
+                if response.status_code in RETRY_STATUS_CODES:
+                    await self._sleep_retry(rate_limiter, response, attempt)
+                    continue
+                response.raise_for_status()
+                return response
+            except Exception as exc:  # pragma: no cover - network path
+                last_exc = exc
+                await self._sleep_retry(rate_limiter, None, attempt)
+        if last_exc:
+            raise last_exc
+        raise RuntimeError("Request failed without exception")
+
+    async def _sleep_retry(
+        self,
+        rate_limiter: TokenBucket,
+        response: httpx.Response | None,
+        attempt: int,
+    ) -> None:
+        delay = _retry_delay(self._retry, rate_limiter, response, attempt)
+        if delay is not None:
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class _EventLoopThread:
+    def __init__(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run, name="http-event-loop", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> Future[T]:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def stop(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+_shared_lock = threading.Lock()
+_shared_loop: _EventLoopThread | None = None
+_shared_client: AsyncHttpClient | None = None
+_shared_options: dict[str, Any] = {}
+
+
+def configure_shared_client(**options: Any) -> None:
+    global _shared_client
+    with _shared_lock:
+        _shared_options.clear()
+        _shared_options.update(options)
+        client, _shared_client = _shared_client, None
+    if client is not None and _shared_loop is not None:
+        _shared_loop.submit(client.aclose()).result(timeout=5)
+
+
+def get_shared_client() -> AsyncHttpClient:
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = AsyncHttpClient(**_shared_options)
+        return _shared_client
+
+
+def submit_coroutine(coro: Coroutine[Any, Any, T]) -> Future[T]:
+    global _shared_loop
+    with _shared_lock:
+        if _shared_loop is None:
+            _shared_loop = _EventLoopThread()
+        loop = _shared_loop
+    return loop.submit(coro)
+
+
+def run_coroutine(
+    coro: Coroutine[Any, Any, T],
+    timeout: float | None = None,
+    *,
+    token: CancelToken | None = None,
+) -> T:
+    future = submit_coroutine(coro)
+    # Cancelling the token cancels the task on the loop, which aborts any
+    # pending request, retry backoff or rate-limit wait immediately.
+    unregister = token.register(future.cancel) if token is not None else None
+    try:
+        return future.result(timeout=timeout)
+    except CancelledError:
+        if token is not None and token.cancelled:
+            raise OperationCancelled() from None
+        raise
+    except BaseException:
+        future.cancel()
+        raise
+    finally:
+        if unregister is not None:
+            unregister()
+
+
+def close_shared_client() -> None:
+    global _shared_client, _shared_loop
+    with _shared_lock:
+        client, _shared_client = _shared_client, None
+        loop, _shared_loop = _shared_loop, None
+    if loop is None:
+        return
+    if client is not None:
+        try:
+            loop.submit(client.aclose()).result(timeout=5)
+        except Exception:  # pragma: no cover - shutdown path
+            pass
+    loop.stop()
+
+
+atexit.register(close_shared_client)
+
+
+def _rate_limiter_for(url: str, min_interval: float) -> TokenBucket:
+    # Buckets are shared per host across every client in the process.
+    return get_rate_limiter(urlsplit(url).netloc, min_interval=min_interval)
+
+
+def _retry_delay(
+    policy: RetryPolicy,
+    rate_limiter: TokenBucket,
+    response: httpx.Response | None,
+    attempt: int,
+) -> float | None:
+    if attempt >= policy.max_retries:
+        return None
+    delay = min(policy.base_delay * (2**attempt), policy.max_delay)
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        if response.status_code == 429:
+            # Throttle the whole host; the next acquire() absorbs the wait.
+            rate_limiter.defer(delay)
+            return None
+    return delay
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
@@ -1,33 +1,47 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Any
 
+from app.infra.cancellation import CancelToken
+from app.infra.clients.http_client import (
+    AsyncHttpClient,
+    get_shared_client,
+    run_coroutine,
+)
 from app.infra.logger import setup_logging
 from app.infra.secrets import get_secret
-from app.infra.clients.http_client import HttpClient
 
+SEARCH_PARAMS = {
+    "hits": 10,
+    "sort": "+itemPrice",
+}
 
-def search_offers(keyword: str) -> list[dict]:
-    app_id = _get_secret_safe("rakuten_app_id")
+
+def search_offers(keyword: str, *, token: CancelToken | None = None) -> list[dict]:
+    return run_coroutine(search_offers_async(keyword), token=token)
+
+
+async def search_offers_async(
+    keyword: str, *, client: AsyncHttpClient | None = None
+) -> list[dict]:
+    # keyring lookups can block, so they run off the shared event loop.
+    app_id = await asyncio.to_thread(_get_secret_safe, "rakuten_app_id")
     if not app_id or not keyword:
         return []
 
-    client = HttpClient(min_interval=1.0)
-    try:
-        response = client.get(
-            "https://app.rakuten.co.jp/services/api/IchibaItem/Search/20170706",
-            params={
-                "applicationId": app_id,
-                "keyword": keyword,
-                "hits": 10,
-                "sort": "+itemPrice",
-            },
-        )
-        data = response.json()
-        items = data.get("Items", [])
-        return [_normalize_item(entry.get("Item", {})) for entry in items]
-    finally:
-        client.close()
+    client = client or get_shared_client()
+    response = await client.get(
+        "https://app.rakuten.co.jp/services/api/IchibaItem/Search/20170706",
+        params={
+            "applicationId": app_id,
+            "keyword": keyword,
+            **SEARCH_PARAMS,
+        },
+    )
+    data = response.json()
+    items = data.get("Items", [])
+    return [_normalize_item(entry.get("Item", {})) for entry in items]
 
 
 def _normalize_item(item: dict[str, Any]) -> dict:
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rate: float
+    burst: int = 1
+
+
+DEFAULT_RATE_LIMITS = {
+    "app.rakuten.co.jp": RateLimit(rate=1.0, burst=1),
+    "shopping.yahooapis.jp": RateLimit(rate=1.0, burst=1),
+    "webservices.amazon.co.jp": RateLimit(rate=1.0, burst=1),
+    "webservices.amazon.com": RateLimit(rate=1.0, burst=1),
+    "api.tavily.com": RateLimit(rate=2.0, burst=4),
+}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self._lock = threading.Lock()
+        self._rate = rate
+        self._capacity = max(1, burst)
+        self._tokens = float(self._capacity)
+        self._updated = time.monotonic()
+
+    @property
+    def limit(self) -> RateLimit:
+        return RateLimit(rate=self._rate, burst=self._capacity)
+
+    def configure(self, rate: float, burst: int = 1) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._rate = rate
+            self._capacity = max(1, burst)
+            self._tokens = min(self._tokens, float(self._capacity))
+
+    def acquire(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self._reserve()
+        if delay <= 0:
+            return
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            # A cancelled wait never sends its request, so give the slot back.
+            self._refund()
+            raise
+
+    def defer(self, seconds: float) -> None:
+        # Called on 429/Retry-After so every caller of this bucket backs off.
+        if self._rate <= 0 or seconds <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - seconds * self._rate
+
+    def _reserve(self) -> float:
+        if self._rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            # Taking the token up front keeps ordering fair between callers;
+            # a negative balance is the queue of reservations still waiting.
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._rate
+
+    def _refund(self) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(float(self._capacity), self._tokens + 1.0)
+
+    def _refill(self, now: float) -> None:
+        if self._rate > 0:
+            elapsed = now - self._updated
+            self._tokens = min(
+                float(self._capacity), self._tokens + elapsed * self._rate
+            )
+        self._updated = now
+
+
+_registry_lock = threading.Lock()
+_buckets: dict[str, TokenBucket] = {}
+_limits: dict[str, RateLimit] = dict(DEFAULT_RATE_LIMITS)
+
+
+def get_rate_limiter(key: str, *, min_interval: float = 1.0) -> TokenBucket:
+    with _registry_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            limit = _limits.get(key) or _limit_from_interval(min_interval)
+            bucket = TokenBucket(rate=limit.rate, burst=limit.burst)
+            _buckets[key] = bucket
+        return bucket
+
+
+def configure_rate_limits(limits: dict[str, Any]) -> None:
+    with _registry_lock:
+        _limits.clear()
+        _limits.update(DEFAULT_RATE_LIMITS)
+        for key, value in limits.items():
+            _limits[key] = _parse_limit(value)
+        for key, bucket in _buckets.items():
+            limit = _limits.get(key)
+            if limit is not None:
+                bucket.configure(limit.rate, limit.burst)
+
+
+def _parse_limit(value: Any) -> RateLimit:
+    if isinstance(value, dict):
+        return RateLimit(
+            rate=float(value.get("rate", 1.0)),
+            burst=int(value.get("burst", 1)),
+        )
+    return RateLimit(rate=float(value))
+
+
+def _limit_from_interval(min_interval: float) -> RateLimit:
+    if min_interval <= 0:
+        return RateLimit(rate=0.0)
+    return RateLimit(rate=1.0 / min_interval)
@@ -1,48 +1,61 @@
 from __future__ import annotations
 
+import asyncio
 import re
 
-from app.infra.clients.http_client import HttpClient
+from app.infra.cancellation import CancelToken
+from app.infra.clients.http_client import (
+    AsyncHttpClient,
+    get_shared_client,
+    run_coroutine,
+)
 from app.infra.logger import setup_logging
 from app.infra.secrets import get_secret
 
+SEARCH_PARAMS = {
+    "search_depth": "basic",
+    "max_results": 5,
+    "include_raw_content": True,
+}
 
-def search_offers(keyword: str) -> list[dict]:
-    api_key = _get_secret_safe("tavily_api_key")
+
+def search_offers(keyword: str, *, token: CancelToken | None = None) -> list[dict]:
+    return run_coroutine(search_offers_async(keyword), token=token)
+
+
+async def search_offers_async(
+    keyword: str, *, client: AsyncHttpClient | None = None
+) -> list[dict]:
+    api_key = await asyncio.to_thread(_get_secret_safe, "tavily_api_key")
     if not api_key or not keyword:
         return []
 
-    client = HttpClient(min_interval=1.0)
-    try:
-        response = client.post(
-            "https://api.tavily.com/search",
-            json={
-                "api_key": api_key,
-                "query": keyword,
-                "search_depth": "basic",
-                "max_results": 5,
-                "include_raw_content": True,
-            },
+    client = client or get_shared_client()
+    response = await client.post(
+        "https://api.tavily.com/search",
+        json={
+            "api_key": api_key,
+            "query": keyword,
+            **SEARCH_PARAMS,
+        },
+    )
+    data = response.json()
+    results = data.get("results", [])
+    offers = []
+    for entry in results:
+        price = _extract_price(entry.get("title"), entry.get("content"), entry.get("raw_content"))
+        offers.append(
+            {
+                "title": entry.get("title"),
+                "price": price,
+                "shipping": None,
+                "stock_status": None,
+                "url": entry.get("url"),
+                "confidence": entry.get("score"),
+                "raw_text": entry.get("content") or entry.get("raw_content"),
+            }
         )
-        data = response.json()
-        results = data.get("results", [])
-        offers = []
-        for entry in results:
-            price = _extract_price(entry.get("title"), entry.get("content"), entry.get("raw_content"))
-            offers.append(
-                {
-                    "title": entry.get("title"),
-                    "price": price,
-                    "shipping": None,
-                    "stock_status": None,
-                    "url": entry.get("url"),
-                    "confidence": entry.get("score"),
-                    "raw_text": entry.get("content") or entry.get("raw_content"),
-                }
-            )
-        return offers
-    finally:
-        client.close()
+    return offers
 
 
 def _get_secret_safe(key: str) -> str | None:
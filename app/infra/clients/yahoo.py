@@ -1,31 +1,45 @@
 from __future__ import annotations
 
-from app.infra.clients.http_client import HttpClient
+import asyncio
+
+from app.infra.cancellation import CancelToken
+from app.infra.clients.http_client import (
+    AsyncHttpClient,
+    get_shared_client,
+    run_coroutine,
+)
 from app.infra.logger import setup_logging
 from app.infra.secrets import get_secret
 
+SEARCH_PARAMS = {
+    "results": 10,
+    "sort": "+price",
+}
+
+
+def search_offers(keyword: str, *, token: CancelToken | None = None) -> list[dict]:
+    return run_coroutine(search_offers_async(keyword), token=token)
 
-def search_offers(keyword: str) -> list[dict]:
-    app_id = _get_secret_safe("yahoo_client_id")
+
+async def search_offers_async(
+    keyword: str, *, client: AsyncHttpClient | None = None
+) -> list[dict]:
+    app_id = await asyncio.to_thread(_get_secret_safe, "yahoo_client_id")
     if not app_id or not keyword:
         return []
 
-    client = HttpClient(min_interval=1.0)
-    try:
-        response = client.get(
-            "https://shopping.yahooapis.jp/ShoppingWebService/V3/itemSearch",
-            params={
-                "appid": app_id,
-                "query": keyword,
-                "results": 10,
-                "sort": "+price",
-            },
-        )
-        data = response.json()
-        items = data.get("hits", [])
-        return [_normalize_item(item) for item in items]
-    finally:
-        client.close()
+    client = client or get_shared_client()
+    response = await client.get(
+        "https://shopping.yahooapis.jp/ShoppingWebService/V3/itemSearch",
+        params={
+            "appid": app_id,
+            "query": keyword,
+            **SEARCH_PARAMS,
+        },
+    )
+    data = response.json()
+    items = data.get("hits", [])
+    return [_normalize_item(item) for item in items]
 
 
 def _normalize_item(item: dict) -> dict:
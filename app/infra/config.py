@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import json
-from dataclasses import asdict, dataclass
+import threading
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from typing import Any
 
 
 DEFAULT_CONFIG_PATH = Path("config.json")
 
+_cache_lock = threading.Lock()
+_cache: dict[Path, tuple[int, "AppConfig"]] = {}
+
 
 @dataclass
 class AppConfig:
@@ -15,8 +19,18 @@ class AppConfig:
     target_profit: int = 2000
     default_packaging_cost: int = 50
     db_path: str = "./data/app.db"
+    db_profile: str = "balanced"
     kakaku_mode: str = "tavily"
     amazon_locale: str = "JP"
+    http2: bool = False
+    rate_limits: dict[str, Any] = field(default_factory=dict)
+    search_cache_ttls: dict[str, float] = field(default_factory=dict)
+    search_cache_max_entries: int = 500
+    retention_days: dict[str, int] = field(default_factory=dict)
+    compact_interval_hours: float = 24.0
+    archive_path: str = "./data/archive.db"
+    archive_after_days: int = 0
+    origin_prefecture: str = ""
 
 
 def load_config(path: Path | str | None = None) -> AppConfig:
@@ -35,6 +49,30 @@ def load_config(path: Path | str | None = None) -> AppConfig:
     return AppConfig(**merged)
 
 
+def get_config(path: Path | str | None = None) -> AppConfig:
+    config_path = Path(path) if path else DEFAULT_CONFIG_PATH
+    key = config_path.resolve()
+    mtime = _mtime_ns(config_path)
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None and mtime is not None and cached[0] == mtime:
+        return cached[1]
+    config = load_config(config_path)
+    mtime = _mtime_ns(config_path)
+    if mtime is not None:
+        with _cache_lock:
+            _cache[key] = (mtime, config)
+    return config
+
+
+def invalidate_config(path: Path | str | None = None) -> None:
+    with _cache_lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(Path(path).resolve(), None)
+
+
 def save_config(config: AppConfig, path: Path | str | None = None) -> None:
     config_path = Path(path) if path else DEFAULT_CONFIG_PATH
     config_path.parent.mkdir(parents=True, exist_ok=True)
@@ -43,3 +81,16 @@ def save_config(config: AppConfig, path: Path | str | None = None) -> None:
         json.dumps(payload, ensure_ascii=True, indent=2) + "\n",
         encoding="utf-8",
     )
+    mtime = _mtime_ns(config_path)
+    with _cache_lock:
+        if mtime is None:
+            _cache.pop(config_path.resolve(), None)
+        else:
+            _cache[config_path.resolve()] = (mtime, config)
+
+
+def _mtime_ns(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
@@ -1,5 +1,21 @@
 """Database package."""
 
-from .repo import Repository, default_db_path, init_db
+from .connection import (
+    PERFORMANCE_PROFILES,
+    ConnectionManager,
+    PerformanceProfile,
+    default_db_path,
+    init_db,
+    open_db,
+)
+from .repo import Repository
 
-__all__ = ["Repository", "default_db_path", "init_db"]
+__all__ = [
+    "PERFORMANCE_PROFILES",
+    "ConnectionManager",
+    "PerformanceProfile",
+    "Repository",
+    "default_db_path",
+    "init_db",
+    "open_db",
+]
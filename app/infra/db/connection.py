@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from app.infra.db.migrations import (
+    LATEST_VERSION,
+    create_archive_schema,
+    migrate,
+    schema_version,
+)
+from app.infra.logger import setup_logging
+
+
+@dataclass(frozen=True)
+class PerformanceProfile:
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size_kib: int = 16_384
+    mmap_size: int = 64 * 1024 * 1024
+    temp_store: str = "MEMORY"
+    busy_timeout_ms: int = 5_000
+    wal_autocheckpoint: int = 1_000
+
+
+DEFAULT_PROFILE = "balanced"
+PERFORMANCE_PROFILES = {
+    # WAL with full fsync on every commit: slowest, survives power loss.
+    "safe": PerformanceProfile(
+        synchronous="FULL",
+        cache_size_kib=8_192,
+        mmap_size=0,
+        temp_store="DEFAULT",
+    ),
+    # WAL with fsync only at checkpoints; a crash cannot corrupt the file.
+    "balanced": PerformanceProfile(),
+    "fast": PerformanceProfile(
+        cache_size_kib=65_536,
+        mmap_size=256 * 1024 * 1024,
+        busy_timeout_ms=10_000,
+        wal_autocheckpoint=4_000,
+    ),
+}
+
+
+def default_db_path() -> Path:
+    return Path("data") / "app.db"
+
+
+def init_db(
+    db_path: Path | str | None = None,
+    profile: str | PerformanceProfile | None = None,
+    *,
+    check_same_thread: bool = True,
+) -> sqlite3.Connection:
+    path = Path(db_path) if db_path else default_db_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    settings = resolve_profile(profile)
+    conn = _connect(path, settings, check_same_thread)
+    # Only takes effect on a new file, and only before WAL writes its header.
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    apply_profile(conn, settings)
+    migrate(conn)
+    return conn
+
+
+def open_db(
+    db_path: Path | str | None = None,
+    profile: str | PerformanceProfile | None = None,
+    *,
+    check_same_thread: bool = True,
+) -> sqlite3.Connection:
+    # Worker path: the schema was migrated by init_db at startup, so only the
+    # version is checked and no DDL or seed I/O is repeated.
+    path = Path(db_path) if db_path else default_db_path()
+    settings = resolve_profile(profile)
+    conn = _connect(path, settings, check_same_thread)
+    version = schema_version(conn)
+    if version != LATEST_VERSION:
+        conn.close()
+        raise RuntimeError(
+            f"database schema v{version} does not match v{LATEST_VERSION}; "
+            "open it with init_db first"
+        )
+    apply_profile(conn, settings)
+    return conn
+
+
+def resolve_profile(
+    profile: str | PerformanceProfile | None,
+) -> PerformanceProfile:
+    if isinstance(profile, PerformanceProfile):
+        return profile
+    name = profile or DEFAULT_PROFILE
+    settings = PERFORMANCE_PROFILES.get(name)
+    if settings is None:
+        setup_logging().warning(
+            "unknown db profile %r; using %s", name, DEFAULT_PROFILE
+        )
+        settings = PERFORMANCE_PROFILES[DEFAULT_PROFILE]
+    return settings
+
+
+def apply_profile(conn: sqlite3.Connection, profile: PerformanceProfile) -> None:
+    # journal_mode is persistent in the file; the rest are per connection.
+    conn.execute(f"PRAGMA journal_mode={profile.journal_mode}")
+    conn.execute(f"PRAGMA synchronous={profile.synchronous}")
+    conn.execute(f"PRAGMA cache_size={-profile.cache_size_kib}")
+    conn.execute(f"PRAGMA mmap_size={profile.mmap_size}")
+    conn.execute(f"PRAGMA temp_store={profile.temp_store}")
+    conn.execute(f"PRAGMA busy_timeout={profile.busy_timeout_ms}")
+    conn.execute(f"PRAGMA wal_autocheckpoint={profile.wal_autocheckpoint}")
+
+
+def _connect(
+    path: Path, settings: PerformanceProfile, check_same_thread: bool
+) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        path,
+        timeout=settings.busy_timeout_ms / 1000,
+        check_same_thread=check_same_thread,
+    )
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def archive_attached(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM pragma_database_list WHERE name = 'archive'"
+    ).fetchone()
+    return row is not None
+
+
+class ConnectionManager:
+    def __init__(
+        self,
+        db_path: Path | str | None = None,
+        profile: str | PerformanceProfile | None = None,
+        *,
+        connection: sqlite3.Connection | None = None,
+        busy_retries: int = 5,
+        archive_path: Path | str | None = None,
+    ) -> None:
+        # With an explicit connection, reads and writes share it (tests and
+        # single-threaded tools); otherwise each thread gets its own reader
+        # and all writes go through one serialized writer connection.
+        self._path = Path(db_path) if db_path else default_db_path()
+        self._profile = resolve_profile(profile)
+        self._busy_retries = busy_retries
+        self._archive_path = Path(archive_path) if archive_path else None
+        self._write_lock = threading.RLock()
+        self._readers_lock = threading.Lock()
+        self._readers: dict[int, sqlite3.Connection] = {}
+        self._local = threading.local()
+        self._shared = connection is not None
+        if connection is not None:
+            self._writer = connection
+        else:
+            self._writer = init_db(
+                self._path, self._profile, check_same_thread=False
+            )
+
+    def reader(self, *, archive: bool = False) -> sqlite3.Connection:
+        if self._shared:
+            conn = self._writer
+        else:
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = open_db(self._path, self._profile, check_same_thread=False)
+                conn.execute("PRAGMA query_only = ON")
+                self._local.conn = conn
+                with self._readers_lock:
+                    self._readers[threading.get_ident()] = conn
+        if archive:
+            self._attach_archive(conn, create=False)
+        return conn
+
+    def release_reader(self) -> None:
+        # Worker threads call this before exiting so their reader is closed.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._readers_lock:
+            self._readers.pop(threading.get_ident(), None)
+        conn.close()
+
+    @contextmanager
+    def writer(self, *, archive: bool = False) -> Iterator[sqlite3.Connection]:
+        with self._write_lock:
+            conn = self._writer
+            if archive and not self._attach_archive(conn, create=True):
+                raise RuntimeError("archive database is not available")
+            if conn.in_transaction:
+                # Nested write on the same thread; the outer block commits.
+                yield conn
+                return
+            self._begin(conn)
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def checkpoint(self, mode: str = "PASSIVE") -> tuple[int, int, int]:
+        if mode not in {"PASSIVE", "FULL", "RESTART", "TRUNCATE"}:
+            raise ValueError(f"unknown checkpoint mode: {mode}")
+        with self._write_lock:
+            row = self._writer.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        return row[0], row[1], row[2]
+
+    def incremental_vacuum(self, pages: int | None = None) -> int:
+        # Returns the free pages handed back to the filesystem; None frees all.
+        with self._write_lock:
+            conn = self._writer
+            if conn.in_transaction:
+                return 0
+            before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            # execute() steps a statement once, which frees a single page;
+            # executescript() runs it to completion.
+            limit = "" if pages is None else f"({int(pages)})"
+            conn.executescript(f"PRAGMA incremental_vacuum{limit}")
+            after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return before - after
+
+    def close(self) -> None:
+        with self._readers_lock:
+            readers = list(self._readers.values())
+            self._readers.clear()
+        for conn in readers:
+            conn.close()
+        with self._write_lock:
+            self._writer.close()
+
+    def _attach_archive(self, conn: sqlite3.Connection, *, create: bool) -> bool:
+        # ATTACH is per connection and cannot run inside a transaction, so it
+        # happens lazily the first time a connection asks for archived data.
+        if archive_attached(conn):
+            return True
+        if self._archive_path is None or conn.in_transaction:
+            return False
+        if not create and not self._archive_path.exists():
+            return False
+        self._archive_path.parent.mkdir(parents=True, exist_ok=True)
+        conn.execute("ATTACH DATABASE ? AS archive", (str(self._archive_path),))
+        if create:
+            create_archive_schema(conn)
+        return True
+
+    def _begin(self, conn: sqlite3.Connection) -> None:
+        # busy_timeout covers ordinary contention; this retries the cases
+        # SQLite reports immediately, such as another process's checkpoint.
+        delay = 0.05
+        for attempt in range(self._busy_retries + 1):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as exc:
+                message = str(exc)
+                if attempt == self._busy_retries or not (
+                    "locked" in message or "busy" in message
+                ):
+                    raise
+                setup_logging().warning("database busy; retrying (%s)", message)
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
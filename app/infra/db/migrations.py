@@ -0,0 +1,579 @@
+from __future__ import annotations
+
+import csv
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+from app.domain.normalize import listing_key
+from app.infra.logger import setup_logging
+
+
+def _initial_schema(conn: sqlite3.Connection) -> None:
+    schema_path = Path(__file__).with_name("schema.sql")
+    execute_script(conn, schema_path.read_text(encoding="utf-8"))
+    _seed_sources(conn)
+    _seed_shipping_rules(conn)
+
+
+def _offer_listing_indexes(conn: sqlite3.Connection) -> None:
+    # Match the ORDER BY expressions of Repository.list_offer_rows so each
+    # sort mode is an index range scan; NULL sorts first as -1.
+    for column in ("total", "price", "shipping"):
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_offers_item_{column}_key "
+            f"ON offers(item_id, IFNULL({column}, -1))"
+        )
+
+
+def _offer_listings(conn: sqlite3.Connection) -> None:
+    # Offers become one row per listing; every observed price or stock change
+    # moves to the narrow offer_price_history table.
+    conn.execute("ALTER TABLE offers ADD COLUMN listing_key TEXT")
+    conn.execute(
+        """
+        CREATE TABLE offer_price_history (
+          id INTEGER PRIMARY KEY,
+          offer_id INTEGER NOT NULL,
+          price INTEGER,
+          shipping INTEGER,
+          total INTEGER,
+          stock_status TEXT,
+          fetched_at TEXT NOT NULL,
+          FOREIGN KEY(offer_id) REFERENCES offers(id)
+        )
+        """
+    )
+    conn.execute(
+        "CREATE INDEX idx_offer_price_history_offer "
+        "ON offer_price_history(offer_id, fetched_at)"
+    )
+
+    groups: dict[tuple, list[sqlite3.Row]] = {}
+    for row in conn.execute(
+        """
+        SELECT id, item_id, source_id, url, title, price, shipping, total,
+               stock_status, fetched_at
+        FROM offers ORDER BY fetched_at, id
+        """
+    ):
+        key = (row["item_id"], row["source_id"], listing_key(row["url"], row["title"]))
+        groups.setdefault(key, []).append(row)
+
+    history = []
+    keys = []
+    merged = []
+    for (_, _, key), rows in groups.items():
+        latest = rows[-1]["id"]
+        keys.append((key, latest))
+        previous = None
+        for row in rows:
+            state = (row["price"], row["shipping"], row["total"], row["stock_status"])
+            if state != previous:
+                history.append((latest, *state, row["fetched_at"]))
+                previous = state
+            if row["id"] != latest:
+                merged.append((latest, row["id"]))
+
+    conn.executemany("UPDATE offers SET listing_key = ? WHERE id = ?", keys)
+    conn.executemany(
+        """
+        INSERT INTO offer_price_history(
+          offer_id, price, shipping, total, stock_status, fetched_at
+        ) VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        history,
+    )
+    conn.executemany(
+        "UPDATE calculations SET offer_id = ? WHERE offer_id = ?", merged
+    )
+    conn.executemany(
+        "DELETE FROM offers WHERE id = ?", [(old,) for _, old in merged]
+    )
+    conn.execute(
+        "CREATE UNIQUE INDEX ux_offers_listing "
+        "ON offers(item_id, IFNULL(source_id, -1), listing_key)"
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER offers_history_insert AFTER INSERT ON offers
+        BEGIN
+          INSERT INTO offer_price_history(
+            offer_id, price, shipping, total, stock_status, fetched_at
+          ) VALUES (
+            new.id, new.price, new.shipping, new.total, new.stock_status,
+            new.fetched_at
+          );
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER offers_history_update AFTER UPDATE ON offers
+        WHEN old.price IS NOT new.price
+          OR old.shipping IS NOT new.shipping
+          OR old.total IS NOT new.total
+          OR old.stock_status IS NOT new.stock_status
+        BEGIN
+          INSERT INTO offer_price_history(
+            offer_id, price, shipping, total, stock_status, fetched_at
+          ) VALUES (
+            new.id, new.price, new.shipping, new.total, new.stock_status,
+            new.fetched_at
+          );
+        END
+        """
+    )
+
+
+def _history_retention_index(conn: sqlite3.Connection) -> None:
+    # Retention scans history by age across all offers.
+    conn.execute(
+        "CREATE INDEX idx_offer_price_history_fetched_at "
+        "ON offer_price_history(fetched_at)"
+    )
+
+
+def _items_search_index(conn: sqlite3.Connection) -> None:
+    # External-content FTS5 over items; the trigram tokenizer matches any
+    # substring of 3+ characters, which suits Japanese names without spaces.
+    execute_script(
+        conn,
+        """
+        CREATE VIRTUAL TABLE items_fts USING fts5(
+          name, search_keyword, jan, model_number, category, notes,
+          content='items', content_rowid='id', tokenize='trigram'
+        );
+        CREATE TRIGGER items_fts_insert AFTER INSERT ON items BEGIN
+          INSERT INTO items_fts(
+            rowid, name, search_keyword, jan, model_number, category, notes
+          ) VALUES (
+            new.id, new.name, new.search_keyword, new.jan, new.model_number,
+            new.category, new.notes
+          );
+        END;
+        CREATE TRIGGER items_fts_delete AFTER DELETE ON items BEGIN
+          INSERT INTO items_fts(
+            items_fts, rowid, name, search_keyword, jan, model_number,
+            category, notes
+          ) VALUES (
+            'delete', old.id, old.name, old.search_keyword, old.jan,
+            old.model_number, old.category, old.notes
+          );
+        END;
+        CREATE TRIGGER items_fts_update AFTER UPDATE ON items BEGIN
+          INSERT INTO items_fts(
+            items_fts, rowid, name, search_keyword, jan, model_number,
+            category, notes
+          ) VALUES (
+            'delete', old.id, old.name, old.search_keyword, old.jan,
+            old.model_number, old.category, old.notes
+          );
+          INSERT INTO items_fts(
+            rowid, name, search_keyword, jan, model_number, category, notes
+          ) VALUES (
+            new.id, new.name, new.search_keyword, new.jan, new.model_number,
+            new.category, new.notes
+          );
+        END;
+        INSERT INTO items_fts(items_fts) VALUES ('rebuild');
+        """,
+    )
+
+
+def _offers_search_index(conn: sqlite3.Connection) -> None:
+    # Upserts rewrite title and raw_text on every refresh, so the update
+    # trigger only reindexes when the text actually changed.
+    execute_script(
+        conn,
+        """
+        CREATE VIRTUAL TABLE offers_fts USING fts5(
+          title, raw_text,
+          content='offers', content_rowid='id', tokenize='trigram'
+        );
+        CREATE TRIGGER offers_fts_insert AFTER INSERT ON offers BEGIN
+          INSERT INTO offers_fts(rowid, title, raw_text)
+          VALUES (new.id, new.title, new.raw_text);
+        END;
+        CREATE TRIGGER offers_fts_delete AFTER DELETE ON offers BEGIN
+          INSERT INTO offers_fts(offers_fts, rowid, title, raw_text)
+          VALUES ('delete', old.id, old.title, old.raw_text);
+        END;
+        CREATE TRIGGER offers_fts_update AFTER UPDATE OF title, raw_text ON offers
+        WHEN old.title IS NOT new.title OR old.raw_text IS NOT new.raw_text
+        BEGIN
+          INSERT INTO offers_fts(offers_fts, rowid, title, raw_text)
+          VALUES ('delete', old.id, old.title, old.raw_text);
+          INSERT INTO offers_fts(rowid, title, raw_text)
+          VALUES (new.id, new.title, new.raw_text);
+        END;
+        INSERT INTO offers_fts(offers_fts) VALUES ('rebuild');
+        """,
+    )
+
+
+_BEST_OFFER = """
+  SELECT total, id FROM offers
+  WHERE item_id = {item} AND total IS NOT NULL
+  ORDER BY IFNULL(total, -1), id LIMIT 1
+"""
+_LATEST_MARKET = """
+  SELECT low, mid, high, id FROM market_refs
+  WHERE item_id = {item} ORDER BY id DESC LIMIT 1
+"""
+_LATEST_CALCULATION = """
+  SELECT profit, profit_rate, id FROM calculations
+  WHERE item_id = {item} ORDER BY id DESC LIMIT 1
+"""
+
+
+def _item_summary(conn: sqlite3.Connection) -> None:
+    # One row per item, kept current by triggers so every write path
+    # (refresh, retention, archive, manual entry) updates it. Inserts adjust
+    # the row in place; only removing the current best or latest row rescans
+    # that item through the existing per-item indexes.
+    better = (
+        "new.total IS NOT NULL AND (best_total IS NULL OR new.total < best_total "
+        "OR (new.total = best_total AND new.id < best_offer_id))"
+    )
+    execute_script(
+        conn,
+        f"""
+        CREATE TABLE item_summary (
+          item_id INTEGER PRIMARY KEY,
+          offer_count INTEGER NOT NULL DEFAULT 0,
+          best_total INTEGER,
+          best_offer_id INTEGER,
+          last_fetched_at TEXT,
+          market_low INTEGER,
+          market_mid INTEGER,
+          market_high INTEGER,
+          market_ref_id INTEGER,
+          last_profit INTEGER,
+          last_profit_rate REAL,
+          calculation_id INTEGER,
+          FOREIGN KEY(item_id) REFERENCES items(id)
+        );
+        CREATE INDEX idx_item_summary_profit ON item_summary(last_profit);
+        CREATE INDEX idx_item_summary_spread
+          ON item_summary((market_mid - best_total));
+        CREATE INDEX idx_item_summary_best_total ON item_summary(best_total);
+
+        CREATE TRIGGER item_summary_item_insert AFTER INSERT ON items BEGIN
+          INSERT OR IGNORE INTO item_summary(item_id) VALUES (new.id);
+        END;
+        CREATE TRIGGER item_summary_item_delete AFTER DELETE ON items BEGIN
+          DELETE FROM item_summary WHERE item_id = old.id;
+        END;
+
+        CREATE TRIGGER item_summary_offer_insert AFTER INSERT ON offers BEGIN
+          INSERT OR IGNORE INTO item_summary(item_id) VALUES (new.item_id);
+          UPDATE item_summary SET
+            offer_count = offer_count + 1,
+            best_offer_id = CASE WHEN {better} THEN new.id ELSE best_offer_id END,
+            best_total = CASE WHEN {better} THEN new.total ELSE best_total END,
+            last_fetched_at = MAX(IFNULL(last_fetched_at, ''), new.fetched_at)
+          WHERE item_id = new.item_id;
+        END;
+        CREATE TRIGGER item_summary_offer_update
+        AFTER UPDATE OF total, fetched_at ON offers BEGIN
+          UPDATE item_summary SET
+            best_offer_id = CASE WHEN {better} THEN new.id ELSE best_offer_id END,
+            best_total = CASE WHEN {better} THEN new.total ELSE best_total END,
+            last_fetched_at = MAX(IFNULL(last_fetched_at, ''), new.fetched_at)
+          WHERE item_id = new.item_id;
+          UPDATE item_summary
+          SET (best_total, best_offer_id) = ({_BEST_OFFER.format(item="new.item_id")})
+          WHERE item_id = new.item_id AND best_offer_id = new.id
+            AND (new.total IS NULL OR new.total > old.total);
+        END;
+        CREATE TRIGGER item_summary_offer_delete AFTER DELETE ON offers BEGIN
+          UPDATE item_summary SET offer_count = offer_count - 1
+          WHERE item_id = old.item_id;
+          UPDATE item_summary
+          SET (best_total, best_offer_id) = ({_BEST_OFFER.format(item="old.item_id")})
+          WHERE item_id = old.item_id AND best_offer_id = old.id;
+          UPDATE item_summary SET last_fetched_at = (
+            SELECT MAX(fetched_at) FROM offers WHERE item_id = old.item_id
+          )
+          WHERE item_id = old.item_id AND last_fetched_at = old.fetched_at;
+        END;
+
+        CREATE TRIGGER item_summary_market_insert AFTER INSERT ON market_refs
+        BEGIN
+          INSERT OR IGNORE INTO item_summary(item_id) VALUES (new.item_id);
+          UPDATE item_summary SET
+            market_low = new.low, market_mid = new.mid, market_high = new.high,
+            market_ref_id = new.id
+          WHERE item_id = new.item_id;
+        END;
+        CREATE TRIGGER item_summary_market_delete AFTER DELETE ON market_refs
+        BEGIN
+          UPDATE item_summary
+          SET (market_low, market_mid, market_high, market_ref_id) = (
+            {_LATEST_MARKET.format(item="old.item_id")}
+          )
+          WHERE item_id = old.item_id AND market_ref_id = old.id;
+        END;
+
+        CREATE TRIGGER item_summary_calculation_insert AFTER INSERT ON calculations
+        BEGIN
+          INSERT OR IGNORE INTO item_summary(item_id) VALUES (new.item_id);
+          UPDATE item_summary SET
+            last_profit = new.profit, last_profit_rate = new.profit_rate,
+            calculation_id = new.id
+          WHERE item_id = new.item_id;
+        END;
+        CREATE TRIGGER item_summary_calculation_delete AFTER DELETE ON calculations
+        BEGIN
+          UPDATE item_summary
+          SET (last_profit, last_profit_rate, calculation_id) = (
+            {_LATEST_CALCULATION.format(item="old.item_id")}
+          )
+          WHERE item_id = old.item_id AND calculation_id = old.id;
+        END;
+
+        INSERT INTO item_summary(item_id) SELECT id FROM items;
+        UPDATE item_summary SET
+          offer_count = (
+            SELECT COUNT(*) FROM offers WHERE item_id = item_summary.item_id
+          ),
+          last_fetched_at = (
+            SELECT MAX(fetched_at) FROM offers
+            WHERE item_id = item_summary.item_id
+          ),
+          (best_total, best_offer_id) = (
+            {_BEST_OFFER.format(item="item_summary.item_id")}
+          ),
+          (market_low, market_mid, market_high, market_ref_id) = (
+            {_LATEST_MARKET.format(item="item_summary.item_id")}
+          ),
+          (last_profit, last_profit_rate, calculation_id) = (
+            {_LATEST_CALCULATION.format(item="item_summary.item_id")}
+          );
+        """,
+    )
+
+
+def _item_package(conn: sqlite3.Connection) -> None:
+    # Package size and weight per item (NULL = not measured) so shipping can
+    # be estimated for the whole catalog; the cheapest method is cached in
+    # item_summary and cleared whenever the package changes.
+    execute_script(
+        conn,
+        """
+        ALTER TABLE items ADD COLUMN length INTEGER;
+        ALTER TABLE items ADD COLUMN width INTEGER;
+        ALTER TABLE items ADD COLUMN height INTEGER;
+        ALTER TABLE items ADD COLUMN weight INTEGER;
+        ALTER TABLE item_summary ADD COLUMN shipping_service TEXT;
+        ALTER TABLE item_summary ADD COLUMN shipping_cost INTEGER;
+
+        CREATE TRIGGER item_summary_item_package
+        AFTER UPDATE OF length, width, height, weight ON items
+        WHEN new.length IS NOT old.length OR new.width IS NOT old.width
+          OR new.height IS NOT old.height OR new.weight IS NOT old.weight
+        BEGIN
+          UPDATE item_summary SET shipping_service = NULL, shipping_cost = NULL
+          WHERE item_id = new.id;
+        END;
+        """,
+    )
+
+
+def _rate_tables(conn: sqlite3.Connection) -> None:
+    # One zone tariff per carrier service: rates is a little-endian int32
+    # array of shape (47 origins, 47 destinations, len(bands)) with -1 where
+    # the carrier has no rate; bands lists the size bands, e.g. "60,80,100".
+    execute_script(
+        conn,
+        """
+        CREATE TABLE rate_tables (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          carrier TEXT NOT NULL,
+          service_name TEXT NOT NULL,
+          bands TEXT NOT NULL,
+          rates BLOB NOT NULL,
+          updated_at TEXT NOT NULL,
+          UNIQUE(carrier, service_name)
+        );
+        """,
+    )
+
+
+# Each step runs once, in order, and the version is recorded in
+# PRAGMA user_version. Append new steps; never edit an applied one.
+MIGRATIONS: tuple[tuple[int, Callable[[sqlite3.Connection], None]], ...] = (
+    (1, _initial_schema),
+    (2, _offer_listing_indexes),
+    (3, _offer_listings),
+    (4, _history_retention_index),
+    (5, _items_search_index),
+    (6, _offers_search_index),
+    (7, _item_summary),
+    (8, _item_package),
+    (9, _rate_tables),
+)
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    current = schema_version(conn)
+    if current > LATEST_VERSION:
+        raise RuntimeError(
+            f"database schema v{current} is newer than this app (v{LATEST_VERSION})"
+        )
+    for version, step in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            step(conn)
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version(version, applied_at) "
+                "VALUES (?, ?)",
+                (version, datetime.now(timezone.utc).isoformat()),
+            )
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+    if current < LATEST_VERSION:
+        setup_logging().debug(
+            "database migrated from v%d to v%d", current, LATEST_VERSION
+        )
+    _enable_incremental_vacuum(conn)
+    return LATEST_VERSION
+
+
+def _enable_incremental_vacuum(conn: sqlite3.Connection) -> None:
+    # Files created before auto_vacuum was set need a one-off VACUUM, which
+    # cannot run inside a transaction, so it is not a numbered step.
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    setup_logging().info("database rebuilt with auto_vacuum=INCREMENTAL")
+
+
+def create_archive_schema(conn: sqlite3.Connection) -> None:
+    # The archive keeps offer ids so calculations still resolve; history is
+    # unique per offer and fetch so a re-run after a partial move is harmless.
+    execute_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS archive.offers (
+          id INTEGER PRIMARY KEY,
+          item_id INTEGER NOT NULL,
+          source_id INTEGER,
+          title TEXT,
+          price INTEGER,
+          shipping INTEGER,
+          total INTEGER,
+          stock_status TEXT,
+          url TEXT,
+          confidence TEXT,
+          fetched_at TEXT NOT NULL,
+          raw_text TEXT,
+          listing_key TEXT
+        );
+        CREATE INDEX IF NOT EXISTS archive.idx_archive_offers_item
+          ON offers(item_id, fetched_at);
+        CREATE TABLE IF NOT EXISTS archive.offer_price_history (
+          id INTEGER PRIMARY KEY,
+          offer_id INTEGER NOT NULL,
+          price INTEGER,
+          shipping INTEGER,
+          total INTEGER,
+          stock_status TEXT,
+          fetched_at TEXT NOT NULL,
+          UNIQUE(offer_id, fetched_at)
+        );
+        """,
+    )
+
+
+def execute_script(conn: sqlite3.Connection, script: str) -> None:
+    # executescript() commits first, which would break the migration
+    # transaction, so statements are run one by one instead.
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+
+
+def _seed_sources(conn: sqlite3.Connection) -> None:
+    existing = conn.execute("SELECT COUNT(*) FROM sources").fetchone()
+    if existing and existing[0] > 0:
+        return
+    sources = [
+        ("rakuten", "rakuten.co.jp"),
+        ("yahoo", "shopping.yahoo.co.jp"),
+        ("amazon", "amazon.co.jp"),
+        ("tavily", "tavily.com"),
+        ("manual_url", None),
+    ]
+    conn.executemany(
+        "INSERT INTO sources(name, domain, enabled) VALUES (?, ?, 1)", sources
+    )
+
+
+def _seed_shipping_rules(conn: sqlite3.Connection) -> None:
+    existing = conn.execute("SELECT COUNT(*) FROM shipping_rules").fetchone()
+    if existing and existing[0] > 0:
+        return
+    data_path = Path("data") / "shipping_rules.csv"
+    template_path = Path("templates") / "shipping_rules.seed.csv"
+    source = data_path if data_path.exists() else template_path
+    if not source.exists():
+        return
+    rows = _read_csv(source)
+    if not rows:
+        return
+    conn.executemany(
+        """
+        INSERT INTO shipping_rules(
+          carrier, service_name, max_l, max_w, max_h, max_weight,
+          price, packaging_cost, enabled
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                row["carrier"],
+                row["service_name"],
+                _to_int(row.get("max_l")),
+                _to_int(row.get("max_w")),
+                _to_int(row.get("max_h")),
+                _to_int(row.get("max_weight")),
+                int(row["price"]),
+                int(row.get("packaging_cost") or 0),
+                int(row.get("enabled") or 1),
+            )
+            for row in rows
+            if row.get("carrier") and row.get("service_name") and row.get("price")
+        ],
+    )
+
+
+def _read_csv(path: Path) -> list[dict]:
+    with path.open("r", newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        return list(reader)
+
+
+def _to_int(value: str | None) -> int | None:
+    if value is None:
+        return None
+    value = value.strip()
+    if not value:
+        return None
+    return int(value)
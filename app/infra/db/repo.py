@@ -1,101 +1,13 @@
 from __future__ import annotations
 
-import csv
+import json
 import sqlite3
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from pathlib import Path
+from datetime import datetime, timedelta, timezone
 from typing import Iterable
 
-
-def default_db_path() -> Path:
-    return Path("data") / "app.db"
-
-
-def init_db(db_path: Path | str | None = None) -> sqlite3.Connection:
-    path = Path(db_path) if db_path else default_db_path()
-    path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(path)
-    conn.row_factory = sqlite3.Row
-    _apply_schema(conn)
-    _ensure_schema_version(conn, version=1)
-    _seed_sources(conn)
-    _seed_shipping_rules(conn)
-    return conn
-
-
-def _apply_schema(conn: sqlite3.Connection) -> None:
-    schema_path = Path(__file__).with_name("schema.sql")
-    schema_sql = schema_path.read_text(encoding="utf-8")
-    conn.executescript(schema_sql)
-    conn.commit()
-
-
-def _ensure_schema_version(conn: sqlite3.Connection, version: int) -> None:
-    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
-    current = row[0] if row else None
-    if current is None or current < version:
-        applied_at = datetime.now(timezone.utc).isoformat()
-        conn.execute(
-            "INSERT INTO schema_version(version, applied_at) VALUES (?, ?)",
-            (version, applied_at),
-        )
-        conn.commit()
-
-
-def _seed_sources(conn: sqlite3.Connection) -> None:
-    existing = conn.execute("SELECT COUNT(*) FROM sources").fetchone()
-    if existing and existing[0] > 0:
-        return
-    sources = [
-        ("rakuten", "rakuten.co.jp"),
-        ("yahoo", "shopping.yahoo.co.jp"),
-        ("amazon", "amazon.co.jp"),
-        ("tavily", "tavily.com"),
-        ("manual_url", None),
-    ]
-    conn.executemany(
-        "INSERT INTO sources(name, domain, enabled) VALUES (?, ?, 1)", sources
-    )
-    conn.commit()
-
-
-def _seed_shipping_rules(conn: sqlite3.Connection) -> None:
-    existing = conn.execute("SELECT COUNT(*) FROM shipping_rules").fetchone()
-    if existing and existing[0] > 0:
-        return
-    data_path = Path("data") / "shipping_rules.csv"
-    template_path = Path("templates") / "shipping_rules.seed.csv"
-    source = data_path if data_path.exists() else template_path
-    if not source.exists():
-        return
-    rows = _read_csv(source)
-    if not rows:
-        return
-    conn.executemany(
-        """
-        INSERT INTO shipping_rules(
-          carrier, service_name, max_l, max_w, max_h, max_weight,
-          price, packaging_cost, enabled
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        [
-            (
-                row["carrier"],
-                row["service_name"],
-                _to_int(row.get("max_l")),
-                _to_int(row.get("max_w")),
-                _to_int(row.get("max_h")),
-                _to_int(row.get("max_weight")),
-                int(row["price"]),
-                int(row.get("packaging_cost") or 0),
-                int(row.get("enabled") or 1),
-            )
-            for row in rows
-            if row.get("carrier") and row.get("service_name") and row.get("price")
-        ],
-    )
-    conn.commit()
+from app.domain.normalize import listing_key
+from app.infra.db.connection import ConnectionManager, archive_attached
 
 
 @dataclass(frozen=True)
@@ -110,6 +22,65 @@ class Item:
     notes: str | None
     created_at: str
     updated_at: str
+    length: int | None = None
+    width: int | None = None
+    height: int | None = None
+    weight: int | None = None
+
+    @property
+    def has_package(self) -> bool:
+        return any(
+            value is not None
+            for value in (self.length, self.width, self.height, self.weight)
+        )
+
+
+@dataclass(frozen=True)
+class ItemPackage:
+    item_id: int
+    length: int | None
+    width: int | None
+    height: int | None
+    weight: int | None
+
+
+@dataclass(frozen=True)
+class ItemSummary:
+    item_id: int
+    name: str | None
+    search_keyword: str
+    status: str
+    offer_count: int
+    best_total: int | None
+    best_offer_id: int | None
+    last_fetched_at: str | None
+    market_low: int | None
+    market_mid: int | None
+    market_high: int | None
+    last_profit: int | None
+    last_profit_rate: float | None
+    shipping_service: str | None = None
+    shipping_cost: int | None = None
+
+    @property
+    def label(self) -> str:
+        return self.name or self.search_keyword
+
+    @property
+    def spread(self) -> int | None:
+        if self.market_mid is None or self.best_total is None:
+            return None
+        return self.market_mid - self.best_total
+
+
+# Descending sorts use the item_summary indexes directly since NULL sorts
+# last; ascending best_total pushes items without offers to the end.
+ITEM_SUMMARY_SORTS = {
+    "updated": "items.updated_at DESC",
+    "profit": "s.last_profit DESC",
+    "spread": "(s.market_mid - s.best_total) DESC",
+    "best_total": "s.best_total IS NULL, s.best_total",
+}
 
 
 @dataclass(frozen=True)
@@ -126,6 +97,60 @@ class Offer:
     confidence: str | None
     fetched_at: str
     raw_text: str | None
+    listing_key: str | None = None
+
+
+@dataclass(frozen=True)
+class PricePoint:
+    price: int | None
+    shipping: int | None
+    total: int | None
+    stock_status: str | None
+    fetched_at: str
+
+
+@dataclass(frozen=True)
+class ArchiveResult:
+    offers: int
+    price_history: int
+
+
+@dataclass(frozen=True)
+class OfferHit:
+    offer_id: int
+    item_id: int
+    item_label: str
+    title: str | None
+    total: int | None
+    url: str | None
+    snippet: str
+    rank: float
+
+
+OFFER_SORT_COLUMNS = ("total", "price", "shipping")
+
+
+@dataclass(frozen=True)
+class OfferRow:
+    id: int
+    source_id: int | None
+    title: str | None
+    price: int | None
+    shipping: int | None
+    total: int | None
+    stock_status: str | None
+    fetched_at: str
+    listing_key: str
+
+    def cursor(self, sort: str) -> tuple[int, int]:
+        value = getattr(self, sort)
+        return (-1 if value is None else value, self.id)
+
+
+@dataclass(frozen=True)
+class CachedSearch:
+    payload: list[dict]
+    fetched_at: str
 
 
 @dataclass(frozen=True)
@@ -142,6 +167,20 @@ class ShippingRule:
     enabled: int
 
 
+@dataclass(frozen=True)
+class RateTable:
+    id: int
+    carrier: str
+    service_name: str
+    bands: str
+    rates: bytes
+    updated_at: str
+
+    @property
+    def band_sizes(self) -> tuple[int, ...]:
+        return tuple(int(size) for size in self.bands.split(","))
+
+
 @dataclass(frozen=True)
 class MarketRef:
     id: int
@@ -174,17 +213,87 @@ class Calculation:
 
 
 class Repository:
-    def __init__(self, conn: sqlite3.Connection) -> None:
-        self._conn = conn
+    def __init__(self, db: sqlite3.Connection | ConnectionManager) -> None:
+        if isinstance(db, ConnectionManager):
+            self._db = db
+        else:
+            self._db = ConnectionManager(connection=db)
+        self._shipping_rules_version = 0
+        self._rate_tables_version = 0
+
+    @property
+    def shipping_rules_version(self) -> int:
+        # Bumped after each committed rule change so cached indexes rebuild.
+        return self._shipping_rules_version
+
+    @property
+    def rate_tables_version(self) -> int:
+        return self._rate_tables_version
+
+    def release_reader(self) -> None:
+        self._db.release_reader()
+
+    def close(self) -> None:
+        self._db.close()
 
     def list_items(self) -> list[Item]:
-        rows = self._conn.execute(
+        rows = self._db.reader().execute(
             "SELECT * FROM items ORDER BY updated_at DESC"
         ).fetchall()
         return [Item(**row) for row in rows]
 
+    def search_items(
+        self,
+        query: str = "",
+        status: str | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> list[Item]:
+        where, params = _item_filter(query, status)
+        params.extend([-1 if limit is None else limit, offset])
+        rows = self._db.reader().execute(
+            f"""
+            SELECT items.* FROM items
+            {where}
+            ORDER BY items.updated_at DESC
+            LIMIT ? OFFSET ?
+            """,
+            params,
+        ).fetchall()
+        return [Item(**row) for row in rows]
+
+    def list_item_summaries(
+        self,
+        query: str = "",
+        status: str | None = None,
+        sort: str = "updated",
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> list[ItemSummary]:
+        order = ITEM_SUMMARY_SORTS.get(sort)
+        if order is None:
+            raise ValueError(f"unknown sort: {sort}")
+        where, params = _item_filter(query, status)
+        params.extend([-1 if limit is None else limit, offset])
+        rows = self._db.reader().execute(
+            f"""
+            SELECT items.id AS item_id, items.name, items.search_keyword,
+                   items.status, s.offer_count, s.best_total, s.best_offer_id,
+                   s.last_fetched_at, s.market_low, s.market_mid, s.market_high,
+                   s.last_profit, s.last_profit_rate, s.shipping_service,
+                   s.shipping_cost
+            FROM item_summary s
+            JOIN items ON items.id = s.item_id
+            {where}
+            ORDER BY {order}, s.item_id DESC
+            LIMIT ? OFFSET ?
+            """,
+            params,
+        ).fetchall()
+        return [ItemSummary(**row) for row in rows]
+
     def get_item(self, item_id: int) -> Item | None:
-        row = self._conn.execute(
+        row = self._db.reader().execute(
             "SELECT * FROM items WHERE id = ?", (item_id,)
         ).fetchone()
         return Item(**row) if row else None
@@ -198,28 +307,36 @@ class Repository:
         category: str | None = None,
         status: str = "considering",
         notes: str | None = None,
+        length: int | None = None,
+        width: int | None = None,
+        height: int | None = None,
+        weight: int | None = None,
     ) -> int:
         now = _now()
-        cur = self._conn.execute(
-            """
-            INSERT INTO items(
-              name, jan, model_number, search_keyword, category, status, notes,
-              created_at, updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                name,
-                jan,
-                model_number,
-                search_keyword,
-                category,
-                status,
-                notes,
-                now,
-                now,
-            ),
-        )
-        self._conn.commit()
+        with self._db.writer() as conn:
+            cur = conn.execute(
+                """
+                INSERT INTO items(
+                  name, jan, model_number, search_keyword, category, status, notes,
+                  length, width, height, weight, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    name,
+                    jan,
+                    model_number,
+                    search_keyword,
+                    category,
+                    status,
+                    notes,
+                    length,
+                    width,
+                    height,
+                    weight,
+                    now,
+                    now,
+                ),
+            )
         return int(cur.lastrowid)
 
     def update_item(
@@ -232,109 +349,473 @@ class Repository:
         category: str | None = None,
         status: str = "considering",
         notes: str | None = None,
+        length: int | None = None,
+        width: int | None = None,
+        height: int | None = None,
+        weight: int | None = None,
     ) -> None:
         now = _now()
-        self._conn.execute(
-            """
-            UPDATE items
-            SET name = ?, jan = ?, model_number = ?, search_keyword = ?, category = ?,
-                status = ?, notes = ?, updated_at = ?
-            WHERE id = ?
-            """,
-            (
-                name,
-                jan,
-                model_number,
-                search_keyword,
-                category,
-                status,
-                notes,
-                now,
-                item_id,
-            ),
-        )
-        self._conn.commit()
+        with self._db.writer() as conn:
+            conn.execute(
+                """
+                UPDATE items
+                SET name = ?, jan = ?, model_number = ?, search_keyword = ?, category = ?,
+                    status = ?, notes = ?, length = ?, width = ?, height = ?,
+                    weight = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (
+                    name,
+                    jan,
+                    model_number,
+                    search_keyword,
+                    category,
+                    status,
+                    notes,
+                    length,
+                    width,
+                    height,
+                    weight,
+                    now,
+                    item_id,
+                ),
+            )
 
     def delete_item(self, item_id: int) -> None:
-        self._conn.execute("DELETE FROM items WHERE id = ?", (item_id,))
-        self._conn.commit()
+        with self._db.writer() as conn:
+            conn.execute("DELETE FROM items WHERE id = ?", (item_id,))
+
+    def list_item_packages(
+        self, item_ids: Iterable[int] | None = None
+    ) -> list[ItemPackage]:
+        sql = (
+            "SELECT id AS item_id, length, width, height, weight FROM items"
+            " WHERE (length IS NOT NULL OR width IS NOT NULL"
+            " OR height IS NOT NULL OR weight IS NOT NULL)"
+        )
+        params: list = []
+        if item_ids is not None:
+            params = list(item_ids)
+            sql += f" AND id IN ({', '.join('?' * len(params))})"
+        rows = self._db.reader().execute(sql + " ORDER BY id", params).fetchall()
+        return [ItemPackage(**row) for row in rows]
+
+    def update_item_shipping(
+        self, rows: Iterable[tuple[int, str | None, int | None]]
+    ) -> None:
+        # rows are (item_id, service, cost); None clears a stale estimate.
+        with self._db.writer() as conn:
+            conn.executemany(
+                "UPDATE item_summary SET shipping_service = ?, shipping_cost = ?"
+                " WHERE item_id = ?",
+                [(service, cost, item_id) for item_id, service, cost in rows],
+            )
 
-    def list_offers(self, item_id: int) -> list[Offer]:
-        rows = self._conn.execute(
-            "SELECT * FROM offers WHERE item_id = ? ORDER BY fetched_at DESC",
-            (item_id,),
-        ).fetchall()
+    def list_offers(
+        self, item_id: int, *, include_archive: bool = False
+    ) -> list[Offer]:
+        conn = self._db.reader(archive=include_archive)
+        sql = f"SELECT {_OFFER_COLUMNS} FROM main.offers WHERE item_id = ?"
+        params: list = [item_id]
+        if include_archive and archive_attached(conn):
+            sql += (
+                f" UNION ALL SELECT {_OFFER_COLUMNS} FROM archive.offers"
+                " WHERE item_id = ?"
+            )
+            params.append(item_id)
+        rows = conn.execute(sql + " ORDER BY fetched_at DESC", params).fetchall()
         return [Offer(**row) for row in rows]
 
+    def list_offer_rows(
+        self,
+        item_id: int,
+        sort: str = "total",
+        *,
+        limit: int = 200,
+        after: tuple[int, int] | None = None,
+    ) -> list[OfferRow]:
+        # Display columns only; raw_text is loaded on demand. Pass the last
+        # row's cursor(sort) as `after` to fetch the next page.
+        if sort not in OFFER_SORT_COLUMNS:
+            raise ValueError(f"unknown sort column: {sort}")
+        key = f"IFNULL({sort}, -1)"
+        params: list = [item_id]
+        keyset = ""
+        if after is not None:
+            # The >= bound lets SQLite seek the index instead of scanning.
+            keyset = f"AND {key} >= ? AND ({key}, id) > (?, ?)"
+            params.extend([after[0], *after])
+        params.append(limit)
+        rows = self._db.reader().execute(
+            f"""
+            SELECT id, source_id, title, price, shipping, total, stock_status,
+                   fetched_at, listing_key
+            FROM offers
+            WHERE item_id = ? {keyset}
+            ORDER BY {key}, id
+            LIMIT ?
+            """,
+            params,
+        ).fetchall()
+        return [OfferRow(**row) for row in rows]
+
+    def search_offer_text(self, query: str, limit: int = 100) -> list[OfferHit]:
+        # Ranked by bm25 with titles weighted over page text; the snippet marks
+        # matches with [ ] around them.
+        match, short = _split_search_terms(query)
+        if not match and not short:
+            return []
+        clauses = []
+        params: list = []
+        for term in short:
+            clauses.append(
+                "(o.title LIKE ? ESCAPE '\\' OR o.raw_text LIKE ? ESCAPE '\\')"
+            )
+            params.extend([_like_pattern(term)] * 2)
+        if match:
+            source = "offers_fts JOIN offers o ON o.id = offers_fts.rowid"
+            columns = (
+                "snippet(offers_fts, -1, '[', ']', '…', 24) AS snippet, "
+                "bm25(offers_fts, 5.0, 1.0) AS rank"
+            )
+            clauses.insert(0, "offers_fts MATCH ?")
+            params.insert(0, match)
+            order = "rank"
+        else:
+            source = "offers o"
+            columns = "IFNULL(o.title, '') AS snippet, 0.0 AS rank"
+            order = "o.fetched_at DESC"
+        params.append(limit)
+        rows = self._db.reader().execute(
+            f"""
+            SELECT o.id AS offer_id, o.item_id,
+                   IFNULL(i.name, i.search_keyword) AS item_label,
+                   o.title, o.total, o.url, {columns}
+            FROM {source}
+            JOIN items i ON i.id = o.item_id
+            WHERE {" AND ".join(clauses)}
+            ORDER BY {order}
+            LIMIT ?
+            """,
+            params,
+        ).fetchall()
+        return [OfferHit(**row) for row in rows]
+
+    def get_offer_raw_text(self, offer_id: int) -> str | None:
+        row = self._db.reader().execute(
+            "SELECT raw_text FROM offers WHERE id = ?", (offer_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def best_offer_total(self, item_id: int) -> int | None:
+        row = self._db.reader().execute(
+            "SELECT MIN(total) FROM offers WHERE item_id = ?", (item_id,)
+        ).fetchone()
+        return row[0] if row else None
+
     def add_offers(self, offers: Iterable[dict]) -> None:
+        # One row per (item, source, listing); a newer observation replaces
+        # the current state and triggers record price or stock changes.
         if not offers:
             return
-        self._conn.executemany(
+        with self._db.writer() as conn:
+            conn.executemany(
+                """
+                INSERT INTO offers(
+                  item_id, source_id, title, price, shipping, total, stock_status,
+                  url, confidence, fetched_at, raw_text, listing_key
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(item_id, IFNULL(source_id, -1), listing_key)
+                DO UPDATE SET
+                  title = excluded.title,
+                  price = excluded.price,
+                  shipping = excluded.shipping,
+                  total = excluded.total,
+                  stock_status = excluded.stock_status,
+                  url = excluded.url,
+                  confidence = excluded.confidence,
+                  fetched_at = excluded.fetched_at,
+                  raw_text = excluded.raw_text
+                WHERE excluded.fetched_at >= offers.fetched_at
+                """,
+                [
+                    (
+                        o["item_id"],
+                        o.get("source_id"),
+                        o.get("title"),
+                        o.get("price"),
+                        o.get("shipping"),
+                        o.get("total"),
+                        o.get("stock_status"),
+                        o.get("url"),
+                        o.get("confidence"),
+                        o.get("fetched_at"),
+                        o.get("raw_text"),
+                        listing_key(o.get("url"), o.get("title")),
+                    )
+                    for o in offers
+                ],
+            )
+
+    def list_price_history(
+        self, offer_id: int, *, since: str | None = None
+    ) -> list[PricePoint]:
+        # Archived rows are older than anything left in the hot file, so the
+        # archive is only consulted when it exists; both sides are index seeks.
+        conn = self._db.reader(archive=True)
+        select = (
+            "SELECT price, shipping, total, stock_status, fetched_at "
+            "FROM {}.offer_price_history WHERE offer_id = ? AND fetched_at >= ?"
+        )
+        sql = select.format("main")
+        params: list = [offer_id, since or ""]
+        if archive_attached(conn):
+            sql += " UNION ALL " + select.format("archive")
+            params += [offer_id, since or ""]
+        rows = conn.execute(sql + " ORDER BY fetched_at", params).fetchall()
+        return [PricePoint(**row) for row in rows]
+
+    def archive_offers(self, before: str) -> ArchiveResult:
+        # Moves listings not seen since `before`, with all their history, and
+        # any older history of live listings into the archive database.
+        with self._db.writer(archive=True) as conn:
+            stale = "SELECT id FROM main.offers WHERE fetched_at < ?"
+            moved = f"fetched_at < ? OR offer_id IN ({stale})"
+            cursor = conn.execute(
+                f"""
+                INSERT OR REPLACE INTO archive.offers({_OFFER_COLUMNS})
+                SELECT {_OFFER_COLUMNS} FROM main.offers WHERE fetched_at < ?
+                """,
+                (before,),
+            )
+            offers = cursor.rowcount
+            conn.execute(
+                f"""
+                INSERT OR IGNORE INTO archive.offer_price_history(
+                  offer_id, price, shipping, total, stock_status, fetched_at
+                )
+                SELECT offer_id, price, shipping, total, stock_status, fetched_at
+                FROM main.offer_price_history WHERE {moved}
+                """,
+                (before, before),
+            )
+            cursor = conn.execute(
+                f"DELETE FROM main.offer_price_history WHERE {moved}",
+                (before, before),
+            )
+            history = cursor.rowcount
+            conn.execute("DELETE FROM main.offers WHERE fetched_at < ?", (before,))
+        return ArchiveResult(offers=offers, price_history=history)
+
+    def last_offer_fetched_at(
+        self, item_id: int, source_id: int | None
+    ) -> str | None:
+        row = self._db.reader().execute(
+            """
+            SELECT MAX(fetched_at) FROM offers
+            WHERE item_id = ? AND source_id IS ?
+            """,
+            (item_id, source_id),
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_search_cache(
+        self, source: str, cache_key: str, max_age: float
+    ) -> CachedSearch | None:
+        cutoff = (
+            datetime.now(timezone.utc) - timedelta(seconds=max_age)
+        ).isoformat()
+        row = self._db.reader().execute(
             """
-            INSERT INTO offers(
-              item_id, source_id, title, price, shipping, total, stock_status,
-              url, confidence, fetched_at, raw_text
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            SELECT payload, fetched_at FROM search_cache
+            WHERE source = ? AND cache_key = ? AND fetched_at >= ?
             """,
-            [
+            (source, cache_key, cutoff),
+        ).fetchone()
+        if not row:
+            return None
+        with self._db.writer() as conn:
+            conn.execute(
+                "UPDATE search_cache SET last_used_at = ? "
+                "WHERE source = ? AND cache_key = ?",
+                (_now(), source, cache_key),
+            )
+        return CachedSearch(payload=json.loads(row["payload"]), fetched_at=row["fetched_at"])
+
+    def put_search_cache(
+        self,
+        source: str,
+        cache_key: str,
+        payload: list[dict],
+        fetched_at: str,
+        max_entries: int,
+    ) -> None:
+        with self._db.writer() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO search_cache(
+                  source, cache_key, payload, fetched_at, last_used_at
+                ) VALUES (?, ?, ?, ?, ?)
+                """,
                 (
-                    o["item_id"],
-                    o.get("source_id"),
-                    o.get("title"),
-                    o.get("price"),
-                    o.get("shipping"),
-                    o.get("total"),
-                    o.get("stock_status"),
-                    o.get("url"),
-                    o.get("confidence"),
-                    o.get("fetched_at"),
-                    o.get("raw_text"),
+                    source,
+                    cache_key,
+                    json.dumps(payload, ensure_ascii=False),
+                    fetched_at,
+                    _now(),
+                ),
+            )
+            # Least recently used entries go first once the cache is over budget.
+            conn.execute(
+                """
+                DELETE FROM search_cache WHERE rowid IN (
+                  SELECT rowid FROM search_cache
+                  ORDER BY last_used_at DESC, rowid DESC
+                  LIMIT -1 OFFSET ?
                 )
-                for o in offers
-            ],
-        )
-        self._conn.commit()
+                """,
+                (max(0, max_entries),),
+            )
+
+    def clear_search_cache(self) -> None:
+        with self._db.writer() as conn:
+            conn.execute("DELETE FROM search_cache")
+
+    def checkpoint(self, mode: str = "PASSIVE") -> tuple[int, int, int]:
+        # Returns (busy, wal_frames, checkpointed_frames); PASSIVE never waits
+        # on readers, TRUNCATE also resets the WAL file to zero bytes.
+        return self._db.checkpoint(mode)
+
+    def incremental_vacuum(self, pages: int | None = None) -> int:
+        return self._db.incremental_vacuum(pages)
+
+    def downsample_price_history(self, before: str) -> int:
+        # Older history keeps one row per offer and day: the cheapest one.
+        with self._db.writer() as conn:
+            cursor = conn.execute(
+                """
+                DELETE FROM offer_price_history WHERE id IN (
+                  SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (
+                      PARTITION BY offer_id, substr(fetched_at, 1, 10)
+                      ORDER BY COALESCE(total, price) IS NULL,
+                               COALESCE(total, price), id
+                    ) AS rank
+                    FROM offer_price_history
+                    WHERE fetched_at < ?
+                  )
+                  WHERE rank > 1
+                )
+                """,
+                (before,),
+            )
+            return cursor.rowcount
+
+    def delete_stale_offers(self, before: str) -> int:
+        # Listings not seen since `before` go with their history; saved
+        # calculations keep their numbers but lose the offer link.
+        with self._db.writer() as conn:
+            stale = "SELECT id FROM offers WHERE fetched_at < ?"
+            conn.execute(
+                f"DELETE FROM offer_price_history WHERE offer_id IN ({stale})",
+                (before,),
+            )
+            conn.execute(
+                f"UPDATE calculations SET offer_id = NULL WHERE offer_id IN ({stale})",
+                (before,),
+            )
+            cursor = conn.execute("DELETE FROM offers WHERE fetched_at < ?", (before,))
+            return cursor.rowcount
+
+    def delete_calculations_before(self, before: str) -> int:
+        with self._db.writer() as conn:
+            cursor = conn.execute(
+                "DELETE FROM calculations WHERE created_at < ?", (before,)
+            )
+            return cursor.rowcount
+
+    def delete_market_refs_before(self, before: str) -> int:
+        with self._db.writer() as conn:
+            cursor = conn.execute(
+                "DELETE FROM market_refs WHERE created_at < ?", (before,)
+            )
+            return cursor.rowcount
 
     def list_shipping_rules(self) -> list[ShippingRule]:
-        rows = self._conn.execute(
+        rows = self._db.reader().execute(
             "SELECT * FROM shipping_rules WHERE enabled = 1 ORDER BY price ASC"
         ).fetchall()
         return [ShippingRule(**row) for row in rows]
 
     def list_shipping_rules_all(self) -> list[ShippingRule]:
-        rows = self._conn.execute(
+        rows = self._db.reader().execute(
             "SELECT * FROM shipping_rules ORDER BY id ASC"
         ).fetchall()
         return [ShippingRule(**row) for row in rows]
 
     def replace_shipping_rules(self, rules: Iterable[dict]) -> None:
-        self._conn.execute("DELETE FROM shipping_rules")
-        self._conn.executemany(
-            """
-            INSERT INTO shipping_rules(
-              carrier, service_name, max_l, max_w, max_h, max_weight,
-              price, packaging_cost, enabled
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            [
+        with self._db.writer() as conn:
+            conn.execute("DELETE FROM shipping_rules")
+            conn.executemany(
+                """
+                INSERT INTO shipping_rules(
+                  carrier, service_name, max_l, max_w, max_h, max_weight,
+                  price, packaging_cost, enabled
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        row["carrier"],
+                        row["service_name"],
+                        row.get("max_l"),
+                        row.get("max_w"),
+                        row.get("max_h"),
+                        row.get("max_weight"),
+                        row["price"],
+                        row.get("packaging_cost", 0),
+                        row.get("enabled", 1),
+                    )
+                    for row in rules
+                ],
+            )
+        self._shipping_rules_version += 1
+
+    def list_rate_tables(self) -> list[RateTable]:
+        rows = self._db.reader().execute(
+            "SELECT * FROM rate_tables ORDER BY carrier, service_name"
+        ).fetchall()
+        return [RateTable(**row) for row in rows]
+
+    def save_rate_table(
+        self, carrier: str, service_name: str, bands: Iterable[int], rates: bytes
+    ) -> None:
+        with self._db.writer() as conn:
+            conn.execute(
+                """
+                INSERT INTO rate_tables(carrier, service_name, bands, rates, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(carrier, service_name) DO UPDATE SET
+                  bands = excluded.bands,
+                  rates = excluded.rates,
+                  updated_at = excluded.updated_at
+                """,
                 (
-                    row["carrier"],
-                    row["service_name"],
-                    row.get("max_l"),
-                    row.get("max_w"),
-                    row.get("max_h"),
-                    row.get("max_weight"),
-                    row["price"],
-                    row.get("packaging_cost", 0),
-                    row.get("enabled", 1),
-                )
-                for row in rules
-            ],
-        )
-        self._conn.commit()
+                    carrier,
+                    service_name,
+                    ",".join(str(int(size)) for size in bands),
+                    sqlite3.Binary(rates),
+                    _now(),
+                ),
+            )
+        self._rate_tables_version += 1
+
+    def delete_rate_table(self, table_id: int) -> None:
+        with self._db.writer() as conn:
+            conn.execute("DELETE FROM rate_tables WHERE id = ?", (table_id,))
+        self._rate_tables_version += 1
 
     def list_market_refs(self, item_id: int) -> list[MarketRef]:
-        rows = self._conn.execute(
+        rows = self._db.reader().execute(
             "SELECT * FROM market_refs WHERE item_id = ? ORDER BY created_at DESC",
             (item_id,),
         ).fetchall()
@@ -350,14 +831,14 @@ class Repository:
         ref_date: str | None = None,
     ) -> int:
         now = _now()
-        cur = self._conn.execute(
-            """
-            INSERT INTO market_refs(item_id, low, mid, high, memo, ref_date, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (item_id, low, mid, high, memo, ref_date, now),
-        )
-        self._conn.commit()
+        with self._db.writer() as conn:
+            cur = conn.execute(
+                """
+                INSERT INTO market_refs(item_id, low, mid, high, memo, ref_date, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (item_id, low, mid, high, memo, ref_date, now),
+            )
         return int(cur.lastrowid)
 
     def add_calculation(
@@ -377,62 +858,107 @@ class Repository:
         min_price_for_target: int | None,
     ) -> int:
         now = _now()
-        cur = self._conn.execute(
-            """
-            INSERT INTO calculations(
-              item_id, offer_id, sale_price, fee_rate, shipping_cost, packaging_cost,
-              other_cost, cost_price, profit, profit_rate, breakeven_price,
-              target_profit, min_price_for_target, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                item_id,
-                offer_id,
-                sale_price,
-                fee_rate,
-                shipping_cost,
-                packaging_cost,
-                other_cost,
-                cost_price,
-                profit,
-                profit_rate,
-                breakeven_price,
-                target_profit,
-                min_price_for_target,
-                now,
-            ),
-        )
-        self._conn.commit()
+        with self._db.writer() as conn:
+            cur = conn.execute(
+                """
+                INSERT INTO calculations(
+                  item_id, offer_id, sale_price, fee_rate, shipping_cost, packaging_cost,
+                  other_cost, cost_price, profit, profit_rate, breakeven_price,
+                  target_profit, min_price_for_target, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    item_id,
+                    offer_id,
+                    sale_price,
+                    fee_rate,
+                    shipping_cost,
+                    packaging_cost,
+                    other_cost,
+                    cost_price,
+                    profit,
+                    profit_rate,
+                    breakeven_price,
+                    target_profit,
+                    min_price_for_target,
+                    now,
+                ),
+            )
         return int(cur.lastrowid)
 
     def list_calculations(self, item_id: int) -> list[Calculation]:
-        rows = self._conn.execute(
+        rows = self._db.reader().execute(
             "SELECT * FROM calculations WHERE item_id = ? ORDER BY created_at DESC",
             (item_id,),
         ).fetchall()
         return [Calculation(**row) for row in rows]
 
     def list_sources(self) -> list[tuple[str, int]]:
-        rows = self._conn.execute(
+        rows = self._db.reader().execute(
             "SELECT id, name FROM sources WHERE enabled = 1 ORDER BY name ASC"
         ).fetchall()
         return [(row["name"], row["id"]) for row in rows]
 
 
-def _now() -> str:
-    return datetime.now(timezone.utc).isoformat()
+_ITEM_SEARCH_COLUMNS = (
+    "name",
+    "search_keyword",
+    "jan",
+    "model_number",
+    "category",
+    "notes",
+)
+
+_OFFER_COLUMNS = (
+    "id, item_id, source_id, title, price, shipping, total, stock_status, "
+    "url, confidence, fetched_at, raw_text, listing_key"
+)
 
 
-def _read_csv(path: Path) -> list[dict]:
-    with path.open("r", newline="", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
-        return list(reader)
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
 
 
-def _to_int(value: str | None) -> int | None:
-    if value is None:
-        return None
-    value = value.strip()
-    if not value:
-        return None
-    return int(value)
+def _item_filter(query: str, status: str | None) -> tuple[str, list]:
+    # Terms of 3+ characters go through the trigram index; shorter ones
+    # cannot be indexed and fall back to LIKE on the matched rows.
+    match, short = _split_search_terms(query)
+    clauses = []
+    params: list = []
+    if match:
+        clauses.append(
+            "items.id IN (SELECT rowid FROM items_fts WHERE items_fts MATCH ?)"
+        )
+        params.append(match)
+    for term in short:
+        clauses.append(
+            "("
+            + " OR ".join(
+                f"items.{column} LIKE ? ESCAPE '\\'"
+                for column in _ITEM_SEARCH_COLUMNS
+            )
+            + ")"
+        )
+        params.extend([_like_pattern(term)] * len(_ITEM_SEARCH_COLUMNS))
+    if status:
+        clauses.append("items.status = ?")
+        params.append(status)
+    return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _split_search_terms(query: str) -> tuple[str | None, list[str]]:
+    # The trigram tokenizer cannot match terms under 3 characters; those are
+    # returned separately for a LIKE filter.
+    phrases = []
+    short = []
+    for term in query.split():
+        if len(term) >= 3:
+            phrases.append('"' + term.replace('"', '""') + '"')
+        else:
+            short.append(term)
+    return (" AND ".join(phrases) or None), short
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return "%" + escaped + "%"
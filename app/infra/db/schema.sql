@@ -81,9 +81,20 @@ CREATE TABLE IF NOT EXISTS calculations (
   FOREIGN KEY(item_id) REFERENCES items(id)
 );
 
+CREATE TABLE IF NOT EXISTS search_cache (
+  source TEXT NOT NULL,
+  cache_key TEXT NOT NULL,
+  payload TEXT NOT NULL,
+  fetched_at TEXT NOT NULL,
+  last_used_at TEXT NOT NULL,
+  PRIMARY KEY(source, cache_key)
+);
+
 CREATE INDEX IF NOT EXISTS idx_offers_item_fetched_at
   ON offers(item_id, fetched_at);
 CREATE INDEX IF NOT EXISTS idx_offers_item_total
   ON offers(item_id, total);
 CREATE INDEX IF NOT EXISTS idx_calculations_item_created_at
   ON calculations(item_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_search_cache_last_used_at
+  ON search_cache(last_used_at);
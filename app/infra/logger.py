@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import logging
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
 
 def setup_logging(log_path: str | Path = "logs/app.log") -> logging.Logger:
     path = Path(log_path)
@@ -17,7 +21,12 @@ def setup_logging(log_path: str | Path = "logs/app.log") -> logging.Logger:
         "%(asctime)s %(levelname)s %(name)s %(message)s"
     )
 
-    file_handler = logging.FileHandler(path, encoding="utf-8")
+    file_handler = RotatingFileHandler(
+        path,
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding="utf-8",
+    )
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
 
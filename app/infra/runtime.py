@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from app.infra.clients.http_client import configure_shared_client
+from app.infra.clients.rate_limit import configure_rate_limits
+from app.infra.config import AppConfig
+
+
+def apply_runtime_config(config: AppConfig) -> None:
+    configure_shared_client(http2=config.http2)
+    configure_rate_limits(config.rate_limits)
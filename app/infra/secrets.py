@@ -1,7 +1,13 @@
 from __future__ import annotations
 
+import threading
+from typing import Iterable
+
 SERVICE_NAME = "mercari_flip_desktop"
 
+_cache_lock = threading.Lock()
+_cache: dict[str, str | None] = {}
+
 
 def _require_keyring():
     try:
@@ -12,13 +18,22 @@ def _require_keyring():
 
 
 def get_secret(key: str) -> str | None:
+    with _cache_lock:
+        if key in _cache:
+            return _cache[key]
     keyring = _require_keyring()
-    return keyring.get_password(SERVICE_NAME, key)
+    value = keyring.get_password(SERVICE_NAME, key)
+    with _cache_lock:
+        _cache[key] = value
+    return value
 
 
 def set_secret(key: str, value: str) -> None:
     keyring = _require_keyring()
-    keyring.set_password(SERVICE_NAME, key, value)
+    try:
+        keyring.set_password(SERVICE_NAME, key, value)
+    finally:
+        invalidate_secrets(key)
 
 
 def delete_secret(key: str) -> None:
@@ -28,3 +43,21 @@ def delete_secret(key: str) -> None:
     except Exception:
         # Ignore if not present or backend rejects deletion.
         return
+    finally:
+        invalidate_secrets(key)
+
+
+def invalidate_secrets(key: str | None = None) -> None:
+    with _cache_lock:
+        if key is None:
+            _cache.clear()
+        else:
+            _cache.pop(key, None)
+
+
+def refresh_secrets(keys: Iterable[str] | None = None) -> dict[str, str | None]:
+    with _cache_lock:
+        targets = list(keys) if keys is not None else list(_cache)
+    for key in targets:
+        invalidate_secrets(key)
+    return {key: get_secret(key) for key in targets}
@@ -4,9 +4,10 @@ from pathlib import Path
 from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import QApplication
 
-from .infra.config import load_config
-from .infra.db import Repository, init_db
+from .infra.config import get_config
+from .infra.db import ConnectionManager, Repository
 from .infra.logger import setup_logging
+from .infra.runtime import apply_runtime_config
 from .ui.main_window import MainWindow
 
 
@@ -15,13 +16,19 @@ def main() -> int:
     icon_path = Path(__file__).resolve().parents[1] / "docs" / "Appico.png"
     if icon_path.exists():
         app.setWindowIcon(QIcon(str(icon_path)))
-    config = load_config()
+    config = get_config()
     setup_logging()
-    conn = init_db(config.db_path)
-    repo = Repository(conn)
+    apply_runtime_config(config)
+    manager = ConnectionManager(
+        config.db_path, config.db_profile, archive_path=config.archive_path
+    )
+    repo = Repository(manager)
     window = MainWindow(repo=repo, config=config)
     window.show()
-    return app.exec()
+    code = app.exec()
+    repo.checkpoint("TRUNCATE")
+    repo.close()
+    return code
 
 
 if __name__ == "__main__":
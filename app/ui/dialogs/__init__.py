@@ -1,7 +1,13 @@
 """Dialog package."""
 
 from .item_dialog import ItemDialog
+from .offer_search_dialog import OfferSearchDialog
 from .settings_dialog import SettingsDialog
 from .shipping_rules_dialog import ShippingRulesDialog
 
-__all__ = ["ItemDialog", "SettingsDialog", "ShippingRulesDialog"]
+__all__ = [
+    "ItemDialog",
+    "OfferSearchDialog",
+    "SettingsDialog",
+    "ShippingRulesDialog",
+]
@@ -6,6 +6,7 @@ from PySide6.QtWidgets import (
     QDialogButtonBox,
     QFormLayout,
     QLineEdit,
+    QSpinBox,
     QTextEdit,
     QVBoxLayout,
 )
@@ -27,6 +28,10 @@ class ItemDialog(QDialog):
         self._status.addItem("運用中", "active")
         self._status.addItem("一時停止", "paused")
         self._notes = QTextEdit()
+        self._length = _package_spin(" cm", 200)
+        self._width = _package_spin(" cm", 200)
+        self._height = _package_spin(" cm", 200)
+        self._weight = _package_spin(" g", 30000)
 
         if values:
             self._name.setText(values.get("name") or "")
@@ -39,6 +44,10 @@ class ItemDialog(QDialog):
             if index >= 0:
                 self._status.setCurrentIndex(index)
             self._notes.setText(values.get("notes") or "")
+            self._length.setValue(values.get("length") or 0)
+            self._width.setValue(values.get("width") or 0)
+            self._height.setValue(values.get("height") or 0)
+            self._weight.setValue(values.get("weight") or 0)
 
         form = QFormLayout()
         form.addRow("商品名", self._name)
@@ -47,6 +56,10 @@ class ItemDialog(QDialog):
         form.addRow("型番", self._model)
         form.addRow("カテゴリ", self._category)
         form.addRow("状態", self._status)
+        form.addRow("縦 (cm)", self._length)
+        form.addRow("横 (cm)", self._width)
+        form.addRow("高さ (cm)", self._height)
+        form.addRow("重量 (g)", self._weight)
         form.addRow("メモ", self._notes)
 
         buttons = QDialogButtonBox(
@@ -72,4 +85,16 @@ class ItemDialog(QDialog):
             "category": self._category.text().strip() or None,
             "status": self._status.currentData(),
             "notes": self._notes.toPlainText().strip() or None,
+            "length": self._length.value() or None,
+            "width": self._width.value() or None,
+            "height": self._height.value() or None,
+            "weight": self._weight.value() or None,
         }
+
+
+def _package_spin(suffix: str, maximum: int) -> QSpinBox:
+    spin = QSpinBox()
+    spin.setRange(0, maximum)
+    spin.setSuffix(suffix)
+    spin.setSpecialValueText("未設定")
+    return spin
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QAbstractItemView,
+    QDialog,
+    QDialogButtonBox,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+
+from app.infra.db import Repository
+
+
+class OfferSearchDialog(QDialog):
+    def __init__(self, parent=None, *, repo: Repository) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("候補の全文検索")
+        self.resize(900, 560)
+        self._repo = repo
+        self._selected_item_id: int | None = None
+
+        self._query = QLineEdit()
+        self._query.setPlaceholderText("候補タイトル・ページ本文を検索（例：ジャンク）")
+        self._query.returnPressed.connect(self._search)
+        search_btn = QPushButton("検索")
+        search_btn.clicked.connect(self._search)
+
+        self._table = QTableWidget(0, 4)
+        self._table.setHorizontalHeaderLabels(["商品", "候補", "合計", "抜粋"])
+        self._table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self._table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self._table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self._table.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeToContents
+        )
+        self._table.horizontalHeader().setStretchLastSection(True)
+        self._table.cellDoubleClicked.connect(self._open_row)
+
+        self._summary = QLabel("")
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Open | QDialogButtonBox.Close)
+        buttons.button(QDialogButtonBox.Open).setText("商品を開く")
+        buttons.accepted.connect(self._open_current)
+        buttons.rejected.connect(self.reject)
+
+        search_row = QHBoxLayout()
+        search_row.addWidget(self._query)
+        search_row.addWidget(search_btn)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(search_row)
+        layout.addWidget(self._table)
+        layout.addWidget(self._summary)
+        layout.addWidget(buttons)
+
+    def selected_item_id(self) -> int | None:
+        return self._selected_item_id
+
+    def _search(self) -> None:
+        hits = self._repo.search_offer_text(self._query.text().strip())
+        self._table.setRowCount(0)
+        for hit in hits:
+            row = self._table.rowCount()
+            self._table.insertRow(row)
+            label = QTableWidgetItem(hit.item_label)
+            label.setData(Qt.UserRole, hit.item_id)
+            self._table.setItem(row, 0, label)
+            self._table.setItem(row, 1, QTableWidgetItem(hit.title or ""))
+            total = QTableWidgetItem("" if hit.total is None else f"{hit.total:,}")
+            total.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self._table.setItem(row, 2, total)
+            self._table.setItem(row, 3, QTableWidgetItem(hit.snippet))
+        self._summary.setText(f"{len(hits)} 件")
+
+    def _open_row(self, row: int, _column: int) -> None:
+        item = self._table.item(row, 0)
+        if item is None:
+            return
+        self._selected_item_id = int(item.data(Qt.UserRole))
+        self.accept()
+
+    def _open_current(self) -> None:
+        row = self._table.currentRow()
+        if row >= 0:
+            self._open_row(row, 0)
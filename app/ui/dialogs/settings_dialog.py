@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from PySide6.QtWidgets import (
+    QComboBox,
     QDialog,
     QDialogButtonBox,
     QFormLayout,
@@ -10,6 +11,7 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
 )
 
+from app.domain.shipping import PREFECTURES
 from app.infra.config import AppConfig, save_config
 from app.infra.secrets import delete_secret, get_secret, set_secret
 
@@ -32,6 +34,13 @@ class SettingsDialog(QDialog):
         self._packaging.setRange(0, 100_000)
         self._packaging.setValue(config.default_packaging_cost)
 
+        self._origin = QComboBox()
+        self._origin.addItem("未指定", "")
+        for name in PREFECTURES:
+            self._origin.addItem(name, name)
+        index = self._origin.findData(config.origin_prefecture)
+        self._origin.setCurrentIndex(max(index, 0))
+
         self._kakaku_mode = QLineEdit(config.kakaku_mode)
         self._amazon_locale = QLineEdit(config.amazon_locale)
 
@@ -62,6 +71,7 @@ class SettingsDialog(QDialog):
         form.addRow("手数料率 (%)", self._fee_rate)
         form.addRow("目標利益", self._target_profit)
         form.addRow("資材費", self._packaging)
+        form.addRow("発送元", self._origin)
         form.addRow("価格.com取得方式", self._kakaku_mode)
         form.addRow("Amazonロケール", self._amazon_locale)
         form.addRow("楽天 App ID", self._rakuten_app_id)
@@ -85,6 +95,7 @@ class SettingsDialog(QDialog):
         self._config.fee_rate = self._fee_rate.value() / 100
         self._config.target_profit = self._target_profit.value()
         self._config.default_packaging_cost = self._packaging.value()
+        self._config.origin_prefecture = self._origin.currentData()
         self._config.kakaku_mode = self._kakaku_mode.text().strip() or "tavily"
         self._config.amazon_locale = self._amazon_locale.text().strip() or "JP"
         save_config(self._config)
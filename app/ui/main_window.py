@@ -1,6 +1,8 @@
-from PySide6.QtCore import QThread, Qt, QUrl
-from PySide6.QtGui import QAction, QDesktopServices, QIcon
+from PySide6.QtCore import QThread, QTimer, Qt, QUrl
+from PySide6.QtGui import QAction, QColor, QDesktopServices, QIcon
 from PySide6.QtWidgets import (
+    QAbstractItemView,
+    QCheckBox,
     QComboBox,
     QFormLayout,
     QFrame,
@@ -24,8 +26,11 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from app.domain.normalize import listing_key
+from app.domain.shipping import PREFECTURES
 from app.infra.config import AppConfig
 from app.infra.db import Repository
+from app.infra.db.repo import ItemSummary
 from app.usecases.calc_profit import calc_profit
 from app.usecases.csv_io import (
     export_calculations,
@@ -34,10 +39,26 @@ from app.usecases.csv_io import (
     export_offers,
     import_items,
 )
-from app.usecases.estimate_shipping import ShippingInput, estimate_shipping
+from app.usecases.estimate_shipping import (
+    ShippingInput,
+    ShippingRuleIndex,
+    refresh_item_shipping,
+    shipping_rule_index,
+)
+from app.usecases.rate_tables import import_rate_tables
 from app.usecases.refresh_offers import OfferInput
-from app.ui.dialogs import ItemDialog, SettingsDialog, ShippingRulesDialog
-from app.ui.workers import RefreshOffersWorker
+from app.usecases.what_if import profit_grid, sale_price_steps
+from app.ui.dialogs import (
+    ItemDialog,
+    OfferSearchDialog,
+    SettingsDialog,
+    ShippingRulesDialog,
+)
+from app.ui.workers import BatchRefreshWorker, CompactWorker, RefreshOffersWorker
+
+OFFER_PAGE_SIZE = 200
+SENSITIVITY_FEE_OFFSETS = (-0.05, 0.0, 0.05)
+SENSITIVITY_SHIPPING_OPTIONS = 3
 
 
 class MainWindow(QMainWindow):
@@ -47,8 +68,16 @@ class MainWindow(QMainWindow):
         self._config = config
         self._refresh_thread: QThread | None = None
         self._refresh_worker: RefreshOffersWorker | None = None
+        self._best_total: int | None = None
+        self._offer_cursor: tuple[int, int] | None = None
+        self._batch_thread: QThread | None = None
+        self._batch_worker: BatchRefreshWorker | None = None
+        self._compact_thread: QThread | None = None
+        self._compact_worker: CompactWorker | None = None
+        self._compact_timer: QTimer | None = None
         self._selected_offer_id: int | None = None
         self._selected_shipping_cost: int = 0
+        self._shipping_options: list[tuple[str, int]] = []
 
         self.setWindowTitle("メルカリ仕入れ支援")
         self._apply_icon()
@@ -62,6 +91,7 @@ class MainWindow(QMainWindow):
         self._update_shipping()
         self._update_profit()
         self._update_controls_enabled()
+        self._start_compact_timer()
         self._show_help_on_start()
 
     def _build_menu(self) -> None:
@@ -86,6 +116,22 @@ class MainWindow(QMainWindow):
         logs_action = QAction("ログフォルダを開く", self)
         logs_action.triggered.connect(self._open_logs_folder)
 
+        batch_selected_action = QAction("選択商品の候補を一括更新", self)
+        batch_selected_action.triggered.connect(self._batch_refresh_selected)
+
+        batch_all_action = QAction("全商品の候補を一括更新", self)
+        batch_all_action.triggered.connect(self._batch_refresh_all)
+
+        self._batch_cancel_action = QAction("一括更新を中止", self)
+        self._batch_cancel_action.setEnabled(False)
+        self._batch_cancel_action.triggered.connect(self._cancel_batch_refresh)
+
+        offer_search_action = QAction("候補を全文検索", self)
+        offer_search_action.triggered.connect(self._open_offer_search)
+
+        compact_action = QAction("データを整理", self)
+        compact_action.triggered.connect(self._start_compact)
+
         menu = self.menuBar()
         settings_menu = menu.addMenu("設定")
         settings_menu.addAction(settings_action)
@@ -93,6 +139,9 @@ class MainWindow(QMainWindow):
         shipping_action = QAction("送料テーブル編集", self)
         shipping_action.triggered.connect(self._open_shipping_rules)
         settings_menu.addAction(shipping_action)
+        rate_tables_action = QAction("地域別運賃表CSVをインポート", self)
+        rate_tables_action.triggered.connect(self._import_rate_tables_csv)
+        settings_menu.addAction(rate_tables_action)
 
         csv_menu = menu.addMenu("CSV入出力")
         csv_menu.addAction(csv_import_items)
@@ -103,6 +152,13 @@ class MainWindow(QMainWindow):
         csv_menu.addAction(csv_export_calc)
 
         tools_menu = menu.addMenu("ツール")
+        tools_menu.addAction(offer_search_action)
+        tools_menu.addSeparator()
+        tools_menu.addAction(batch_selected_action)
+        tools_menu.addAction(batch_all_action)
+        tools_menu.addAction(self._batch_cancel_action)
+        tools_menu.addSeparator()
+        tools_menu.addAction(compact_action)
         tools_menu.addAction(logs_action)
 
     def _build_layout(self) -> None:
@@ -129,8 +185,15 @@ class MainWindow(QMainWindow):
 
         self._search = QLineEdit()
         self._search.setPlaceholderText("商品検索")
-        self._search.setToolTip("商品名または検索キーワードで絞り込みます。")
-        self._search.textChanged.connect(self._load_items)
+        self._search.setToolTip(
+            "商品名・検索キーワード・JAN・型番・カテゴリ・メモで絞り込みます。"
+        )
+        # Typing restarts the timer so a burst of keys runs one query.
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(150)
+        self._search_timer.timeout.connect(self._load_items)
+        self._search.textChanged.connect(self._schedule_item_search)
         layout.addWidget(self._search)
 
         filter_row = QHBoxLayout()
@@ -142,9 +205,19 @@ class MainWindow(QMainWindow):
         self._status_filter.currentIndexChanged.connect(self._load_items)
         filter_row.addWidget(QLabel("状態"))
         filter_row.addWidget(self._status_filter)
+        self._item_sort = QComboBox()
+        self._item_sort.addItem("更新順", "updated")
+        self._item_sort.addItem("利益順", "profit")
+        self._item_sort.addItem("差額順", "spread")
+        self._item_sort.addItem("最安順", "best_total")
+        self._item_sort.setToolTip("差額は相場（中）と最安合計の差です。")
+        self._item_sort.currentIndexChanged.connect(self._load_items)
+        filter_row.addWidget(QLabel("並び"))
+        filter_row.addWidget(self._item_sort)
         layout.addLayout(filter_row)
 
         self._item_list = QListWidget()
+        self._item_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self._item_list.currentItemChanged.connect(self._on_item_selected)
         layout.addWidget(self._item_list)
 
@@ -174,6 +247,14 @@ class MainWindow(QMainWindow):
         self._refresh_btn.setToolTip("選択中の商品で候補取得を実行します。")
         self._refresh_btn.clicked.connect(self._refresh_offers)
         controls.addWidget(self._refresh_btn)
+        self._cancel_refresh_btn = QPushButton("中止")
+        self._cancel_refresh_btn.setToolTip("実行中の候補取得を中止します。")
+        self._cancel_refresh_btn.setEnabled(False)
+        self._cancel_refresh_btn.clicked.connect(self._cancel_refresh)
+        controls.addWidget(self._cancel_refresh_btn)
+        self._force_refresh = QCheckBox("キャッシュを使わない")
+        self._force_refresh.setToolTip("直近の取得結果を再利用せず、必ずAPIへ問い合わせます。")
+        controls.addWidget(self._force_refresh)
         controls.addStretch()
         controls.addWidget(QLabel("並び替え"))
         self._sort_box = QComboBox()
@@ -198,6 +279,18 @@ class MainWindow(QMainWindow):
         self._offers_table.itemSelectionChanged.connect(self._on_offer_selected)
         layout.addWidget(self._offers_table)
 
+        self._more_offers_btn = QPushButton("さらに表示")
+        self._more_offers_btn.setToolTip("次の候補を読み込みます。")
+        self._more_offers_btn.setVisible(False)
+        self._more_offers_btn.clicked.connect(self._append_offer_page)
+        layout.addWidget(self._more_offers_btn)
+
+        self._raw_text_view = QTextEdit()
+        self._raw_text_view.setReadOnly(True)
+        self._raw_text_view.setMaximumHeight(120)
+        self._raw_text_view.setPlaceholderText("候補を選択すると取得時の本文を表示します。")
+        layout.addWidget(self._raw_text_view)
+
         return pane
 
     def _build_right_pane(self) -> QWidget:
@@ -228,6 +321,15 @@ class MainWindow(QMainWindow):
         shipping_layout.addRow("高さ (cm)", self._height)
         shipping_layout.addRow("重量 (g)", self._weight)
         shipping_layout.addRow("資材費 (円)", self._packaging)
+        self._destination = QComboBox()
+        self._destination.addItem("未指定", None)
+        for name in PREFECTURES:
+            self._destination.addItem(name, name)
+        self._destination.setToolTip(
+            "地域別運賃表があるサービスは、設定の発送元からこの届け先までの運賃で計算します。"
+        )
+        self._destination.currentIndexChanged.connect(self._update_shipping)
+        shipping_layout.addRow("届け先", self._destination)
         layout.addWidget(shipping_box)
 
         self._shipping_table = QTableWidget(0, 3)
@@ -283,6 +385,23 @@ class MainWindow(QMainWindow):
         profit_layout.addRow("目標ライン", self._target_label)
         layout.addWidget(profit_box)
 
+        self._sensitivity_box = QGroupBox("感度（売価 × 手数料・送料）")
+        self._sensitivity_box.setObjectName("card")
+        self._sensitivity_box.setCheckable(True)
+        self._sensitivity_box.setChecked(False)
+        self._sensitivity_box.setToolTip(
+            "相場の安値〜高値（未入力なら想定売価 ±30%）で利益を一覧します。"
+        )
+        sensitivity_layout = QVBoxLayout(self._sensitivity_box)
+        self._sensitivity_table = QTableWidget(0, 0)
+        self._sensitivity_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self._sensitivity_table.setMinimumHeight(220)
+        self._sensitivity_table.setVisible(False)
+        sensitivity_layout.addWidget(self._sensitivity_table)
+        self._sensitivity_box.toggled.connect(self._sensitivity_table.setVisible)
+        self._sensitivity_box.toggled.connect(self._update_sensitivity)
+        layout.addWidget(self._sensitivity_box)
+
         self._save_calc_btn = QPushButton("計算結果を保存")
         self._save_calc_btn.setToolTip("現在の計算結果と相場を保存します。")
         self._save_calc_btn.clicked.connect(self._save_calculation)
@@ -301,6 +420,9 @@ class MainWindow(QMainWindow):
         for spin in [self._sale_price, self._cost_price, self._fee_rate]:
             spin.valueChanged.connect(self._update_profit)
 
+        for spin in [self._market_low, self._market_high]:
+            spin.valueChanged.connect(self._update_sensitivity)
+
         for spin in [
             self._length,
             self._width,
@@ -405,25 +527,48 @@ class MainWindow(QMainWindow):
         if not icon_path.isNull():
             self.setWindowIcon(icon_path)
 
+    def _schedule_item_search(self, _text: str) -> None:
+        self._search_timer.start()
+
     def _load_items(self) -> None:
-        self._item_list.clear()
-        query = self._search.text().strip().lower()
+        # Rebuilt after writes too, so the current item is kept without
+        # re-running the selection handler.
+        current = self._current_item_id()
+        query = self._search.text().strip()
         status = self._status_filter.currentData() or "all"
-        for item in self._repo.list_items():
-            if status != "all" and item.status != status:
-                continue
-            label = item.name or item.search_keyword
-            if query and query not in label.lower():
-                continue
-            list_item = QListWidgetItem(label)
-            list_item.setData(Qt.UserRole, item.id)
+        summaries = self._repo.list_item_summaries(
+            query,
+            None if status == "all" else status,
+            sort=self._item_sort.currentData() or "updated",
+        )
+        self._item_list.blockSignals(True)
+        self._item_list.clear()
+        for summary in summaries:
+            list_item = QListWidgetItem(_summary_text(summary))
+            list_item.setData(Qt.UserRole, summary.item_id)
             self._item_list.addItem(list_item)
+            if summary.item_id == current:
+                self._item_list.setCurrentItem(list_item)
+        self._item_list.blockSignals(False)
         if self._item_list.count() > 0 and not self._item_list.currentItem():
             self._item_list.setCurrentRow(0)
+        elif current is not None and self._item_list.count() == 0:
+            self._on_item_selected()
         if self._item_list.count() == 0:
             self.statusBar().showMessage("商品がありません。左下の「追加」から登録してください。")
         self._update_controls_enabled()
 
+    def _select_item(self, item_id: int) -> None:
+        for _ in range(2):
+            for row in range(self._item_list.count()):
+                if int(self._item_list.item(row).data(Qt.UserRole)) == item_id:
+                    self._item_list.setCurrentRow(row)
+                    return
+            # Not in the filtered list; clear the filters and look again.
+            self._search.clear()
+            self._status_filter.setCurrentIndex(0)
+            self._load_items()
+
     def _current_item_id(self) -> int | None:
         current = self._item_list.currentItem()
         if not current:
@@ -432,7 +577,7 @@ class MainWindow(QMainWindow):
 
     def _update_controls_enabled(self) -> None:
         has_item = self._current_item_id() is not None
-        self._refresh_btn.setEnabled(has_item)
+        self._refresh_btn.setEnabled(has_item and self._refresh_worker is None)
         self._edit_btn.setEnabled(has_item)
         self._delete_btn.setEnabled(has_item)
         self._save_calc_btn.setEnabled(has_item)
@@ -446,7 +591,8 @@ class MainWindow(QMainWindow):
         if not values["search_keyword"]:
             QMessageBox.warning(self, "入力確認", "検索キーワードか商品名を入力してください。")
             return
-        self._repo.create_item(**values)
+        item_id = self._repo.create_item(**values)
+        self._refresh_item_shipping([item_id])
         self._load_items()
 
     def _edit_item(self) -> None:
@@ -467,6 +613,10 @@ class MainWindow(QMainWindow):
                 "category": item.category,
                 "status": item.status,
                 "notes": item.notes,
+                "length": item.length,
+                "width": item.width,
+                "height": item.height,
+                "weight": item.weight,
             },
         )
         if dialog.exec() != ItemDialog.Accepted:
@@ -476,7 +626,9 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "入力確認", "検索キーワードか商品名を入力してください。")
             return
         self._repo.update_item(item_id=item_id, **values)
+        self._refresh_item_shipping([item_id])
         self._load_items()
+        self._load_package()
 
     def _delete_item(self) -> None:
         item_id = self._current_item_id()
@@ -496,61 +648,160 @@ class MainWindow(QMainWindow):
         self._best_label.setText("最安: -")
 
     def _on_item_selected(self) -> None:
+        # A refresh for the previous item is no longer wanted.
+        self._cancel_refresh()
         self._selected_offer_id = None
         self._load_offers()
         self._load_market()
+        self._load_package()
         self._update_controls_enabled()
 
+    def _load_package(self) -> None:
+        # Measured items fill the shipping form; others keep what was typed.
+        item_id = self._current_item_id()
+        item = self._repo.get_item(item_id) if item_id is not None else None
+        if item is None or not item.has_package:
+            return
+        fields = (
+            (self._length, item.length),
+            (self._width, item.width),
+            (self._height, item.height),
+            (self._weight, item.weight),
+        )
+        for spin, value in fields:
+            spin.blockSignals(True)
+            spin.setValue(value or 0)
+            spin.blockSignals(False)
+        self._update_shipping()
+
     def _load_offers(self) -> None:
         item_id = self._current_item_id()
         self._offers_table.setRowCount(0)
+        self._raw_text_view.clear()
+        self._more_offers_btn.setVisible(False)
+        self._offer_cursor = None
         if item_id is None:
             return
-        source_map = {source_id: name for name, source_id in self._repo.list_sources()}
-        offers = self._repo.list_offers(item_id)
-        if self._sort_box.currentText() == "価格 (昇順)":
-            offers.sort(key=lambda x: x.price or 0)
-        elif self._sort_box.currentText() == "送料 (昇順)":
-            offers.sort(key=lambda x: x.shipping or 0)
-        else:
-            offers.sort(key=lambda x: x.total or 0)
+        self._best_total = self._repo.best_offer_total(item_id)
+        self._best_label.setText(
+            f"最安: {self._best_total}" if self._best_total is not None else "最安: -"
+        )
+        if not self._append_offer_page():
+            self.statusBar().showMessage("候補がありません。候補更新を実行してください。")
+            self._cost_price.setValue(0)
+            self._selected_offer_id = None
+            self._update_profit()
 
-        best_total = None
+    def _append_offer_page(self) -> int:
+        item_id = self._current_item_id()
+        if item_id is None:
+            return 0
+        _, sort = self._sort_column()
+        offers = self._repo.list_offer_rows(
+            item_id, sort, limit=OFFER_PAGE_SIZE, after=self._offer_cursor
+        )
+        source_map = {source_id: name for name, source_id in self._repo.list_sources()}
         for offer in offers:
-            row = self._offers_table.rowCount()
-            self._offers_table.insertRow(row)
             source_name = source_map.get(offer.source_id, str(offer.source_id))
-            self._offers_table.setItem(row, 0, QTableWidgetItem(str(source_name)))
-            self._offers_table.setItem(row, 1, QTableWidgetItem(offer.title or ""))
-            self._offers_table.setItem(
-                row, 2, QTableWidgetItem(str(offer.price or "-"))
-            )
-            self._offers_table.setItem(
-                row, 3, QTableWidgetItem(str(offer.shipping or "-"))
-            )
-            self._offers_table.setItem(
-                row, 4, QTableWidgetItem(str(offer.total or "-"))
-            )
-            self._offers_table.setItem(
-                row, 5, QTableWidgetItem(offer.stock_status or "-")
+            self._insert_offer_row(
+                self._offers_table.rowCount(),
+                str(source_name),
+                offer.title,
+                offer.price,
+                offer.shipping,
+                offer.total,
+                offer.stock_status,
+                offer.id,
+                offer.listing_key,
             )
-            self._offers_table.setVerticalHeaderItem(
-                row, QTableWidgetItem(str(offer.id))
+        if offers:
+            self._offer_cursor = offers[-1].cursor(sort)
+        self._more_offers_btn.setVisible(len(offers) == OFFER_PAGE_SIZE)
+        return len(offers)
+
+    def _insert_offer_row(
+        self,
+        row: int,
+        source_name: str,
+        title: str | None,
+        price: int | None,
+        shipping: int | None,
+        total: int | None,
+        stock_status: str | None,
+        offer_id: int | None,
+        key: str,
+    ) -> None:
+        self._offers_table.insertRow(row)
+        source_item = QTableWidgetItem(source_name)
+        # Rows are keyed like the offers upsert, by source and listing key.
+        source_item.setData(Qt.UserRole, key)
+        self._offers_table.setItem(row, 0, source_item)
+        self._offers_table.setItem(row, 1, QTableWidgetItem(title or ""))
+        self._offers_table.setItem(row, 2, QTableWidgetItem(str(price or "-")))
+        self._offers_table.setItem(row, 3, QTableWidgetItem(str(shipping or "-")))
+        self._offers_table.setItem(row, 4, QTableWidgetItem(str(total or "-")))
+        self._offers_table.setItem(row, 5, QTableWidgetItem(stock_status or "-"))
+        # Streamed rows for new listings are not stored yet, so they have no id.
+        self._offers_table.setVerticalHeaderItem(
+            row, QTableWidgetItem(str(offer_id) if offer_id is not None else "-")
+        )
+
+    def _sort_column(self) -> tuple[int, str]:
+        if self._sort_box.currentText() == "価格 (昇順)":
+            return 2, "price"
+        if self._sort_box.currentText() == "送料 (昇順)":
+            return 3, "shipping"
+        return 4, "total"
+
+    def _on_source_offers(self, item_id: int, source_name: str, offers: list) -> None:
+        if item_id != self._current_item_id():
+            return
+        column, key = self._sort_column()
+        for offer in offers:
+            offer_key = listing_key(offer.get("url"), offer.get("title"))
+            # A stored row for the same listing is replaced, keeping its id.
+            offer_id = self._take_offer_row(source_name, offer_key)
+            value = offer.get(key) or 0
+            row = 0
+            while row < self._offers_table.rowCount():
+                cell = self._offers_table.item(row, column)
+                text = cell.text() if cell else ""
+                if (int(text) if text.isdigit() else 0) > value:
+                    break
+                row += 1
+            self._insert_offer_row(
+                row,
+                source_name,
+                offer.get("title"),
+                offer.get("price"),
+                offer.get("shipping"),
+                offer.get("total"),
+                offer.get("stock_status"),
+                offer_id,
+                offer_key,
             )
-            if offer.total is not None:
-                best_total = (
-                    offer.total
-                    if best_total is None
-                    else min(best_total, offer.total)
-                )
+            total = offer.get("total")
+            if total is not None and (
+                self._best_total is None or total < self._best_total
+            ):
+                self._best_total = total
         self._best_label.setText(
-            f"最安: {best_total}" if best_total is not None else "最安: -"
+            f"最安: {self._best_total}" if self._best_total is not None else "最安: -"
         )
-        if not offers:
-            self.statusBar().showMessage("候補がありません。候補更新を実行してください。")
-            self._cost_price.setValue(0)
-            self._selected_offer_id = None
-            self._update_profit()
+        self.statusBar().showMessage(f"候補取得中... ({source_name}: {len(offers)} 件)")
+
+    def _take_offer_row(self, source_name: str, key: str) -> int | None:
+        for row in range(self._offers_table.rowCount()):
+            cell = self._offers_table.item(row, 0)
+            if cell is None or cell.text() != source_name:
+                continue
+            if cell.data(Qt.UserRole) != key:
+                continue
+            header = self._offers_table.verticalHeaderItem(row)
+            text = header.text() if header else ""
+            self._offers_table.removeRow(row)
+            return int(text) if text.isdigit() else None
+        return None
 
     def _load_market(self) -> None:
         item_id = self._current_item_id()
@@ -582,35 +833,125 @@ class MainWindow(QMainWindow):
         request = OfferInput(item_id=item.id, search_keyword=item.search_keyword)
 
         self._refresh_worker = RefreshOffersWorker(
-            self._config.db_path, request
+            self._repo,
+            self._config,
+            request,
+            force_refresh=self._force_refresh.isChecked(),
         )
         self._refresh_thread = QThread(self)
         self._refresh_worker.moveToThread(self._refresh_thread)
         self._refresh_thread.started.connect(self._refresh_worker.run)
+        self._refresh_worker.source_done.connect(self._on_source_offers)
         self._refresh_worker.finished.connect(self._refresh_done)
+        self._refresh_worker.cancelled.connect(self._refresh_cancelled)
         self._refresh_worker.failed.connect(self._refresh_failed)
         self._refresh_worker.finished.connect(self._refresh_thread.quit)
+        self._refresh_worker.cancelled.connect(self._refresh_thread.quit)
         self._refresh_worker.failed.connect(self._refresh_thread.quit)
         self._refresh_thread.finished.connect(self._refresh_worker.deleteLater)
         self._refresh_thread.finished.connect(self._refresh_thread.deleteLater)
 
         self._refresh_btn.setEnabled(False)
+        self._cancel_refresh_btn.setEnabled(True)
         self.statusBar().showMessage("候補取得中...")
         self._refresh_thread.start()
 
+    def _cancel_refresh(self) -> None:
+        if self._refresh_worker:
+            self._refresh_worker.cancel()
+            self._cancel_refresh_btn.setEnabled(False)
+            self.statusBar().showMessage("候補取得を中止しています...")
+
     def _refresh_done(self, count: int) -> None:
-        self._refresh_btn.setEnabled(True)
+        self._refresh_finished()
         self.statusBar().showMessage(f"候補取得完了: {count} 件")
         self._load_offers()
-        self._refresh_worker = None
-        self._refresh_thread = None
+        self._load_items()
+
+    def _refresh_cancelled(self) -> None:
+        self._refresh_finished()
+        self.statusBar().showMessage("候補取得を中止しました")
+        self._load_offers()
 
     def _refresh_failed(self, message: str) -> None:
-        self._refresh_btn.setEnabled(True)
+        self._refresh_finished()
         QMessageBox.warning(self, "取得失敗", message)
         self.statusBar().showMessage("取得失敗")
+
+    def _refresh_finished(self) -> None:
         self._refresh_worker = None
         self._refresh_thread = None
+        self._cancel_refresh_btn.setEnabled(False)
+        self._update_controls_enabled()
+
+    def _batch_refresh_selected(self) -> None:
+        item_ids = {
+            int(entry.data(Qt.UserRole)) for entry in self._item_list.selectedItems()
+        }
+        if not item_ids:
+            QMessageBox.information(self, "商品選択", "商品を選択してください。")
+            return
+        items = [item for item in self._repo.list_items() if item.id in item_ids]
+        self._start_batch_refresh(items)
+
+    def _batch_refresh_all(self) -> None:
+        self._start_batch_refresh(self._repo.list_items())
+
+    def _start_batch_refresh(self, items: list) -> None:
+        if self._batch_thread and self._batch_thread.isRunning():
+            return
+        if not items:
+            return
+        requests = [
+            OfferInput(item_id=item.id, search_keyword=item.search_keyword)
+            for item in items
+        ]
+        self._batch_worker = BatchRefreshWorker(
+            self._repo,
+            self._config,
+            requests,
+            force_refresh=self._force_refresh.isChecked(),
+        )
+        self._batch_thread = QThread(self)
+        self._batch_worker.moveToThread(self._batch_thread)
+        self._batch_thread.started.connect(self._batch_worker.run)
+        self._batch_worker.progress.connect(self._batch_progress)
+        self._batch_worker.finished.connect(self._batch_done)
+        self._batch_worker.failed.connect(self._batch_failed)
+        self._batch_worker.finished.connect(self._batch_thread.quit)
+        self._batch_worker.failed.connect(self._batch_thread.quit)
+        self._batch_thread.finished.connect(self._batch_worker.deleteLater)
+        self._batch_thread.finished.connect(self._batch_thread.deleteLater)
+
+        self._batch_cancel_action.setEnabled(True)
+        self.statusBar().showMessage(f"一括更新中... 0/{len(requests)}")
+        self._batch_thread.start()
+
+    def _cancel_batch_refresh(self) -> None:
+        if self._batch_worker:
+            self._batch_worker.cancel()
+            self.statusBar().showMessage("一括更新を中止しています...")
+
+    def _batch_progress(self, done: int, total: int) -> None:
+        self.statusBar().showMessage(f"一括更新中... {done}/{total}")
+
+    def _batch_done(self, completed: int, offers: int, cancelled: bool) -> None:
+        self._batch_cancel_action.setEnabled(False)
+        suffix = "（中止）" if cancelled else ""
+        self.statusBar().showMessage(
+            f"一括更新完了{suffix}: {completed} 商品 / 候補 {offers} 件"
+        )
+        self._load_offers()
+        self._load_items()
+        self._batch_worker = None
+        self._batch_thread = None
+
+    def _batch_failed(self, message: str) -> None:
+        self._batch_cancel_action.setEnabled(False)
+        QMessageBox.warning(self, "一括更新失敗", message)
+        self.statusBar().showMessage("一括更新失敗")
+        self._batch_worker = None
+        self._batch_thread = None
 
     def _on_offer_selected(self) -> None:
         selected = self._offers_table.currentRow()
@@ -618,7 +959,15 @@ class MainWindow(QMainWindow):
             return
         header = self._offers_table.verticalHeaderItem(selected)
         if header:
-            self._selected_offer_id = int(header.text())
+            self._selected_offer_id = (
+                int(header.text()) if header.text().isdigit() else None
+            )
+        raw_text = (
+            self._repo.get_offer_raw_text(self._selected_offer_id)
+            if self._selected_offer_id is not None
+            else None
+        )
+        self._raw_text_view.setPlainText(raw_text or "")
         price_item = self._offers_table.item(selected, 2)
         shipping_item = self._offers_table.item(selected, 3)
         price = int(price_item.text()) if price_item and price_item.text().isdigit() else 0
@@ -637,6 +986,8 @@ class MainWindow(QMainWindow):
             height=self._height.value(),
             weight=self._weight.value(),
             packaging_cost=self._packaging.value(),
+            origin=self._config.origin_prefecture or None,
+            destination=self._destination.currentData(),
         )
         self._clear_shipping_warnings()
         missing_fields = []
@@ -670,10 +1021,20 @@ class MainWindow(QMainWindow):
             self.statusBar().showMessage(
                 "配送条件が未入力です。寸法や重量を入力してください。"
             )
-        rules = self._repo.list_shipping_rules()
-        estimates = estimate_shipping(rules, data)
+        try:
+            estimates = shipping_rule_index(self._repo).estimate(data)
+        except (RuntimeError, ValueError) as exc:
+            # A bad origin or missing numpy falls back to the flat rule prices.
+            self.statusBar().showMessage(f"地域別運賃を使えません: {exc}")
+            estimates = ShippingRuleIndex(self._repo.list_shipping_rules()).estimate(
+                data
+            )
         self._shipping_table.setRowCount(0)
         self._selected_shipping_cost = 0
+        self._shipping_options = [
+            (estimate.rule.service_name, estimate.total_cost - data.packaging_cost)
+            for estimate in estimates[:SENSITIVITY_SHIPPING_OPTIONS]
+        ]
         if not estimates:
             self._shipping_table.insertRow(0)
             self._shipping_table.setItem(0, 0, QTableWidgetItem("送料ルール未設定"))
@@ -732,6 +1093,61 @@ class MainWindow(QMainWindow):
             if result.min_price_for_target
             else "-"
         )
+        self._update_sensitivity()
+
+    def _update_sensitivity(self) -> None:
+        if not self._sensitivity_box.isChecked():
+            return
+        table = self._sensitivity_table
+        low, high = self._market_low.value(), self._market_high.value()
+        sale = self._sale_price.value()
+        if not (high > low > 0) and sale > 0:
+            low, high = int(sale * 0.7), int(sale * 1.3)
+        if not high > low:
+            table.setRowCount(0)
+            table.setColumnCount(0)
+            return
+        fee = self._fee_rate.value() / 100
+        fee_rates = sorted(
+            {
+                round(min(0.99, max(0.0, fee + step)), 4)
+                for step in SENSITIVITY_FEE_OFFSETS
+            }
+        )
+        shipping = self._shipping_options or [
+            ("送料", max(0, self._selected_shipping_cost - self._packaging.value()))
+        ]
+        try:
+            grid = profit_grid(
+                sale_price_steps(low, high),
+                fee_rates,
+                [cost for _, cost in shipping],
+                cost_price=self._cost_price.value(),
+                packaging_cost=self._packaging.value(),
+            )
+        except RuntimeError as exc:
+            self._sensitivity_box.setChecked(False)
+            self.statusBar().showMessage(f"感度グリッドを表示できません: {exc}")
+            return
+
+        profit = grid.profit
+        scale = max(1, int(abs(profit).max()))
+        target = self._config.target_profit
+        table.setRowCount(len(grid.sale_prices))
+        table.setColumnCount(len(shipping) * len(fee_rates))
+        table.setVerticalHeaderLabels([f"{price:,}" for price in grid.sale_prices])
+        table.setHorizontalHeaderLabels(
+            [f"{name}\n{rate:.0%}" for name, _ in shipping for rate in fee_rates]
+        )
+        for s_index in range(len(shipping)):
+            for f_index in range(len(fee_rates)):
+                column = s_index * len(fee_rates) + f_index
+                for row in range(len(grid.sale_prices)):
+                    value = int(profit[s_index, f_index, row])
+                    cell = QTableWidgetItem(f"{value:,}")
+                    cell.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                    cell.setBackground(_profit_color(value, target, scale))
+                    table.setItem(row, column, cell)
 
     def _save_calculation(self) -> None:
         item_id = self._current_item_id()
@@ -784,6 +1200,7 @@ class MainWindow(QMainWindow):
                 high=self._market_high.value(),
                 memo=self._market_memo.toPlainText().strip() or None,
             )
+        self._load_items()
         QMessageBox.information(self, "保存完了", "計算結果を保存しました。")
 
     def _open_settings(self) -> None:
@@ -792,11 +1209,39 @@ class MainWindow(QMainWindow):
             self._fee_rate.setValue(int(self._config.fee_rate * 100))
             self._packaging.setValue(self._config.default_packaging_cost)
             self._update_shipping()
+            self._refresh_item_shipping()
+            self._load_items()
 
     def _open_shipping_rules(self) -> None:
         dialog = ShippingRulesDialog(self, repo=self._repo)
         if dialog.exec() == ShippingRulesDialog.Accepted:
             self._update_shipping()
+            self._refresh_item_shipping()
+            self._load_items()
+
+    def _import_rate_tables_csv(self) -> None:
+        path, _ = QFileDialog.getOpenFileName(
+            self, "地域別運賃表CSVをインポート", "", "CSVファイル (*.csv)"
+        )
+        if not path:
+            return
+        try:
+            count = import_rate_tables(self._repo, path)
+        except (RuntimeError, ValueError) as exc:
+            QMessageBox.warning(self, "インポート失敗", str(exc))
+            return
+        self.statusBar().showMessage(f"運賃表をインポートしました: {count} サービス")
+        self._update_shipping()
+
+    def _refresh_item_shipping(self, item_ids: list[int] | None = None) -> None:
+        try:
+            refresh_item_shipping(
+                self._repo,
+                packaging_cost=self._config.default_packaging_cost,
+                item_ids=item_ids,
+            )
+        except RuntimeError as exc:
+            self.statusBar().showMessage(f"送料の一括計算をスキップしました: {exc}")
 
     def _import_items_csv(self) -> None:
         path, _ = QFileDialog.getOpenFileName(
@@ -806,6 +1251,7 @@ class MainWindow(QMainWindow):
             return
         count = import_items(self._repo, path)
         self.statusBar().showMessage(f"商品をインポートしました: {count} 件")
+        self._refresh_item_shipping()
         self._load_items()
 
     def _export_items_csv(self) -> None:
@@ -888,6 +1334,66 @@ class MainWindow(QMainWindow):
             [self._length, self._width, self._height, self._weight]
         )
 
+    def _open_offer_search(self) -> None:
+        dialog = OfferSearchDialog(self, repo=self._repo)
+        if dialog.exec() != OfferSearchDialog.Accepted:
+            return
+        item_id = dialog.selected_item_id()
+        if item_id is not None:
+            self._select_item(item_id)
+
+    def _start_compact_timer(self) -> None:
+        hours = self._config.compact_interval_hours
+        if not hours or hours <= 0:
+            return
+        self._compact_timer = QTimer(self)
+        self._compact_timer.setInterval(int(hours * 3600 * 1000))
+        self._compact_timer.timeout.connect(self._start_compact)
+        self._compact_timer.start()
+
+    def _start_compact(self) -> None:
+        if self._compact_thread and self._compact_thread.isRunning():
+            return
+        self._compact_worker = CompactWorker(self._repo, self._config)
+        self._compact_thread = QThread(self)
+        self._compact_worker.moveToThread(self._compact_thread)
+        self._compact_thread.started.connect(self._compact_worker.run)
+        self._compact_worker.finished.connect(self._compact_done)
+        self._compact_worker.failed.connect(self._compact_failed)
+        self._compact_worker.finished.connect(self._compact_thread.quit)
+        self._compact_worker.failed.connect(self._compact_thread.quit)
+        self._compact_thread.finished.connect(self._compact_worker.deleteLater)
+        self._compact_thread.finished.connect(self._compact_thread.deleteLater)
+        self._compact_thread.start()
+
+    def _compact_done(self, removed: int, freed_pages: int) -> None:
+        self._compact_worker = None
+        self._compact_thread = None
+        self.statusBar().showMessage(
+            f"データ整理完了: {removed} 行削除 / {freed_pages} ページ解放"
+        )
+        self._load_offers()
+        self._load_items()
+
+    def _compact_failed(self, message: str) -> None:
+        self._compact_worker = None
+        self._compact_thread = None
+        self.statusBar().showMessage(f"データ整理失敗: {message}")
+
+    def closeEvent(self, event) -> None:
+        # The workers write through the shared repository that main closes
+        # after the window, so every thread must have stopped before then.
+        if self._compact_timer:
+            self._compact_timer.stop()
+        for worker in (self._refresh_worker, self._batch_worker):
+            if worker:
+                worker.cancel()
+        for thread in (self._refresh_thread, self._batch_thread, self._compact_thread):
+            if thread:
+                thread.quit()
+                thread.wait()
+        super().closeEvent(event)
+
     def _show_help_on_start(self) -> None:
         if self._item_list.count() == 0:
             QMessageBox.information(
@@ -895,3 +1401,30 @@ class MainWindow(QMainWindow):
                 "はじめに",
                 "商品を追加して、候補更新を実行すると仕入れ候補が表示されます。",
             )
+
+
+def _summary_text(summary: ItemSummary) -> str:
+    parts = []
+    if summary.best_total is not None:
+        parts.append(f"最安 ¥{summary.best_total:,}")
+    if summary.market_mid is not None:
+        parts.append(f"相場 ¥{summary.market_mid:,}")
+    if summary.last_profit is not None:
+        parts.append(f"利益 ¥{summary.last_profit:,}")
+    if summary.shipping_cost is not None:
+        parts.append(f"送料 ¥{summary.shipping_cost:,} ({summary.shipping_service})")
+    if not parts:
+        return summary.label
+    return f"{summary.label}\n  " + " / ".join(parts)
+
+
+def _profit_color(profit: int, target: int, scale: int) -> QColor:
+    # Red below zero, amber under the target, green at or above it; the
+    # shade deepens with the size of the profit or loss.
+    strength = min(1.0, abs(profit) / scale)
+    alpha = int(40 + 140 * strength)
+    if profit < 0:
+        return QColor(220, 53, 69, alpha)
+    if profit < target:
+        return QColor(255, 193, 7, alpha)
+    return QColor(40, 167, 69, alpha)
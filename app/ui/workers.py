@@ -2,24 +2,119 @@ from __future__ import annotations
 
 from PySide6.QtCore import QObject, Signal
 
-from app.infra.db.repo import Repository, init_db
+from app.infra.cancellation import CancelToken, OperationCancelled
+from app.infra.config import AppConfig
+from app.infra.db import Repository
+from app.usecases.batch_refresh import BatchProgress, batch_refresh_offers
+from app.usecases.compact_db import compact_database
 from app.usecases.refresh_offers import OfferInput, refresh_offers
 
 
 class RefreshOffersWorker(QObject):
+    source_done = Signal(int, str, list)
     finished = Signal(int)
+    cancelled = Signal()
     failed = Signal(str)
 
-    def __init__(self, db_path: str, request: OfferInput) -> None:
+    def __init__(
+        self,
+        repo: Repository,
+        config: AppConfig,
+        request: OfferInput,
+        *,
+        force_refresh: bool = False,
+    ) -> None:
         super().__init__()
-        self._db_path = db_path
+        self._repo = repo
+        self._config = config
         self._request = request
+        self._force_refresh = force_refresh
+        self._token = CancelToken()
+
+    def cancel(self) -> None:
+        self._token.cancel()
 
     def run(self) -> None:
         try:
-            conn = init_db(self._db_path)
-            repo = Repository(conn)
-            count = refresh_offers(repo, self._request)
+            count = refresh_offers(
+                self._repo,
+                self._request,
+                force_refresh=self._force_refresh,
+                config=self._config,
+                on_source=self._emit_source,
+                token=self._token,
+            )
             self.finished.emit(count)
+        except OperationCancelled:
+            self.cancelled.emit()
+        except Exception as exc:  # pragma: no cover - runtime errors
+            self.failed.emit(str(exc))
+        finally:
+            self._repo.release_reader()
+
+    def _emit_source(self, name: str, offers: list[dict]) -> None:
+        if self._token.cancelled:
+            return
+        self.source_done.emit(self._request.item_id, name, offers)
+
+
+class BatchRefreshWorker(QObject):
+    progress = Signal(int, int)
+    finished = Signal(int, int, bool)
+    failed = Signal(str)
+
+    def __init__(
+        self,
+        repo: Repository,
+        config: AppConfig,
+        requests: list[OfferInput],
+        *,
+        force_refresh: bool = False,
+    ) -> None:
+        super().__init__()
+        self._repo = repo
+        self._config = config
+        self._requests = requests
+        self._force_refresh = force_refresh
+        self._token = CancelToken()
+
+    def cancel(self) -> None:
+        self._token.cancel()
+
+    def run(self) -> None:
+        try:
+            result = batch_refresh_offers(
+                self._repo,
+                self._requests,
+                config=self._config,
+                force_refresh=self._force_refresh,
+                progress=self._emit_progress,
+                token=self._token,
+            )
+            self.finished.emit(result.completed, result.offers, result.cancelled)
+        except Exception as exc:  # pragma: no cover - runtime errors
+            self.failed.emit(str(exc))
+        finally:
+            self._repo.release_reader()
+
+    def _emit_progress(self, progress: BatchProgress) -> None:
+        self.progress.emit(progress.done, progress.total)
+
+
+class CompactWorker(QObject):
+    finished = Signal(int, int)
+    failed = Signal(str)
+
+    def __init__(self, repo: Repository, config: AppConfig) -> None:
+        super().__init__()
+        self._repo = repo
+        self._config = config
+
+    def run(self) -> None:
+        try:
+            result = compact_database(self._repo, config=self._config)
+            self.finished.emit(result.removed, result.freed_pages)
         except Exception as exc:  # pragma: no cover - runtime errors
             self.failed.emit(str(exc))
+        finally:
+            self._repo.release_reader()
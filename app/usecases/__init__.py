@@ -1,6 +1,8 @@
 """Use case package."""
 
-from .calc_profit import ProfitResult, calc_profit
+from .batch_refresh import BatchProgress, BatchRefreshResult, batch_refresh_offers
+from .calc_profit import ProfitBatch, ProfitResult, calc_profit, calc_profit_batch
+from .compact_db import CompactResult, compact_database
 from .csv_io import (
     export_calculations,
     export_items,
@@ -8,12 +10,28 @@ from .csv_io import (
     export_offers,
     import_items,
 )
-from .estimate_shipping import ShippingEstimate, ShippingInput, estimate_shipping
+from .estimate_shipping import (
+    ShippingEstimate,
+    ShippingInput,
+    ShippingRuleIndex,
+    cheapest_shipping_batch,
+    estimate_shipping,
+    refresh_item_shipping,
+    shipping_rule_index,
+)
+from .rate_tables import ZoneRates, import_rate_tables, load_zone_rates
 from .refresh_offers import OfferInput, refresh_offers
 
 __all__ = [
+    "BatchProgress",
+    "BatchRefreshResult",
+    "batch_refresh_offers",
+    "ProfitBatch",
     "ProfitResult",
     "calc_profit",
+    "calc_profit_batch",
+    "CompactResult",
+    "compact_database",
     "export_calculations",
     "export_items",
     "export_market_refs",
@@ -21,7 +39,14 @@ __all__ = [
     "import_items",
     "ShippingEstimate",
     "ShippingInput",
+    "ShippingRuleIndex",
+    "cheapest_shipping_batch",
     "estimate_shipping",
+    "refresh_item_shipping",
+    "shipping_rule_index",
+    "ZoneRates",
+    "import_rate_tables",
+    "load_zone_rates",
     "OfferInput",
     "refresh_offers",
 ]
@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+
+def require_numpy():
+    # numpy is optional; only the batch and array code paths need it.
+    try:
+        import numpy  # type: ignore
+    except Exception as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError("numpy is not installed") from exc
+    return numpy
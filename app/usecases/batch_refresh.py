@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import itertools
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+
+from app.infra.cancellation import CancelToken
+from app.infra.config import AppConfig, get_config
+from app.infra.db.repo import Repository
+from app.usecases.refresh_offers import (
+    OfferInput,
+    RefreshPlan,
+    SourceFetcher,
+    complete_refresh,
+    plan_refresh,
+)
+
+
+@dataclass(frozen=True)
+class BatchProgress:
+    done: int
+    total: int
+    item_id: int
+    offers: int
+
+
+@dataclass(frozen=True)
+class BatchRefreshResult:
+    total: int
+    completed: int
+    offers: int
+    cancelled: bool
+
+
+@dataclass
+class _InFlight:
+    plan: RefreshPlan
+    remaining: int
+    results: dict[str, list[dict]] = field(default_factory=dict)
+
+
+def batch_refresh_offers(
+    repo: Repository,
+    requests: Iterable[OfferInput],
+    *,
+    config: AppConfig | None = None,
+    force_refresh: bool = False,
+    max_in_flight: int = 4,
+    chunk_size: int = 50,
+    timeouts: dict[str, float] | None = None,
+    progress: Callable[[BatchProgress], None] | None = None,
+    token: CancelToken | None = None,
+) -> BatchRefreshResult:
+    # Several items are kept in flight so one item's slow source does not stall
+    # the others; the per-host token buckets keep every provider within quota.
+    config = config or get_config()
+    queue = deque(requests)
+    total = len(queue)
+    source_ids = dict(repo.list_sources())
+    fetcher = SourceFetcher(timeouts, token)
+    tags = itertools.count()
+    in_flight: dict[int, _InFlight] = {}
+    buffer: list[dict] = []
+    done = 0
+    offers_total = 0
+
+    def finish(entry: _InFlight) -> None:
+        nonlocal done, offers_total
+        offers, count = complete_refresh(repo, entry.plan, entry.results, config)
+        buffer.extend(offers)
+        done += 1
+        offers_total += count
+        if len(buffer) >= chunk_size:
+            flush()
+        if progress:
+            progress(
+                BatchProgress(
+                    done=done,
+                    total=total,
+                    item_id=entry.plan.request.item_id,
+                    offers=count,
+                )
+            )
+
+    def flush() -> None:
+        if buffer:
+            repo.add_offers(list(buffer))
+            buffer.clear()
+
+    def start_next() -> None:
+        while queue and len(in_flight) < max(1, max_in_flight):
+            if token is not None and token.cancelled:
+                return
+            request = queue.popleft()
+            plan = plan_refresh(
+                repo,
+                request,
+                config,
+                force_refresh=force_refresh,
+                source_ids=source_ids,
+            )
+            stale = plan.stale
+            entry = _InFlight(plan=plan, remaining=len(stale))
+            if not stale:
+                finish(entry)
+                continue
+            tag = next(tags)
+            in_flight[tag] = entry
+            for name, module in stale:
+                fetcher.submit(
+                    tag, name, module, request.search_keyword, plan.options[name]
+                )
+
+    cancelled = False
+    start_next()
+    while in_flight:
+        completed = fetcher.wait()
+        if token is not None and token.cancelled:
+            fetcher.cancel()
+            in_flight.clear()
+            cancelled = True
+            break
+        for tag, name, raw in completed:
+            entry = in_flight[tag]
+            entry.remaining -= 1
+            if raw is not None:
+                entry.results[name] = raw
+            if entry.remaining == 0:
+                del in_flight[tag]
+                finish(entry)
+        start_next()
+
+    # Items that completed before a cancel are kept; in-flight ones are dropped.
+    flush()
+    repo.checkpoint()
+    return BatchRefreshResult(
+        total=total,
+        completed=done,
+        offers=offers_total,
+        cancelled=cancelled or done < total,
+    )
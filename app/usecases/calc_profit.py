@@ -1,6 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Any
+
+from app.usecases._numpy import require_numpy
 
 
 @dataclass(frozen=True)
@@ -46,3 +49,77 @@ def calc_profit(
         breakeven_price=breakeven,
         min_price_for_target=min_target,
     )
+
+
+@dataclass(frozen=True)
+class ProfitBatch:
+    # Arrays broadcast from the inputs; min_price_for_target is -1 where the
+    # scalar result would be None.
+    profit: Any
+    profit_rate: Any
+    breakeven_price: Any
+    min_price_for_target: Any
+
+    def at(self, index) -> ProfitResult:
+        min_target = int(self.min_price_for_target[index])
+        return ProfitResult(
+            profit=int(self.profit[index]),
+            profit_rate=float(self.profit_rate[index]),
+            breakeven_price=int(self.breakeven_price[index]),
+            min_price_for_target=None if min_target < 0 else min_target,
+        )
+
+
+def calc_profit_batch(
+    sale_price,
+    cost_price,
+    fee_rate,
+    shipping_cost,
+    packaging_cost,
+    other_cost=0,
+    target_profit=0,
+) -> ProfitBatch:
+    # Same arithmetic as calc_profit in float64/int64: np.rint rounds half to
+    # even like round(), np.trunc matches int(), so results agree exactly.
+    np = require_numpy()
+    sale, cost, shipping, packaging, other, target = (
+        np.asarray(value, dtype=np.int64)
+        for value in (
+            sale_price,
+            cost_price,
+            shipping_cost,
+            packaging_cost,
+            other_cost,
+            target_profit,
+        )
+    )
+    rate = np.asarray(fee_rate, dtype=np.float64)
+    sale, cost, shipping, packaging, other, target, rate = np.broadcast_arrays(
+        sale, cost, shipping, packaging, other, target, rate
+    )
+
+    sold = sale > 0
+    total_cost = cost + shipping + packaging + other
+    fee = np.rint(sale * rate).astype(np.int64)
+    profit = np.where(sold, sale - fee - total_cost, 0)
+    profit_rate = np.divide(
+        profit, sale, out=np.zeros(profit.shape, dtype=np.float64), where=sold
+    )
+
+    priced = sold & (rate < 1)
+    keep = np.where(priced, 1 - rate, 1.0)
+    breakeven = np.where(
+        priced, np.trunc(total_cost / keep + 0.9999), 0
+    ).astype(np.int64)
+    min_target = np.where(
+        priced & (target > 0),
+        np.trunc((total_cost + target) / keep + 0.9999),
+        -1,
+    ).astype(np.int64)
+
+    return ProfitBatch(
+        profit=profit,
+        profit_rate=profit_rate,
+        breakeven_price=breakeven,
+        min_price_for_target=min_target,
+    )
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from app.infra.config import AppConfig, get_config
+from app.infra.db.repo import Repository
+from app.infra.logger import setup_logging
+
+# Days to keep per table; 0 keeps everything. Calculations and market refs
+# are entered by hand, so they are only pruned when configured.
+DEFAULT_RETENTION_DAYS = {
+    "price_history": 30,
+    "offers": 365,
+    "calculations": 0,
+    "market_refs": 0,
+}
+
+
+@dataclass(frozen=True)
+class CompactResult:
+    price_history: int
+    offers: int
+    calculations: int
+    market_refs: int
+    freed_pages: int
+    archived: int = 0
+
+    @property
+    def removed(self) -> int:
+        return self.price_history + self.offers + self.calculations + self.market_refs
+
+
+def retention_days(config: AppConfig) -> dict[str, int]:
+    return {**DEFAULT_RETENTION_DAYS, **(config.retention_days or {})}
+
+
+def compact_database(
+    repo: Repository,
+    *,
+    config: AppConfig | None = None,
+    now: datetime | None = None,
+    vacuum_pages: int | None = None,
+) -> CompactResult:
+    config = config or get_config()
+    days = retention_days(config)
+    now = now or datetime.now(timezone.utc)
+
+    def cutoff(key: str) -> str | None:
+        value = days.get(key) or 0
+        if value <= 0:
+            return None
+        return (now - timedelta(days=value)).isoformat()
+
+    # Archiving runs first so nothing it would keep is pruned from the hot file.
+    archived = 0
+    if config.archive_after_days > 0:
+        moved = repo.archive_offers(
+            (now - timedelta(days=config.archive_after_days)).isoformat()
+        )
+        archived = moved.offers + moved.price_history
+
+    counts = {}
+    for key, prune in (
+        ("offers", repo.delete_stale_offers),
+        ("price_history", repo.downsample_price_history),
+        ("calculations", repo.delete_calculations_before),
+        ("market_refs", repo.delete_market_refs_before),
+    ):
+        before = cutoff(key)
+        counts[key] = prune(before) if before else 0
+
+    # Deleted rows leave free pages; hand them back, then shrink the WAL.
+    freed = repo.incremental_vacuum(vacuum_pages)
+    repo.checkpoint("TRUNCATE")
+    result = CompactResult(freed_pages=freed, archived=archived, **counts)
+    setup_logging().info(
+        "compacted database: archived=%d history=%d offers=%d calculations=%d "
+        "market_refs=%d freed_pages=%d",
+        result.archived,
+        result.price_history,
+        result.offers,
+        result.calculations,
+        result.market_refs,
+        result.freed_pages,
+    )
+    return result
@@ -8,9 +8,27 @@ from app.infra.db.repo import Calculation, Item, MarketRef, Offer, Repository
 
 def export_items(repo: Repository, path: Path | str) -> None:
     rows = repo.list_items()
+    shipping = {
+        summary.item_id: (summary.shipping_service, summary.shipping_cost)
+        for summary in repo.list_item_summaries()
+    }
     _write_csv(
         path,
-        ["id", "name", "search_keyword", "jan", "model_number", "category", "status"],
+        [
+            "id",
+            "name",
+            "search_keyword",
+            "jan",
+            "model_number",
+            "category",
+            "status",
+            "length",
+            "width",
+            "height",
+            "weight",
+            "shipping_service",
+            "shipping_cost",
+        ],
         [
             [
                 item.id,
@@ -20,6 +38,11 @@ def export_items(repo: Repository, path: Path | str) -> None:
                 item.model_number or "",
                 item.category or "",
                 item.status,
+                _blank(item.length),
+                _blank(item.width),
+                _blank(item.height),
+                _blank(item.weight),
+                *(_blank(value) for value in shipping.get(item.id, (None, None))),
             ]
             for item in rows
         ],
@@ -95,6 +118,10 @@ def import_items(repo: Repository, path: Path | str) -> int:
             category=row.get("category") or None,
             status=row.get("status") or "considering",
             notes=None,
+            length=_int_or_none(row.get("length")),
+            width=_int_or_none(row.get("width")),
+            height=_int_or_none(row.get("height")),
+            weight=_int_or_none(row.get("weight")),
         )
         count += 1
     return count
@@ -116,6 +143,19 @@ def _read_csv(path: Path | str) -> list[dict]:
         return list(reader)
 
 
+def _blank(value) -> object:
+    return "" if value is None else value
+
+
+def _int_or_none(value: str | None) -> int | None:
+    if value is None or not value.strip():
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
 def _offer_to_row(offer: Offer) -> tuple:
     return (
         offer.id,
@@ -1,8 +1,16 @@
 from __future__ import annotations
 
+import threading
+import weakref
 from dataclasses import dataclass
+from functools import lru_cache
 
-from app.infra.db.repo import ShippingRule
+from app.domain.shipping import PREFECTURES, prefecture_index
+from app.infra.db.repo import ItemPackage, Repository, ShippingRule
+from app.usecases._numpy import require_numpy
+from app.usecases.rate_tables import ZoneRates, load_zone_rates
+
+BATCH_CHUNK_ROWS = 65_536
 
 
 @dataclass(frozen=True)
@@ -12,6 +20,9 @@ class ShippingInput:
     height: int
     weight: int
     packaging_cost: int
+    # With both set, rules that have a zone rate table are priced from it.
+    origin: str | None = None
+    destination: str | None = None
 
 
 @dataclass(frozen=True)
@@ -21,26 +32,211 @@ class ShippingEstimate:
 
 
 def estimate_shipping(
-    rules: list[ShippingRule], data: ShippingInput
+    rules: list[ShippingRule],
+    data: ShippingInput,
+    zone_rates: dict[tuple[str, str], ZoneRates] | None = None,
 ) -> list[ShippingEstimate]:
-    candidates: list[ShippingEstimate] = []
-    for rule in rules:
-        if not _fits(rule, data):
-            continue
-        total = rule.price + data.packaging_cost
-        candidates.append(ShippingEstimate(rule=rule, total_cost=total))
-
-    candidates.sort(key=lambda x: x.total_cost)
-    return candidates
-
-
-def _fits(rule: ShippingRule, data: ShippingInput) -> bool:
-    if rule.max_l is not None and data.length > rule.max_l:
-        return False
-    if rule.max_w is not None and data.width > rule.max_w:
-        return False
-    if rule.max_h is not None and data.height > rule.max_h:
-        return False
-    if rule.max_weight is not None and data.weight > rule.max_weight:
-        return False
-    return True
+    return list(ShippingRuleIndex(rules, zone_rates=zone_rates).estimate(data))
+
+
+class ShippingRuleIndex:
+    def __init__(
+        self,
+        rules: list[ShippingRule],
+        *,
+        zone_rates: dict[tuple[str, str], ZoneRates] | None = None,
+        version: tuple[int, ...] = (),
+        memo_size: int = 1024,
+    ) -> None:
+        # Packaging is added to every rule alike, so ordering by price is the
+        # same as ordering by total cost; the sort is stable for equal prices.
+        self.version = version
+        self._zones = zone_rates or {}
+        self._rules = tuple(sorted(rules, key=lambda rule: rule.price))
+        self._limits = tuple(
+            (
+                _limit(rule.max_l),
+                _limit(rule.max_w),
+                _limit(rule.max_h),
+                _limit(rule.max_weight),
+            )
+            for rule in self._rules
+        )
+        self._estimate = lru_cache(maxsize=memo_size)(self._scan)
+
+    @property
+    def rules(self) -> tuple[ShippingRule, ...]:
+        return self._rules
+
+    @property
+    def limits(self) -> tuple[tuple[float, float, float, float], ...]:
+        # (length, width, height, weight) per rule, inf where unlimited.
+        return self._limits
+
+    def estimate(self, data: ShippingInput) -> tuple[ShippingEstimate, ...]:
+        return self._estimate(data)
+
+    def cheapest(self, data: ShippingInput) -> ShippingEstimate | None:
+        if self._zoned(data):
+            estimates = self._estimate(data)
+            return estimates[0] if estimates else None
+        # Rules are sorted by price, so the first fit is the cheapest.
+        for rule, limits in zip(self._rules, self._limits):
+            if _fits(limits, data):
+                return ShippingEstimate(
+                    rule=rule, total_cost=rule.price + data.packaging_cost
+                )
+        return None
+
+    def estimate_destinations(self, data: ShippingInput):
+        # Cheapest total to every prefecture from data.origin as one int64
+        # array indexed by prefecture (JIS code - 1); -1 where nothing fits.
+        np = require_numpy()
+        count = len(PREFECTURES)
+        best = np.full(count, np.iinfo(np.int64).max, dtype=np.int64)
+        origin = prefecture_index(data.origin) if data.origin else None
+        for rule, limits in zip(self._rules, self._limits):
+            if not _fits(limits, data):
+                continue
+            zones = self._zones.get((rule.carrier, rule.service_name))
+            if zones is None or origin is None:
+                best = np.minimum(best, rule.price + data.packaging_cost)
+                continue
+            band = zones.band_for(data.length, data.width, data.height, data.weight)
+            if band is None:
+                continue
+            rates = zones.rates[origin, :, band].astype(np.int64)
+            best = np.where(
+                rates >= 0, np.minimum(best, rates + data.packaging_cost), best
+            )
+        return np.where(best == np.iinfo(np.int64).max, -1, best)
+
+    def _zoned(self, data: ShippingInput) -> bool:
+        return bool(self._zones and data.origin and data.destination)
+
+    def _scan(self, data: ShippingInput) -> tuple[ShippingEstimate, ...]:
+        if not self._zoned(data):
+            return tuple(
+                ShippingEstimate(
+                    rule=rule, total_cost=rule.price + data.packaging_cost
+                )
+                for rule, limits in zip(self._rules, self._limits)
+                if _fits(limits, data)
+            )
+        # Zone prices break the price order, so fitting rules are re-sorted;
+        # a zoned service with no rate for the band or route is left out.
+        origin = prefecture_index(data.origin)
+        destination = prefecture_index(data.destination)
+        estimates = []
+        for rule, limits in zip(self._rules, self._limits):
+            if not _fits(limits, data):
+                continue
+            price = rule.price
+            zones = self._zones.get((rule.carrier, rule.service_name))
+            if zones is not None:
+                band = zones.band_for(
+                    data.length, data.width, data.height, data.weight
+                )
+                price = None if band is None else zones.rate(origin, destination, band)
+                if price is None:
+                    continue
+            estimates.append(
+                ShippingEstimate(rule=rule, total_cost=price + data.packaging_cost)
+            )
+        estimates.sort(key=lambda estimate: estimate.total_cost)
+        return tuple(estimates)
+
+
+_index_lock = threading.Lock()
+_indexes: weakref.WeakKeyDictionary[Repository, ShippingRuleIndex] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def shipping_rule_index(repo: Repository) -> ShippingRuleIndex:
+    # Rebuilt only after the shipping rules or rate tables are replaced.
+    version = (repo.shipping_rules_version, repo.rate_tables_version)
+    with _index_lock:
+        index = _indexes.get(repo)
+    if index is not None and index.version == version:
+        return index
+    index = ShippingRuleIndex(
+        repo.list_shipping_rules(),
+        zone_rates=load_zone_rates(repo),
+        version=version,
+    )
+    with _index_lock:
+        _indexes[repo] = index
+    return index
+
+
+def cheapest_shipping_batch(
+    index: ShippingRuleIndex, packages: list[ItemPackage], packaging_cost: int = 0
+):
+    # Every package is compared with every rule limit as one (items, rules, 4)
+    # array op; rules are price-sorted, so the first fitting column is the
+    # cheapest. Returns (rule position, total cost) arrays with -1 for none.
+    np = require_numpy()
+    count = len(packages)
+    positions = np.full(count, -1, dtype=np.int64)
+    totals = np.full(count, -1, dtype=np.int64)
+    if not count or not index.rules:
+        return positions, totals
+    limits = np.asarray(index.limits, dtype=np.float64)
+    prices = np.asarray([rule.price for rule in index.rules], dtype=np.int64)
+    sizes = np.asarray(
+        [
+            (package.length, package.width, package.height, package.weight)
+            for package in packages
+        ],
+        dtype=np.float64,
+    )
+    # Unset measurements fit any limit, as 0 does in the manual form.
+    sizes = np.nan_to_num(sizes, nan=0.0)
+    for start in range(0, count, BATCH_CHUNK_ROWS):
+        chunk = sizes[start : start + BATCH_CHUNK_ROWS]
+        fits = (chunk[:, None, :] <= limits[None, :, :]).all(axis=2)
+        first = fits.argmax(axis=1)
+        found = fits[np.arange(len(chunk)), first]
+        positions[start : start + len(chunk)] = np.where(found, first, -1)
+        totals[start : start + len(chunk)] = np.where(
+            found, prices[first] + packaging_cost, -1
+        )
+    return positions, totals
+
+
+def refresh_item_shipping(
+    repo: Repository,
+    *,
+    packaging_cost: int = 0,
+    item_ids: list[int] | None = None,
+) -> int:
+    # Writes the cheapest method per measured item into item_summary and
+    # returns how many items have one.
+    index = shipping_rule_index(repo)
+    packages = repo.list_item_packages(item_ids)
+    positions, totals = cheapest_shipping_batch(index, packages, packaging_cost)
+    rows = []
+    for package, position, total in zip(
+        packages, positions.tolist(), totals.tolist()
+    ):
+        if position < 0:
+            rows.append((package.item_id, None, None))
+        else:
+            rows.append((package.item_id, index.rules[position].service_name, total))
+    repo.update_item_shipping(rows)
+    return sum(1 for row in rows if row[1] is not None)
+
+
+def _limit(value: int | None) -> float:
+    return float("inf") if value is None else value
+
+
+def _fits(limits: tuple[float, float, float, float], data: ShippingInput) -> bool:
+    max_l, max_w, max_h, max_weight = limits
+    return (
+        data.length <= max_l
+        and data.width <= max_w
+        and data.height <= max_h
+        and data.weight <= max_weight
+    )
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.domain.shipping import (
+    PREFECTURES,
+    SIZE_BANDS,
+    SizeBand,
+    size_band_index,
+    zone_indexes,
+)
+from app.infra.db.repo import RateTable, Repository
+from app.usecases._numpy import require_numpy
+
+RATE_CSV_COLUMNS = ("carrier", "service_name", "origin", "destination")
+NO_RATE = -1
+NO_RATE_MARK = "-"
+
+
+@dataclass(frozen=True)
+class ZoneRates:
+    # rates is a read-only int32 array indexed [origin, destination, band]
+    # by prefecture index (JIS code - 1), with NO_RATE for missing cells.
+    carrier: str
+    service_name: str
+    bands: tuple[SizeBand, ...]
+    rates: object
+
+    def band_for(
+        self, length: int, width: int, height: int, weight: int
+    ) -> int | None:
+        return size_band_index(length, width, height, weight, self.bands)
+
+    def rate(self, origin: int, destination: int, band: int) -> int | None:
+        value = int(self.rates[origin, destination, band])
+        return None if value == NO_RATE else value
+
+
+def zone_rates_from_table(table: RateTable) -> ZoneRates:
+    np = require_numpy()
+    bands = _size_bands(table.band_sizes)
+    count = len(PREFECTURES)
+    # frombuffer keeps the blob as the array's memory; no copy is made.
+    rates = np.frombuffer(table.rates, dtype="<i4")
+    rates = rates.reshape(count, count, len(bands))
+    return ZoneRates(
+        carrier=table.carrier,
+        service_name=table.service_name,
+        bands=bands,
+        rates=rates,
+    )
+
+
+def load_zone_rates(repo: Repository) -> dict[tuple[str, str], ZoneRates]:
+    return {
+        (table.carrier, table.service_name): zone_rates_from_table(table)
+        for table in repo.list_rate_tables()
+    }
+
+
+def import_rate_tables(repo: Repository, path: Path | str) -> int:
+    # Columns: carrier, service_name, origin, destination, then one column
+    # per size band headed by its size ("60", "80", ...). Origin and
+    # destination are prefectures or region names (関東, 関西, ...). Later
+    # rows override earlier ones cell by cell: a blank cell keeps the rate
+    # already set, so prefecture rows can refine a region, and "-" marks a
+    # band the carrier does not serve on that route.
+    np = require_numpy()
+    with Path(path).open("r", newline="", encoding="utf-8-sig") as handle:
+        reader = csv.DictReader(handle)
+        headers = [name.strip() for name in reader.fieldnames or []]
+        missing = [name for name in RATE_CSV_COLUMNS if name not in headers]
+        if missing:
+            raise ValueError(
+                f"rate table CSV is missing columns: {', '.join(missing)}"
+            )
+        band_columns = sorted(
+            (int(name), name)
+            for name in headers
+            if name not in RATE_CSV_COLUMNS and name.isdigit()
+        )
+        if not band_columns:
+            raise ValueError("rate table CSV has no size band columns")
+        bands = _size_bands(size for size, _ in band_columns)
+        count = len(PREFECTURES)
+        tables: dict[tuple[str, str], object] = {}
+        for line, raw in enumerate(reader, start=2):
+            row = {
+                key.strip(): (value or "").strip()
+                for key, value in raw.items()
+                if isinstance(key, str)
+            }
+            key = (row["carrier"], row["service_name"])
+            if not all(key):
+                continue
+            try:
+                origins = zone_indexes(row["origin"])
+                destinations = zone_indexes(row["destination"])
+                cells = [
+                    (index, row[name])
+                    for index, (_, name) in enumerate(band_columns)
+                    if row[name]
+                ]
+                values = [
+                    NO_RATE if cell == NO_RATE_MARK else int(cell)
+                    for _, cell in cells
+                ]
+            except ValueError as exc:
+                raise ValueError(f"line {line}: {exc}") from exc
+            rates = tables.get(key)
+            if rates is None:
+                rates = np.full((count, count, len(bands)), NO_RATE, dtype="<i4")
+                tables[key] = rates
+            if cells:
+                columns = [index for index, _ in cells]
+                rates[np.ix_(origins, destinations, columns)] = values
+    for (carrier, service_name), rates in tables.items():
+        repo.save_rate_table(
+            carrier, service_name, [band.size for band in bands], rates.tobytes()
+        )
+    return len(tables)
+
+
+def _size_bands(sizes) -> tuple[SizeBand, ...]:
+    known = {band.size: band for band in SIZE_BANDS}
+    bands = []
+    for size in sizes:
+        if size not in known:
+            raise ValueError(f"unknown size band: {size}")
+        bands.append(known[size])
+    return tuple(bands)
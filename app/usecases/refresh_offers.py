@@ -1,46 +1,317 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+import time
+import unicodedata
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from types import ModuleType
+from typing import Any, Callable, Hashable
 
-from app.infra.db.repo import Repository
+from app.infra.cancellation import CancelToken, OperationCancelled
+from app.infra.db.repo import CachedSearch, Repository
 from app.infra.clients import amazon_paapi, rakuten, tavily, yahoo
+from app.infra.clients.http_client import submit_coroutine
+from app.infra.config import AppConfig, get_config
 from app.infra.logger import setup_logging
 
 
+DEFAULT_SOURCE_TIMEOUT = 20.0
+SOURCE_TIMEOUTS = {
+    "tavily": 40.0,
+}
+
+DEFAULT_CACHE_TTL = 600.0
+SEARCH_CACHE_TTLS = {
+    "amazon": 1800.0,
+    "tavily": 3600.0,
+}
+
+_SOURCES = (
+    ("rakuten", rakuten),
+    ("yahoo", yahoo),
+    ("amazon", amazon_paapi),
+    ("tavily", tavily),
+)
+
+
 @dataclass(frozen=True)
 class OfferInput:
     item_id: int
     search_keyword: str
 
 
-def refresh_offers(repo: Repository, request: OfferInput) -> int:
-    logger = setup_logging()
-    sources = dict(repo.list_sources())
-    fetched_at = datetime.now(timezone.utc).isoformat()
+@dataclass
+class RefreshPlan:
+    request: OfferInput
+    fetched_at: str
+    source_ids: dict[str, int]
+    options: dict[str, dict[str, Any]]
+    cache_keys: dict[str, str]
+    cached: dict[str, CachedSearch] = field(default_factory=dict)
+
+    @property
+    def stale(self) -> list[tuple[str, ModuleType]]:
+        return [(name, module) for name, module in _SOURCES if name not in self.cached]
+
+    def normalize(
+        self, name: str, raw: list[dict], fetched_at: str | None = None
+    ) -> list[dict]:
+        return _normalize_offers(
+            raw,
+            self.request.item_id,
+            self.source_ids.get(name),
+            fetched_at or self.fetched_at,
+        )
+
+
+class SourceFetcher:
+    def __init__(
+        self,
+        timeouts: dict[str, float] | None = None,
+        token: CancelToken | None = None,
+    ) -> None:
+        self._timeouts = timeouts or {}
+        self._token = token
+        self._pending: dict[Future, tuple[Hashable, str, float, float]] = {}
+        self._unregister: dict[Future, Callable[[], None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(
+        self,
+        tag: Hashable,
+        name: str,
+        module: ModuleType,
+        keyword: str,
+        options: dict[str, Any],
+    ) -> None:
+        timeout = self._timeouts.get(
+            name, SOURCE_TIMEOUTS.get(name, DEFAULT_SOURCE_TIMEOUT)
+        )
+        future = submit_coroutine(module.search_offers_async(keyword, **options))
+        self._pending[future] = (tag, name, time.monotonic() + timeout, timeout)
+        if self._token is not None:
+            # Cancelling the token wakes wait() by cancelling the future.
+            self._unregister[future] = self._token.register(future.cancel)
+
+    def wait(
+        self, max_wait: float | None = None
+    ) -> list[tuple[Hashable, str, list[dict] | None]]:
+        # Returns every source that finished, failed or timed out; failures
+        # and timeouts are logged and reported with a None result.
+        if not self._pending:
+            return []
+        logger = setup_logging()
+        nearest = min(deadline for _, _, deadline, _ in self._pending.values())
+        timeout = max(0.0, nearest - time.monotonic())
+        if max_wait is not None:
+            timeout = min(timeout, max_wait)
+        done, _ = wait(self._pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        completed: list[tuple[Hashable, str, list[dict] | None]] = []
+        for future in done:
+            tag, name, _, _ = self._pop(future)
+            if future.cancelled():
+                completed.append((tag, name, None))
+                continue
+            try:
+                completed.append((tag, name, future.result()))
+            except Exception as exc:  # pragma: no cover - network path
+                logger.warning("offer refresh failed: %s (%s)", name, exc)
+                completed.append((tag, name, None))
+
+        now = time.monotonic()
+        for future, (tag, name, deadline, timeout) in list(self._pending.items()):
+            if deadline <= now:
+                self._pop(future)
+                # Cancelling the future cancels the request task on the shared loop.
+                future.cancel()
+                logger.warning("offer refresh timed out: %s (%.1fs)", name, timeout)
+                completed.append((tag, name, None))
+        return completed
+
+    def cancel(self) -> None:
+        for future in list(self._pending):
+            self._pop(future)
+            future.cancel()
+
+    def _pop(self, future: Future) -> tuple[Hashable, str, float, float]:
+        unregister = self._unregister.pop(future, None)
+        if unregister is not None:
+            unregister()
+        return self._pending.pop(future)
+
+
+def refresh_offers(
+    repo: Repository,
+    request: OfferInput,
+    *,
+    concurrent: bool = True,
+    timeouts: dict[str, float] | None = None,
+    force_refresh: bool = False,
+    config: AppConfig | None = None,
+    on_source: Callable[[str, list[dict]], None] | None = None,
+    token: CancelToken | None = None,
+) -> int:
+    # on_source receives each source's normalized offers as soon as they are
+    # available, before anything is written. A cancelled token raises
+    # OperationCancelled and nothing from this refresh is written.
+    config = config or get_config()
+    if token is not None:
+        token.raise_if_cancelled()
+    plan = plan_refresh(repo, request, config, force_refresh=force_refresh)
+    if on_source:
+        for name, hit in plan.cached.items():
+            on_source(name, plan.normalize(name, hit.payload, hit.fetched_at))
+    if concurrent:
+        results = _fetch_concurrent(plan, timeouts, on_source, token)
+    else:
+        results = _fetch_serial(plan, on_source, token)
+    if token is not None:
+        token.raise_if_cancelled()
+    offers, count = complete_refresh(repo, plan, results, config)
+    repo.add_offers(offers)
+    return count
+
+
+def plan_refresh(
+    repo: Repository,
+    request: OfferInput,
+    config: AppConfig,
+    *,
+    force_refresh: bool = False,
+    source_ids: dict[str, int] | None = None,
+) -> RefreshPlan:
+    options = {name: _source_options(name, config) for name, _ in _SOURCES}
+    if source_ids is None:
+        source_ids = dict(repo.list_sources())
+    plan = RefreshPlan(
+        request=request,
+        fetched_at=datetime.now(timezone.utc).isoformat(),
+        source_ids=source_ids,
+        options=options,
+        cache_keys={
+            name: _cache_key(request.search_keyword, module, options[name])
+            for name, module in _SOURCES
+        },
+    )
+    if force_refresh:
+        return plan
+
+    ttls = config.search_cache_ttls
+    for name, _ in _SOURCES:
+        ttl = ttls.get(name, SEARCH_CACHE_TTLS.get(name, DEFAULT_CACHE_TTL))
+        if ttl <= 0:
+            continue
+        hit = repo.get_search_cache(name, plan.cache_keys[name], ttl)
+        if hit is not None:
+            plan.cached[name] = hit
+    return plan
+
 
+def complete_refresh(
+    repo: Repository,
+    plan: RefreshPlan,
+    results: dict[str, list[dict]],
+    config: AppConfig,
+) -> tuple[list[dict], int]:
+    request = plan.request
+    for name, raw in results.items():
+        # Empty results are not cached so a newly configured API key takes effect.
+        if raw:
+            repo.put_search_cache(
+                name,
+                plan.cache_keys[name],
+                raw,
+                plan.fetched_at,
+                config.search_cache_max_entries,
+            )
+
+    count = 0
     offers = []
-    for name, func in [
-        ("rakuten", rakuten.search_offers),
-        ("yahoo", yahoo.search_offers),
-        ("amazon", amazon_paapi.search_offers),
-        ("tavily", tavily.search_offers),
-    ]:
+    for name, _ in _SOURCES:
+        source_id = plan.source_ids.get(name)
+        if name in plan.cached:
+            hit = plan.cached[name]
+            raw, source_fetched_at = hit.payload, hit.fetched_at
+        else:
+            raw, source_fetched_at = results.get(name), plan.fetched_at
+        if not raw:
+            continue
+        normalized = plan.normalize(name, raw, source_fetched_at)
+        count += len(normalized)
+        if name in plan.cached:
+            last = repo.last_offer_fetched_at(request.item_id, source_id)
+            if last is not None and last >= source_fetched_at:
+                # This item already stored the cached result.
+                continue
+        offers.extend(normalized)
+    return offers, count
+
+
+def _source_options(name: str, config: AppConfig) -> dict[str, Any]:
+    if name == "amazon":
+        return {"locale": config.amazon_locale}
+    return {}
+
+
+def _cache_key(keyword: str, module: ModuleType, options: dict[str, Any]) -> str:
+    query = " ".join(unicodedata.normalize("NFKC", keyword).split()).casefold()
+    params = {**getattr(module, "SEARCH_PARAMS", {}), **options}
+    return json.dumps([query, params], sort_keys=True, ensure_ascii=False)
+
+
+def _fetch_serial(
+    plan: RefreshPlan,
+    on_source: Callable[[str, list[dict]], None] | None = None,
+    token: CancelToken | None = None,
+) -> dict[str, list[dict]]:
+    logger = setup_logging()
+    results: dict[str, list[dict]] = {}
+    for name, module in plan.stale:
         try:
-            raw = func(request.search_keyword)
-            offers.extend(
-                _normalize_offers(
-                    raw,
-                    request.item_id,
-                    sources.get(name),
-                    fetched_at,
-                )
+            raw = module.search_offers(
+                plan.request.search_keyword, token=token, **plan.options[name]
             )
+        except OperationCancelled:
+            raise
         except Exception as exc:  # pragma: no cover - network path
             logger.warning("offer refresh failed: %s (%s)", name, exc)
+            continue
+        results[name] = raw
+        if on_source and raw:
+            on_source(name, plan.normalize(name, raw))
+    return results
 
-    repo.add_offers(offers)
-    return len(offers)
+
+def _fetch_concurrent(
+    plan: RefreshPlan,
+    timeouts: dict[str, float] | None,
+    on_source: Callable[[str, list[dict]], None] | None = None,
+    token: CancelToken | None = None,
+) -> dict[str, list[dict]]:
+    fetcher = SourceFetcher(timeouts, token)
+    for name, module in plan.stale:
+        fetcher.submit(
+            None, name, module, plan.request.search_keyword, plan.options[name]
+        )
+
+    results: dict[str, list[dict]] = {}
+    while fetcher:
+        completed = fetcher.wait()
+        if token is not None and token.cancelled:
+            fetcher.cancel()
+            raise OperationCancelled()
+        for _, name, raw in completed:
+            if raw is None:
+                continue
+            results[name] = raw
+            if on_source and raw:
+                on_source(name, plan.normalize(name, raw))
+    return results
 
 
 def _normalize_offers(
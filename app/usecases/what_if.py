@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+from app.usecases.calc_profit import ProfitBatch, calc_profit_batch
+
+
+@dataclass(frozen=True)
+class ProfitGrid:
+    # Result arrays are indexed [shipping, fee_rate, sale_price].
+    sale_prices: tuple[int, ...]
+    fee_rates: tuple[float, ...]
+    shipping_costs: tuple[int, ...]
+    batch: ProfitBatch
+
+    @property
+    def profit(self):
+        return self.batch.profit
+
+
+def sale_price_steps(
+    low: int, high: int, step: int = 100, max_steps: int = 60
+) -> tuple[int, ...]:
+    # Widens the step in multiples of `step` so long ranges stay readable.
+    low, high = max(0, low), max(0, high)
+    if high < low:
+        low, high = high, low
+    count = (high - low) // step + 1
+    if count > max_steps:
+        step *= -(-count // max_steps)
+    prices = tuple(range(low, high + 1, step))
+    if prices and prices[-1] != high:
+        prices += (high,)
+    return prices
+
+
+def profit_grid(
+    sale_prices,
+    fee_rates,
+    shipping_costs,
+    cost_price: int,
+    packaging_cost: int,
+    other_cost: int = 0,
+    target_profit: int = 0,
+) -> ProfitGrid:
+    return _profit_grid(
+        tuple(int(value) for value in sale_prices),
+        tuple(float(value) for value in fee_rates),
+        tuple(int(value) for value in shipping_costs),
+        int(cost_price),
+        int(packaging_cost),
+        int(other_cost),
+        int(target_profit),
+    )
+
+
+@lru_cache(maxsize=64)
+def _profit_grid(
+    sale_prices: tuple[int, ...],
+    fee_rates: tuple[float, ...],
+    shipping_costs: tuple[int, ...],
+    cost_price: int,
+    packaging_cost: int,
+    other_cost: int,
+    target_profit: int,
+) -> ProfitGrid:
+    # The nested lists broadcast to (shipping, fee_rate, sale_price) in one
+    # calc_profit_batch call; cached arrays are frozen since they are shared.
+    batch = calc_profit_batch(
+        [[list(sale_prices)]],
+        cost_price,
+        [[rate] for rate in fee_rates],
+        [[[cost]] for cost in shipping_costs],
+        packaging_cost,
+        other_cost,
+        target_profit,
+    )
+    for array in (
+        batch.profit,
+        batch.profit_rate,
+        batch.breakeven_price,
+        batch.min_price_for_target,
+    ):
+        array.flags.writeable = False
+    return ProfitGrid(
+        sale_prices=sale_prices,
+        fee_rates=fee_rates,
+        shipping_costs=shipping_costs,
+        batch=batch,
+    )
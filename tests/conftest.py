@@ -4,3 +4,14 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+import pytest
+
+from app.infra.logger import setup_logging
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _isolated_log(tmp_path_factory):
+    # The app logger is configured once per process; pointing it at a temp
+    # file first keeps test runs out of the tracked logs/app.log.
+    setup_logging(tmp_path_factory.mktemp("logs") / "app.log")
@@ -0,0 +1,65 @@
+import datetime
+import hashlib
+import hmac
+
+from app.infra.clients import amazon_paapi
+from app.infra.clients.amazon_paapi import SigV4Signer
+
+
+def _signer():
+    return SigV4Signer(
+        access_key="AKID",
+        secret_key="secret",
+        host="webservices.amazon.co.jp",
+        region="us-west-2",
+        service="ProductAdvertisingAPI",
+        amz_target="com.amazon.paapi5.v1.ProductAdvertisingAPIv1.SearchItems",
+    )
+
+
+def test_signer_matches_reference_signature():
+    body = amazon_paapi._encode_payload({"Keywords": "カメラ", "ItemCount": 10})
+    now = datetime.datetime(2026, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+    headers = _signer().sign(body, now=now)
+
+    canonical_request = (
+        "POST\n/paapi5/searchitems\n\n"
+        "content-encoding:amz-1.0\n"
+        "content-type:application/json; charset=utf-8\n"
+        "host:webservices.amazon.co.jp\n"
+        "x-amz-date:20260102T030405Z\n"
+        "x-amz-target:com.amazon.paapi5.v1.ProductAdvertisingAPIv1.SearchItems\n\n"
+        "content-encoding;content-type;host;x-amz-date;x-amz-target\n"
+        + hashlib.sha256(body).hexdigest()
+    )
+    string_to_sign = (
+        "AWS4-HMAC-SHA256\n20260102T030405Z\n"
+        "20260102/us-west-2/ProductAdvertisingAPI/aws4_request\n"
+        + hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+    )
+    key = amazon_paapi._get_signature_key(
+        "secret", "20260102", "us-west-2", "ProductAdvertisingAPI"
+    )
+    expected = hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    assert headers["X-Amz-Date"] == "20260102T030405Z"
+    assert headers["Authorization"].endswith(f"Signature={expected}")
+    assert b"\\u30ab" in body
+
+
+def test_signer_derives_signing_key_once_per_day(monkeypatch):
+    calls = []
+    original = amazon_paapi._get_signature_key
+
+    def counting(*args):
+        calls.append(args[1])
+        return original(*args)
+
+    monkeypatch.setattr(amazon_paapi, "_get_signature_key", counting)
+    signer = _signer()
+    day = datetime.datetime(2026, 1, 2, tzinfo=datetime.timezone.utc)
+    for minute in range(3):
+        signer.sign(b"{}", now=day + datetime.timedelta(minutes=minute))
+    signer.sign(b"{}", now=day + datetime.timedelta(days=1))
+
+    assert calls == ["20260102", "20260103"]
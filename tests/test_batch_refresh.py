@@ -0,0 +1,77 @@
+import asyncio
+import subprocess
+import sys
+
+from app.infra.cancellation import CancelToken
+from app.infra.clients import amazon_paapi, rakuten, tavily, yahoo
+from app.infra.config import AppConfig
+from app.infra.db import Repository, init_db
+from app.usecases.batch_refresh import batch_refresh_offers
+from app.usecases.refresh_offers import OfferInput
+
+
+def _patch_sources(monkeypatch, search):
+    async def empty(keyword, **kwargs):
+        return []
+
+    monkeypatch.setattr(rakuten, "search_offers_async", search)
+    monkeypatch.setattr(yahoo, "search_offers_async", empty)
+    monkeypatch.setattr(amazon_paapi, "search_offers_async", empty)
+    monkeypatch.setattr(tavily, "search_offers_async", empty)
+
+
+def test_batch_refresh_reports_progress_and_writes_in_chunks(tmp_path, monkeypatch):
+    repo = Repository(init_db(tmp_path / "app.db"))
+    item_ids = [repo.create_item(name=f"n{i}", search_keyword=f"kw{i}") for i in range(5)]
+
+    async def search(keyword, **kwargs):
+        await asyncio.sleep(0.01)
+        return [{"title": keyword, "price": 1000, "shipping": 0, "url": keyword}]
+
+    _patch_sources(monkeypatch, search)
+    seen = []
+    result = batch_refresh_offers(
+        repo,
+        [OfferInput(item_id=i, search_keyword=f"kw{n}") for n, i in enumerate(item_ids)],
+        config=AppConfig(),
+        chunk_size=2,
+        progress=seen.append,
+    )
+
+    assert result.completed == 5
+    assert result.offers == 5
+    assert not result.cancelled
+    assert [p.done for p in seen] == [1, 2, 3, 4, 5]
+    assert all(len(repo.list_offers(i)) == 1 for i in item_ids)
+
+
+def test_batch_refresh_stops_when_cancelled(tmp_path, monkeypatch):
+    repo = Repository(init_db(tmp_path / "app.db"))
+    item_ids = [repo.create_item(name=f"n{i}", search_keyword=f"kw{i}") for i in range(6)]
+    token = CancelToken()
+
+    async def search(keyword, **kwargs):
+        await asyncio.sleep(0.05)
+        return [{"title": keyword, "price": 1000, "url": keyword}]
+
+    _patch_sources(monkeypatch, search)
+    result = batch_refresh_offers(
+        repo,
+        [OfferInput(item_id=i, search_keyword=f"kw{n}") for n, i in enumerate(item_ids)],
+        config=AppConfig(),
+        max_in_flight=1,
+        progress=lambda p: token.cancel() if p.done == 2 else None,
+        token=token,
+    )
+
+    assert result.cancelled
+    assert result.completed == 2
+    assert sum(len(repo.list_offers(i)) for i in item_ids) == 2
+
+
+def test_cli_does_not_import_qt():
+    code = "import sys, app.cli; print('PySide6' in sys.modules)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert output.stdout.strip() == "False"
@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+
+from app.infra.config import AppConfig
+from app.infra.db import Repository, init_db
+from app.usecases.compact_db import compact_database
+
+
+def _observe(repo, item_id, url, fetched_at, price):
+    repo.add_offers(
+        [
+            {
+                "item_id": item_id,
+                "source_id": 1,
+                "title": url,
+                "price": price,
+                "total": price,
+                "url": url,
+                "fetched_at": fetched_at,
+            }
+        ]
+    )
+
+
+def test_compact_database_applies_retention(tmp_path):
+    conn = init_db(tmp_path / "app.db")
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    repo = Repository(conn)
+    item_id = repo.create_item(name="n1", search_keyword="kw1")
+
+    for stamp, price in (
+        ("2026-01-01T01:00", 1000),
+        ("2026-01-01T02:00", 800),
+        ("2026-01-01T03:00", 900),
+        ("2026-01-02T01:00", 950),
+        ("2026-03-01T01:00", 700),
+        ("2026-03-01T02:00", 750),
+    ):
+        _observe(repo, item_id, "https://example.test/live", stamp, price)
+    _observe(repo, item_id, "https://example.test/gone", "2025-01-01T00:00", 500)
+    live = next(o for o in repo.list_offers(item_id) if o.url.endswith("live"))
+    gone = next(o for o in repo.list_offers(item_id) if o.url.endswith("gone"))
+    repo.add_calculation(
+        item_id=item_id,
+        offer_id=gone.id,
+        sale_price=1000,
+        fee_rate=0.1,
+        shipping_cost=0,
+        packaging_cost=0,
+        other_cost=0,
+        cost_price=500,
+        profit=400,
+        profit_rate=0.4,
+        breakeven_price=556,
+        target_profit=0,
+        min_price_for_target=None,
+    )
+
+    result = compact_database(
+        repo,
+        config=AppConfig(retention_days={"price_history": 30, "offers": 180}),
+        now=datetime(2026, 3, 2, tzinfo=timezone.utc),
+    )
+
+    assert result.offers == 1
+    assert result.price_history == 2
+    assert [o.id for o in repo.list_offers(item_id)] == [live.id]
+    assert [(p.fetched_at, p.price) for p in repo.list_price_history(live.id)] == [
+        ("2026-01-01T02:00", 800),
+        ("2026-01-02T01:00", 950),
+        ("2026-03-01T01:00", 700),
+        ("2026-03-01T02:00", 750),
+    ]
+    assert repo.list_price_history(gone.id) == []
+    assert repo.list_calculations(item_id)[0].offer_id is None
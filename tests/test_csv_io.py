@@ -8,8 +8,8 @@ def test_import_export_items_csv(tmp_path):
 
     csv_path = tmp_path / "items.csv"
     csv_path.write_text(
-        "id,name,search_keyword,jan,model_number,category,status\n"
-        "1,Item One,keyword1,,,,considering\n",
+        "id,name,search_keyword,jan,model_number,category,status,length,weight\n"
+        "1,Item One,keyword1,,,,considering,25,900\n",
         encoding="utf-8",
     )
     imported = import_items(repo, csv_path)
@@ -19,3 +19,5 @@ def test_import_export_items_csv(tmp_path):
     export_items(repo, out_path)
     content = out_path.read_text(encoding="utf-8")
     assert "keyword1" in content
+    assert repo.list_items()[0].length == 25
+    assert "length,width,height,weight,shipping_service,shipping_cost" in content
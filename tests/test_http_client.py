@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.infra.cancellation import CancelToken, OperationCancelled
+from app.infra.clients import rakuten
+from app.infra.clients.http_client import AsyncHttpClient, RetryPolicy, run_coroutine
+
+
+def test_async_client_retries_and_reuses_connection_pool():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.host)
+        if len(calls) == 1:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"ok": True})
+
+    async def scenario():
+        client = AsyncHttpClient(
+            retry_policy=RetryPolicy(max_retries=2, base_delay=0.0),
+            min_interval=0.0,
+            transport=httpx.MockTransport(handler),
+        )
+        try:
+            first = await client.get("https://example.test/a")
+            second = await client.get("https://example.test/b")
+        finally:
+            await client.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first.json() == {"ok": True}
+    assert second.status_code == 200
+    assert calls == ["example.test"] * 3
+
+
+def test_cancel_token_aborts_retry_backoff():
+    client = AsyncHttpClient(
+        retry_policy=RetryPolicy(max_retries=3, base_delay=5.0, max_delay=5.0),
+        min_interval=0.0,
+        transport=httpx.MockTransport(lambda request: httpx.Response(503)),
+    )
+    token = CancelToken()
+    threading.Timer(0.1, token.cancel).start()
+
+    started = time.monotonic()
+    with pytest.raises(OperationCancelled):
+        run_coroutine(client.get("https://cancel.test/a"), token=token)
+    assert time.monotonic() - started < 1.0
+    run_coroutine(client.aclose())
+
+
+def test_source_credentials_are_read_off_the_event_loop(monkeypatch):
+    def slow_secret(key):
+        time.sleep(0.3)
+        return None
+
+    monkeypatch.setattr(rakuten, "_get_secret_safe", slow_secret)
+
+    async def probe():
+        started = time.monotonic()
+        await asyncio.sleep(0.01)
+        return time.monotonic() - started
+
+    async def scenario():
+        return await asyncio.gather(rakuten.search_offers_async("kw"), probe())
+
+    offers, lag = asyncio.run(scenario())
+    assert offers == []
+    assert lag < 0.2
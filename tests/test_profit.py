@@ -1,4 +1,6 @@
-from app.usecases.calc_profit import calc_profit
+import pytest
+
+from app.usecases.calc_profit import calc_profit, calc_profit_batch
 
 
 def test_calc_profit_basic():
@@ -26,3 +28,42 @@ def test_calc_profit_zero_sale():
     )
     assert result.profit == 0
     assert result.profit_rate == 0.0
+
+
+def test_calc_profit_batch_matches_scalar_rounding():
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(7)
+    n = 5000
+    sale = rng.integers(-100, 50000, n)
+    sale[:6] = [0, 105, 115, 125, 1005, 2]
+    cost = rng.integers(0, 30000, n)
+    fee = rng.choice([0.0, 0.05, 0.1, 0.1275, 0.5, 1.0, 1.2], n)
+    shipping = rng.integers(0, 2000, n)
+    packaging = rng.integers(0, 300, n)
+    other = rng.integers(0, 500, n)
+    target = rng.choice([0, 500, 2000], n)
+
+    batch = calc_profit_batch(sale, cost, fee, shipping, packaging, other, target)
+
+    for i in range(n):
+        expected = calc_profit(
+            int(sale[i]),
+            int(cost[i]),
+            float(fee[i]),
+            int(shipping[i]),
+            int(packaging[i]),
+            int(other[i]),
+            int(target[i]),
+        )
+        assert batch.at(i) == expected
+
+
+def test_calc_profit_batch_broadcasts_grids():
+    np = pytest.importorskip("numpy")
+
+    sale = np.arange(1000, 3001, 500)[:, None]
+    fee = np.array([0.1, 0.15])[None, :]
+    batch = calc_profit_batch(sale, 800, fee, 200, 50)
+    assert batch.profit.shape == (5, 2)
+    assert batch.at((0, 0)) == calc_profit(1000, 800, 0.1, 200, 50)
+    assert batch.at((4, 1)) == calc_profit(3000, 800, 0.15, 200, 50)
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.infra.clients.rate_limit import TokenBucket, get_rate_limiter
+
+
+def test_token_bucket_allows_burst_then_throttles():
+    bucket = TokenBucket(rate=20.0, burst=3)
+    started = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - started < 0.05
+
+    bucket.acquire()
+    assert time.monotonic() - started >= 0.04
+
+
+def test_token_bucket_is_shared_across_threads():
+    bucket = TokenBucket(rate=50.0, burst=1)
+    stamps = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(5):
+            bucket.acquire()
+            with lock:
+                stamps.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 20 acquisitions at 50/s with burst 1 need at least 19 intervals.
+    assert len(stamps) == 20
+    assert max(stamps) - started >= 19 / 50 - 0.02
+
+
+def test_rate_limiter_registry_returns_same_bucket_per_host():
+    first = get_rate_limiter("registry.test", min_interval=0.5)
+    second = get_rate_limiter("registry.test", min_interval=2.0)
+    assert first is second
+    assert first.limit.rate == 2.0
+
+
+def test_cancelled_async_wait_gives_back_its_slot():
+    bucket = TokenBucket(rate=5.0, burst=1)
+
+    async def scenario():
+        await bucket.acquire_async()
+        waiter = asyncio.create_task(bucket.acquire_async())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(scenario())
+    # Only the first acquisition still counts: the next caller waits about
+    # one interval (0.2s), not two.
+    started = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - started < 0.3
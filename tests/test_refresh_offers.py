@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from app.infra.cancellation import CancelToken, OperationCancelled
+from app.infra.clients import amazon_paapi, rakuten, tavily, yahoo
+from app.infra.config import AppConfig
+from app.infra.db import Repository, init_db
+from app.usecases.refresh_offers import OfferInput, refresh_offers
+
+
+def _fake_search(delay, offers=None, error=None):
+    async def search(keyword, **kwargs):
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return offers or []
+
+    return search
+
+
+def test_refresh_offers_runs_sources_concurrently(tmp_path, monkeypatch):
+    repo = Repository(init_db(tmp_path / "app.db"))
+    item_id = repo.create_item(name="n1", search_keyword="kw1")
+    offer = {"title": "t", "price": 1000, "shipping": 100, "url": "u"}
+    monkeypatch.setattr(rakuten, "search_offers_async", _fake_search(0.3, [offer]))
+    monkeypatch.setattr(yahoo, "search_offers_async", _fake_search(0.3, [offer]))
+    monkeypatch.setattr(amazon_paapi, "search_offers_async", _fake_search(0.3, [offer]))
+    monkeypatch.setattr(
+        tavily, "search_offers_async", _fake_search(0.3, error=RuntimeError("boom"))
+    )
+
+    started = time.monotonic()
+    count = refresh_offers(
+        repo,
+        OfferInput(item_id=item_id, search_keyword="kw1"),
+        config=AppConfig(),
+    )
+    elapsed = time.monotonic() - started
+
+    assert count == 3
+    assert elapsed < 0.9
+    offers = repo.list_offers(item_id)
+    assert len(offers) == 3
+    assert all(offer.total == 1100 for offer in offers)
+
+
+def test_refresh_offers_source_timeout_is_isolated(tmp_path, monkeypatch):
+    repo = Repository(init_db(tmp_path / "app.db"))
+    item_id = repo.create_item(name="n1", search_keyword="kw1")
+    offer = {"title": "t", "price": 500, "shipping": None, "url": "u"}
+    monkeypatch.setattr(rakuten, "search_offers_async", _fake_search(0.0, [offer]))
+    monkeypatch.setattr(yahoo, "search_offers_async", _fake_search(0.0))
+    monkeypatch.setattr(amazon_paapi, "search_offers_async", _fake_search(0.0))
+    monkeypatch.setattr(tavily, "search_offers_async", _fake_search(2.0, [offer]))
+
+    started = time.monotonic()
+    count = refresh_offers(
+        repo,
+        OfferInput(item_id=item_id, search_keyword="kw1"),
+        timeouts={"tavily": 0.2},
+        config=AppConfig(),
+    )
+    elapsed = time.monotonic() - started
+
+    assert count == 1
+    assert elapsed < 1.0
+
+
+def test_refresh_offers_serves_fresh_results_from_cache(tmp_path, monkeypatch):
+    repo = Repository(init_db(tmp_path / "app.db"))
+    item_id = repo.create_item(name="n1", search_keyword="kw1")
+    calls = []
+
+    async def counting_search(keyword, **kwargs):
+        calls.append(keyword)
+        return [{"title": "t", "price": 800, "shipping": 0, "url": "u"}]
+
+    monkeypatch.setattr(rakuten, "search_offers_async", counting_search)
+    monkeypatch.setattr(yahoo, "search_offers_async", _fake_search(0.0))
+    monkeypatch.setattr(amazon_paapi, "search_offers_async", _fake_search(0.0))
+    monkeypatch.setattr(tavily, "search_offers_async", _fake_search(0.0))
+
+    config = AppConfig()
+    request = OfferInput(item_id=item_id, search_keyword="kw1")
+    spaced = OfferInput(item_id=item_id, search_keyword=" KW1 ")
+    assert refresh_offers(repo, request, config=config) == 1
+    assert refresh_offers(repo, spaced, config=config) == 1
+    assert len(calls) == 1
+    assert len(repo.list_offers(item_id)) == 1
+
+    first = repo.list_offers(item_id)[0]
+    refresh_offers(repo, request, force_refresh=True, config=config)
+    assert len(calls) == 2
+    offers = repo.list_offers(item_id)
+    assert [offer.id for offer in offers] == [first.id]
+    assert offers[0].fetched_at > first.fetched_at
+
+
+def test_search_cache_evicts_least_recently_used(tmp_path):
+    repo = Repository(init_db(tmp_path / "app.db"))
+    now = datetime.now(timezone.utc).isoformat()
+    repo.put_search_cache("rakuten", "a", [{"price": 1}], now, max_entries=2)
+    repo.put_search_cache("rakuten", "b", [{"price": 2}], now, max_entries=2)
+    assert repo.get_search_cache("rakuten", "a", max_age=60) is not None
+    repo.put_search_cache("rakuten", "c", [{"price": 3}], now, max_entries=2)
+
+    assert repo.get_search_cache("rakuten", "a", max_age=60) is not None
+    assert repo.get_search_cache("rakuten", "b", max_age=60) is None
+    assert repo.get_search_cache("rakuten", "c", max_age=60).payload == [{"price": 3}]
+
+
+def test_refresh_offers_streams_each_source_as_it_completes(tmp_path, monkeypatch):
+    repo = Repository(init_db(tmp_path / "app.db"))
+    item_id = repo.create_item(name="n1", search_keyword="kw1")
+    fast = {"title": "fast", "price": 700, "shipping": 50, "url": "u1"}
+    slow = {"title": "slow", "price": 900, "shipping": None, "url": "u2"}
+    monkeypatch.setattr(rakuten, "search_offers_async", _fake_search(0.0, [fast]))
+    monkeypatch.setattr(yahoo, "search_offers_async", _fake_search(0.0))
+    monkeypatch.setattr(amazon_paapi, "search_offers_async", _fake_search(0.0))
+    monkeypatch.setattr(tavily, "search_offers_async", _fake_search(0.5, [slow]))
+
+    started = time.monotonic()
+    streamed = []
+
+    def on_source(name, offers):
+        streamed.append((name, offers, time.monotonic() - started))
+        assert repo.list_offers(item_id) == []
+
+    refresh_offers(
+        repo,
+        OfferInput(item_id=item_id, search_keyword="kw1"),
+        config=AppConfig(),
+        on_source=on_source,
+    )
+
+    assert [name for name, _, _ in streamed] == ["rakuten", "tavily"]
+    assert streamed[0][2] < 0.3
+    assert streamed[0][1][0]["total"] == 750
+    assert streamed[0][1][0]["item_id"] == item_id
+    assert len(repo.list_offers(item_id)) == 2
+
+
+def test_refresh_offers_cancel_discards_results(tmp_path, monkeypatch):
+    repo = Repository(init_db(tmp_path / "app.db"))
+    item_id = repo.create_item(name="n1", search_keyword="kw1")
+    offer = {"title": "t", "price": 500, "shipping": 0, "url": "u"}
+    monkeypatch.setattr(rakuten, "search_offers_async", _fake_search(0.0, [offer]))
+    monkeypatch.setattr(yahoo, "search_offers_async", _fake_search(5.0, [offer]))
+    monkeypatch.setattr(amazon_paapi, "search_offers_async", _fake_search(5.0))
+    monkeypatch.setattr(tavily, "search_offers_async", _fake_search(5.0))
+    token = CancelToken()
+    threading.Timer(0.2, token.cancel).start()
+
+    started = time.monotonic()
+    with pytest.raises(OperationCancelled):
+        refresh_offers(
+            repo,
+            OfferInput(item_id=item_id, search_keyword="kw1"),
+            config=AppConfig(),
+            token=token,
+        )
+
+    assert time.monotonic() - started < 1.0
+    assert repo.list_offers(item_id) == []
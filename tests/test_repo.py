@@ -1,4 +1,16 @@
-from app.infra.db import Repository, init_db
+import sqlite3
+import threading
+
+import pytest
+
+from app.infra.db import (
+    ConnectionManager,
+    Repository,
+    init_db,
+    migrations,
+    open_db,
+)
+from app.infra.db.migrations import LATEST_VERSION, schema_version
 
 
 def test_repo_item_crud(tmp_path):
@@ -41,3 +53,484 @@ def test_repo_shipping_rules_replace(tmp_path):
     rules = repo.list_shipping_rules_all()
     assert len(rules) == 1
     assert rules[0].carrier == "c1"
+
+
+def test_init_db_applies_performance_profile(tmp_path):
+    conn = init_db(tmp_path / "app.db", "fast")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+    assert conn.execute("PRAGMA wal_autocheckpoint").fetchone()[0] == 4000
+
+    repo = Repository(conn)
+    repo.create_item(name="n1", search_keyword="kw1")
+    reader = init_db(tmp_path / "app.db")
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute("UPDATE items SET name = 'n2'")
+    # Readers see the last committed state while a write is open.
+    assert Repository(reader).list_items()[0].name == "n1"
+    conn.rollback()
+    assert repo.checkpoint("TRUNCATE")[0] == 0
+
+
+def test_migrations_run_once_and_open_db_checks_version(tmp_path, monkeypatch):
+    db_path = tmp_path / "app.db"
+    conn = init_db(db_path)
+    assert schema_version(conn) == LATEST_VERSION
+    rules = len(Repository(conn).list_shipping_rules_all())
+    assert rules > 0
+    conn.close()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("schema reapplied")
+
+    monkeypatch.setattr(migrations, "_initial_schema", fail)
+    monkeypatch.setattr(migrations, "MIGRATIONS", ((1, fail),))
+    repo = Repository(open_db(db_path))
+    assert len(repo.list_shipping_rules_all()) == rules
+    Repository(init_db(db_path))
+
+    with pytest.raises(RuntimeError):
+        open_db(tmp_path / "empty.db")
+
+
+def test_migrate_upgrades_legacy_database(tmp_path):
+    db_path = tmp_path / "legacy.db"
+    legacy = sqlite3.connect(db_path)
+    legacy.executescript(
+        """
+        CREATE TABLE schema_version (version INTEGER PRIMARY KEY, applied_at TEXT NOT NULL);
+        INSERT INTO schema_version VALUES (1, '2025-01-01T00:00:00+00:00');
+        CREATE TABLE sources (
+          id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, domain TEXT,
+          enabled INTEGER DEFAULT 1
+        );
+        INSERT INTO sources(name) VALUES ('rakuten');
+        """
+    )
+    legacy.close()
+
+    conn = init_db(db_path)
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    repo = Repository(conn)
+    assert repo.list_sources() == [("rakuten", 1)]
+    assert repo.list_items() == []
+
+
+def test_connection_manager_serializes_writers_across_threads(tmp_path):
+    manager = ConnectionManager(tmp_path / "app.db")
+    repo = Repository(manager)
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(20):
+                repo.create_item(name=f"t{n}-{i}", search_keyword="kw")
+                repo.list_items()
+        except Exception as exc:  # pragma: no cover - failure path
+            errors.append(exc)
+        finally:
+            repo.release_reader()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(repo.list_items()) == 80
+    with pytest.raises(sqlite3.OperationalError):
+        manager.reader().execute("DELETE FROM items")
+    repo.close()
+
+
+def test_list_offer_rows_sorts_and_paginates_in_sql(tmp_path):
+    repo = Repository(init_db(tmp_path / "app.db"))
+    item_id = repo.create_item(name="n1", search_keyword="kw1")
+    totals = [500, None, 300, 300, 900, 100, None]
+    repo.add_offers(
+        [
+            {
+                "item_id": item_id,
+                "title": f"t{i}",
+                "price": total,
+                "total": total,
+                "fetched_at": "2026-01-01T00:00:00+00:00",
+                "raw_text": f"body {i}",
+            }
+            for i, total in enumerate(totals)
+        ]
+    )
+
+    pages = []
+    cursor = None
+    while True:
+        page = repo.list_offer_rows(item_id, "total", limit=3, after=cursor)
+        if not page:
+            break
+        pages.append([row.total for row in page])
+        cursor = page[-1].cursor("total")
+
+    assert pages == [[None, None, 100], [300, 300, 500], [900]]
+    assert repo.best_offer_total(item_id) == 100
+    first = repo.list_offer_rows(item_id, "price", limit=1)[0]
+    assert not hasattr(first, "raw_text")
+    assert repo.get_offer_raw_text(first.id) == "body 1"
+    with pytest.raises(ValueError):
+        repo.list_offer_rows(item_id, "title")
+
+
+def test_add_offers_upserts_listing_and_records_changes(tmp_path):
+    repo = Repository(init_db(tmp_path / "app.db"))
+    item_id = repo.create_item(name="n1", search_keyword="kw1")
+
+    def observe(day, price, stock="available"):
+        repo.add_offers(
+            [
+                {
+                    "item_id": item_id,
+                    "source_id": 1,
+                    "title": "Listing",
+                    "price": price,
+                    "total": price,
+                    "stock_status": stock,
+                    "url": "https://example.test/1",
+                    "fetched_at": f"2026-01-{day:02d}T00:00:00+00:00",
+                }
+            ]
+        )
+
+    observe(1, 1000)
+    observe(2, 1000)
+    observe(3, 900)
+    observe(4, 900, stock=None)
+    observe(2, 1200)
+
+    offers = repo.list_offers(item_id)
+    assert len(offers) == 1
+    assert offers[0].price == 900
+    assert offers[0].fetched_at.startswith("2026-01-04")
+    history = repo.list_price_history(offers[0].id)
+    assert [(p.price, p.stock_status) for p in history] == [
+        (1000, "available"),
+        (900, "available"),
+        (900, None),
+    ]
+
+
+def test_offer_listing_migration_merges_duplicates(tmp_path, monkeypatch):
+    db_path = tmp_path / "app.db"
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:2])
+    monkeypatch.setattr(migrations, "LATEST_VERSION", 2)
+    conn = init_db(db_path)
+    conn.execute(
+        "INSERT INTO items(id, search_keyword, created_at, updated_at) "
+        "VALUES (1, 'kw', 'x', 'x')"
+    )
+    for day, price in ((1, 500), (2, 500), (3, 450)):
+        conn.execute(
+            "INSERT INTO offers(item_id, source_id, title, price, total, url, "
+            "fetched_at) VALUES (1, 1, 't', ?, ?, 'u', ?)",
+            (price, price, f"2026-01-0{day}"),
+        )
+    conn.execute(
+        "INSERT INTO calculations(item_id, offer_id, sale_price, fee_rate, "
+        "shipping_cost, packaging_cost, other_cost, cost_price, profit, "
+        "profit_rate, breakeven_price, target_profit, created_at) "
+        "VALUES (1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 'x')"
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.undo()
+
+    repo = Repository(init_db(db_path))
+    offers = repo.list_offers(1)
+    assert [(offer.id, offer.price) for offer in offers] == [(3, 450)]
+    assert [p.price for p in repo.list_price_history(3)] == [500, 450]
+    assert repo.list_calculations(1)[0].offer_id == 3
+
+
+def test_archive_offers_moves_old_rows_and_history_stays_queryable(tmp_path):
+    manager = ConnectionManager(
+        tmp_path / "app.db", archive_path=tmp_path / "archive.db"
+    )
+    repo = Repository(manager)
+    item_id = repo.create_item(name="n1", search_keyword="kw1")
+    for url, day, price in (
+        ("https://example.test/old", 1, 500),
+        ("https://example.test/live", 1, 1000),
+        ("https://example.test/live", 2, 900),
+        ("https://example.test/live", 20, 800),
+    ):
+        repo.add_offers(
+            [
+                {
+                    "item_id": item_id,
+                    "source_id": 1,
+                    "title": url,
+                    "price": price,
+                    "total": price,
+                    "url": url,
+                    "fetched_at": f"2026-01-{day:02d}T00:00:00+00:00",
+                }
+            ]
+        )
+    old, live = sorted(repo.list_offers(item_id), key=lambda o: o.id)
+    assert [p.price for p in repo.list_price_history(live.id)] == [1000, 900, 800]
+
+    result = repo.archive_offers("2026-01-10T00:00:00+00:00")
+
+    assert (result.offers, result.price_history) == (1, 3)
+    assert [o.id for o in repo.list_offers(item_id)] == [live.id]
+    assert [o.id for o in repo.list_offers(item_id, include_archive=True)] == [
+        live.id,
+        old.id,
+    ]
+    hot = manager.reader().execute(
+        "SELECT COUNT(*) FROM main.offer_price_history"
+    ).fetchone()[0]
+    assert hot == 1
+    assert [p.price for p in repo.list_price_history(live.id)] == [1000, 900, 800]
+    assert [p.price for p in repo.list_price_history(old.id)] == [500]
+    assert [
+        p.price for p in repo.list_price_history(live.id, since="2026-01-02")
+    ] == [900, 800]
+
+    assert repo.archive_offers("2026-01-10T00:00:00+00:00").offers == 0
+    repo.close()
+
+
+def test_search_items_uses_trigram_index_and_like_fallback(tmp_path):
+    repo = Repository(init_db(tmp_path / "app.db"))
+    wallet = repo.create_item(
+        name="ポケモンカード 151 BOX", search_keyword="ポケカ 151", jan="4521329"
+    )
+    switch = repo.create_item(
+        name="Nintendo Switch 本体", search_keyword="switch", status="active"
+    )
+    repo.create_item(name="財布", search_keyword="財布 メンズ", notes="革 100%")
+
+    def names(*args, **kwargs):
+        return [item.name for item in repo.search_items(*args, **kwargs)]
+
+    assert names("カード") == ["ポケモンカード 151 BOX"]
+    assert names("SWITCH") == ["Nintendo Switch 本体"]
+    assert names("452132") == ["ポケモンカード 151 BOX"]
+    assert names("財布") == ["財布"]
+    assert names("0%") == ["財布"]
+    assert names("ポケ box") == ["ポケモンカード 151 BOX"]
+    assert names("switch", status="considering") == []
+    assert len(names()) == 3
+    assert len(names(limit=2)) == 2
+    assert len(names(limit=2, offset=2)) == 1
+
+    repo.update_item(item_id=switch, name="Switch Lite", search_keyword="lite")
+    assert names("Lite") == ["Switch Lite"]
+    repo.delete_item(wallet)
+    assert names("カード") == []
+
+
+def test_search_offer_text_ranks_title_matches_with_snippets(tmp_path):
+    repo = Repository(init_db(tmp_path / "app.db"))
+    camera = repo.create_item(name="カメラ", search_keyword="camera")
+    lens = repo.create_item(name="レンズ", search_keyword="lens")
+    repo.add_offers(
+        [
+            {
+                "item_id": camera,
+                "source_id": 1,
+                "title": "デジカメ 本体",
+                "raw_text": "動作未確認のためジャンク扱いです。付属品なし。",
+                "price": 3000,
+                "total": 3000,
+                "url": "https://example.test/a",
+                "fetched_at": "2026-01-01T00:00:00+00:00",
+            },
+            {
+                "item_id": lens,
+                "source_id": 1,
+                "title": "単焦点レンズ ジャンク品",
+                "raw_text": "カビあり",
+                "price": 1000,
+                "total": 1000,
+                "url": "https://example.test/b",
+                "fetched_at": "2026-01-01T00:00:00+00:00",
+            },
+        ]
+    )
+
+    hits = repo.search_offer_text("ジャンク")
+    assert [(hit.item_label, hit.url) for hit in hits] == [
+        ("レンズ", "https://example.test/b"),
+        ("カメラ", "https://example.test/a"),
+    ]
+    assert "[ジャンク]" in hits[1].snippet
+    assert [hit.item_id for hit in repo.search_offer_text("カビ")] == [lens]
+    assert repo.search_offer_text("存在しない語") == []
+
+    repo.add_offers(
+        [
+            {
+                "item_id": lens,
+                "source_id": 1,
+                "title": "単焦点レンズ 美品",
+                "raw_text": "カビなし",
+                "price": 1200,
+                "total": 1200,
+                "url": "https://example.test/b",
+                "fetched_at": "2026-01-02T00:00:00+00:00",
+            }
+        ]
+    )
+    assert [hit.item_id for hit in repo.search_offer_text("ジャンク")] == [camera]
+    assert [hit.title for hit in repo.search_offer_text("美品")] == ["単焦点レンズ 美品"]
+
+
+def _summary(repo, item_id):
+    return next(s for s in repo.list_item_summaries() if s.item_id == item_id)
+
+
+def test_item_summary_tracks_offers_market_and_calculations(tmp_path):
+    repo = Repository(init_db(tmp_path / "app.db"))
+    item_id = repo.create_item(name="n1", search_keyword="kw1")
+    other = repo.create_item(name="n2", search_keyword="kw2")
+    assert _summary(repo, item_id).offer_count == 0
+
+    def observe(url, day, total):
+        repo.add_offers(
+            [
+                {
+                    "item_id": item_id,
+                    "source_id": 1,
+                    "title": url,
+                    "price": total,
+                    "total": total,
+                    "url": url,
+                    "fetched_at": f"2026-01-{day:02d}T00:00:00+00:00",
+                }
+            ]
+        )
+
+    observe("a", 1, 1000)
+    observe("b", 2, 800)
+    observe("c", 3, None)
+    summary = _summary(repo, item_id)
+    b = next(o for o in repo.list_offers(item_id) if o.url == "b")
+    assert (summary.offer_count, summary.best_total, summary.best_offer_id) == (
+        3,
+        800,
+        b.id,
+    )
+    assert summary.last_fetched_at.startswith("2026-01-03")
+
+    observe("b", 4, 1200)
+    assert _summary(repo, item_id).best_total == 1000
+    observe("c", 5, 900)
+    assert _summary(repo, item_id).best_total == 900
+    repo.delete_stale_offers("2026-01-05T00:00:00+00:00")
+    summary = _summary(repo, item_id)
+    assert (summary.offer_count, summary.best_total) == (1, 900)
+    assert summary.last_fetched_at.startswith("2026-01-05")
+
+    repo.add_market_ref(item_id, low=1500, mid=2000, high=2500, memo=None)
+    repo.add_calculation(
+        item_id=item_id,
+        offer_id=None,
+        sale_price=2000,
+        fee_rate=0.1,
+        shipping_cost=0,
+        packaging_cost=0,
+        other_cost=0,
+        cost_price=900,
+        profit=900,
+        profit_rate=0.45,
+        breakeven_price=1000,
+        target_profit=0,
+        min_price_for_target=None,
+    )
+    summary = _summary(repo, item_id)
+    assert (summary.market_mid, summary.spread, summary.last_profit) == (
+        2000,
+        1100,
+        900,
+    )
+    assert [s.item_id for s in repo.list_item_summaries(sort="profit")] == [
+        item_id,
+        other,
+    ]
+    assert [s.item_id for s in repo.list_item_summaries(sort="spread")] == [
+        item_id,
+        other,
+    ]
+    assert [s.item_id for s in repo.list_item_summaries("kw2")] == [other]
+
+    repo.delete_market_refs_before("9999")
+    assert _summary(repo, item_id).market_mid is None
+    repo.delete_item(other)
+    assert [s.item_id for s in repo.list_item_summaries()] == [item_id]
+
+
+def test_item_summary_migration_backfills_existing_rows(tmp_path, monkeypatch):
+    db_path = tmp_path / "app.db"
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:6])
+    monkeypatch.setattr(migrations, "LATEST_VERSION", 6)
+    conn = init_db(db_path)
+    # create_item writes columns added after v6, so insert the row directly.
+    item_id = conn.execute(
+        "INSERT INTO items(name, search_keyword, status, created_at, updated_at)"
+        " VALUES ('n1', 'kw1', 'considering', '2026-01-01', '2026-01-01')"
+    ).lastrowid
+    conn.commit()
+    repo = Repository(conn)
+    repo.add_offers(
+        [
+            {
+                "item_id": item_id,
+                "source_id": 1,
+                "title": title,
+                "price": total,
+                "total": total,
+                "url": title,
+                "fetched_at": "2026-01-01T00:00:00+00:00",
+            }
+            for title, total in (("a", 700), ("b", 500))
+        ]
+    )
+    repo.add_market_ref(item_id, low=1, mid=2, high=3, memo=None)
+    repo.close()
+    monkeypatch.undo()
+
+    summary = _summary(Repository(init_db(db_path)), item_id)
+    assert (summary.offer_count, summary.best_total, summary.market_high) == (
+        2,
+        500,
+        3,
+    )
+
+
+def test_item_package_round_trip_and_clears_shipping(tmp_path):
+    repo = Repository(init_db(tmp_path / "app.db"))
+    measured = repo.create_item(
+        name="n1", search_keyword="kw1", length=20, width=15, height=None, weight=800
+    )
+    repo.create_item(name="n2", search_keyword="kw2")
+
+    item = repo.get_item(measured)
+    assert (item.length, item.width, item.height, item.weight) == (20, 15, None, 800)
+    assert item.has_package
+    assert [package.item_id for package in repo.list_item_packages()] == [measured]
+
+    repo.update_item_shipping([(measured, "box", 750)])
+    summary = _summary(repo, measured)
+    assert (summary.shipping_service, summary.shipping_cost) == ("box", 750)
+
+    # Saving without a package change keeps the estimate; a new size clears it.
+    repo.update_item(
+        measured, name="n1", search_keyword="kw1", length=20, width=15, weight=800
+    )
+    assert _summary(repo, measured).shipping_cost == 750
+    repo.update_item(
+        measured, name="n1", search_keyword="kw1", length=30, width=15, weight=800
+    )
+    assert _summary(repo, measured).shipping_cost is None
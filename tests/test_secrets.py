@@ -0,0 +1,39 @@
+from app.infra import secrets
+
+
+class _FakeKeyring:
+    def __init__(self):
+        self.store = {}
+        self.reads = 0
+
+    def get_password(self, service, key):
+        self.reads += 1
+        return self.store.get((service, key))
+
+    def set_password(self, service, key, value):
+        self.store[(service, key)] = value
+
+    def delete_password(self, service, key):
+        del self.store[(service, key)]
+
+
+def test_secret_cache_loads_once_and_invalidates_on_write(monkeypatch):
+    fake = _FakeKeyring()
+    monkeypatch.setattr(secrets, "_require_keyring", lambda: fake)
+    secrets.invalidate_secrets()
+
+    secrets.set_secret("k1", "v1")
+    assert secrets.get_secret("k1") == "v1"
+    assert secrets.get_secret("k1") == "v1"
+    assert fake.reads == 1
+
+    secrets.set_secret("k1", "v2")
+    assert secrets.get_secret("k1") == "v2"
+    secrets.delete_secret("k1")
+    assert secrets.get_secret("k1") is None
+    assert fake.reads == 3
+
+    fake.store[(secrets.SERVICE_NAME, "k1")] = "external"
+    assert secrets.get_secret("k1") is None
+    assert secrets.refresh_secrets(["k1"]) == {"k1": "external"}
+    secrets.invalidate_secrets()
@@ -1,5 +1,16 @@
-from app.infra.db.repo import ShippingRule
-from app.usecases.estimate_shipping import ShippingInput, estimate_shipping
+import pytest
+
+from app.domain.shipping import prefecture_index, size_band_index, zone_indexes
+from app.infra.db import init_db
+from app.infra.db.repo import Repository, ShippingRule
+from app.usecases.estimate_shipping import (
+    ShippingInput,
+    ShippingRuleIndex,
+    estimate_shipping,
+    refresh_item_shipping,
+    shipping_rule_index,
+)
+from app.usecases.rate_tables import import_rate_tables
 
 
 def test_estimate_shipping_filters_and_sorts():
@@ -41,3 +52,175 @@ def test_estimate_shipping_filters_and_sorts():
     assert len(results) == 1
     assert results[0].rule.id == 2
     assert results[0].total_cost == 350
+
+
+def _rule(rule_id, price, size, weight):
+    return ShippingRule(
+        id=rule_id,
+        carrier="c",
+        service_name=f"s{rule_id}",
+        max_l=size,
+        max_w=size,
+        max_h=size,
+        max_weight=weight,
+        price=price,
+        packaging_cost=0,
+        enabled=1,
+    )
+
+
+def test_shipping_rule_index_sorts_and_memoizes():
+    index = ShippingRuleIndex(
+        [_rule(1, 900, None, None), _rule(2, 200, 10, 500), _rule(3, 400, 30, 2000)]
+    )
+    data = ShippingInput(length=20, width=5, height=5, weight=800, packaging_cost=30)
+
+    results = index.estimate(data)
+    assert [result.rule.id for result in results] == [3, 1]
+    assert [result.total_cost for result in results] == [430, 930]
+    assert index.estimate(data) is results
+    assert index.cheapest(data).rule.id == 3
+    assert list(results) == estimate_shipping(list(index.rules), data)
+
+    too_big = ShippingInput(
+        length=99, width=99, height=99, weight=99_999, packaging_cost=0
+    )
+    assert index.cheapest(too_big).rule.id == 1
+
+
+def test_shipping_rule_index_rebuilds_after_replace(tmp_path):
+    repo = Repository(init_db(tmp_path / "app.db"))
+    first = shipping_rule_index(repo)
+    assert shipping_rule_index(repo) is first
+
+    repo.replace_shipping_rules(
+        [{"carrier": "c", "service_name": "only", "max_l": 10, "price": 100}]
+    )
+    second = shipping_rule_index(repo)
+    assert second is not first
+    assert [rule.service_name for rule in second.rules] == ["only"]
+    assert shipping_rule_index(repo) is second
+
+
+def test_refresh_item_shipping_matches_index(tmp_path):
+    pytest.importorskip("numpy")
+    repo = Repository(init_db(tmp_path / "app.db"))
+    repo.replace_shipping_rules(
+        [
+            {"carrier": "c", "service_name": "large", "max_l": 100, "price": 1500},
+            {
+                "carrier": "c",
+                "service_name": "small",
+                "max_l": 30,
+                "max_w": 30,
+                "max_h": 5,
+                "max_weight": 1000,
+                "price": 200,
+            },
+        ]
+    )
+    small = repo.create_item(name="s", search_keyword="s", length=20, weight=500)
+    large = repo.create_item(name="l", search_keyword="l", length=80, height=40)
+    huge = repo.create_item(name="h", search_keyword="h", length=150)
+    repo.create_item(name="u", search_keyword="u")
+
+    assert refresh_item_shipping(repo, packaging_cost=50) == 2
+    summaries = {s.item_id: s for s in repo.list_item_summaries()}
+    index = shipping_rule_index(repo)
+    for item_id in (small, large, huge):
+        item = repo.get_item(item_id)
+        expected = index.cheapest(
+            ShippingInput(
+                length=item.length or 0,
+                width=item.width or 0,
+                height=item.height or 0,
+                weight=item.weight or 0,
+                packaging_cost=50,
+            )
+        )
+        summary = summaries[item_id]
+        if expected is None:
+            assert summary.shipping_cost is None
+        else:
+            assert summary.shipping_service == expected.rule.service_name
+            assert summary.shipping_cost == expected.total_cost
+    assert summaries[small].shipping_cost == 250
+    assert summaries[huge].shipping_service is None
+
+
+def test_prefecture_and_size_band_lookup():
+    assert prefecture_index("東京都") == 12
+    assert prefecture_index("東京") == 12
+    assert prefecture_index("13") == 12
+    assert prefecture_index(47) == 46
+    assert len(zone_indexes("関西")) == 6
+    with pytest.raises(ValueError):
+        prefecture_index("北海")
+    assert size_band_index(20, 20, 20, 1500) == 0
+    assert size_band_index(20, 20, 20, 3000) == 1
+    assert size_band_index(100, 60, 50, 1000) is None
+
+
+def test_zone_rate_tables_price_by_destination(tmp_path):
+    pytest.importorskip("numpy")
+    repo = Repository(init_db(tmp_path / "app.db"))
+    repo.replace_shipping_rules(
+        [
+            {"carrier": "yamato", "service_name": "宅急便", "price": 9999},
+            {"carrier": "post", "service_name": "flat", "max_l": 60, "price": 1200},
+        ]
+    )
+    csv_path = tmp_path / "rates.csv"
+    csv_path.write_text(
+        "carrier,service_name,origin,destination,60,80\n"
+        "yamato,宅急便,関東,関東,940,1230\n"
+        "yamato,宅急便,関東,関西,1060,1350\n"
+        "yamato,宅急便,東京都,大阪府,1000,\n"
+        "yamato,宅急便,東京都,奈良県,,-\n",
+        encoding="utf-8",
+    )
+    before = shipping_rule_index(repo)
+    assert import_rate_tables(repo, csv_path) == 1
+    index = shipping_rule_index(repo)
+    assert index is not before
+
+    def total(destination, length=20, weight=1000):
+        data = ShippingInput(
+            length=length,
+            width=20,
+            height=10,
+            weight=weight,
+            packaging_cost=50,
+            origin="東京都",
+            destination=destination,
+        )
+        return [(e.rule.service_name, e.total_cost) for e in index.estimate(data)]
+
+    assert total("神奈川県") == [("宅急便", 990), ("flat", 1250)]
+    assert total("大阪府") == [("宅急便", 1050), ("flat", 1250)]
+    assert total("京都府", length=40) == [("flat", 1250), ("宅急便", 1400)]
+    # A blank cell keeps the regional rate; "-" removes only that band.
+    assert total("大阪府", length=40) == [("flat", 1250), ("宅急便", 1400)]
+    assert total("奈良県") == [("宅急便", 1110), ("flat", 1250)]
+    assert total("奈良県", length=40) == [("flat", 1250)]
+    assert total("北海道") == [("flat", 1250)]
+
+    flat = ShippingInput(
+        length=20, width=20, height=10, weight=1000, packaging_cost=50
+    )
+    assert index.cheapest(flat).total_cost == 1250
+
+    destinations = index.estimate_destinations(
+        ShippingInput(
+            length=20,
+            width=20,
+            height=10,
+            weight=1000,
+            packaging_cost=50,
+            origin="東京都",
+        )
+    )
+    assert destinations.shape == (47,)
+    assert destinations[prefecture_index("神奈川県")] == 990
+    assert destinations[prefecture_index("大阪府")] == 1050
+    assert destinations[prefecture_index("北海道")] == 1250
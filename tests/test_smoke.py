@@ -1,4 +1,6 @@
-from app.infra.config import AppConfig, load_config, save_config
+import os
+
+from app.infra.config import AppConfig, get_config, load_config, save_config
 
 
 def test_config_roundtrip(tmp_path):
@@ -8,3 +10,21 @@ def test_config_roundtrip(tmp_path):
     loaded = load_config(path)
     assert loaded.fee_rate == 0.2
     assert loaded.target_profit == 1234
+
+
+def test_get_config_is_cached_until_file_changes(tmp_path):
+    path = tmp_path / "config.json"
+    save_config(AppConfig(target_profit=1000), path)
+    first = get_config(path)
+    assert get_config(path) is first
+
+    path.write_text('{"target_profit": 3000}\n', encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    reloaded = get_config(path)
+    assert reloaded is not first
+    assert reloaded.target_profit == 3000
+
+    reloaded.target_profit = 4000
+    save_config(reloaded, path)
+    assert get_config(path) is reloaded
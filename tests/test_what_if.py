@@ -0,0 +1,31 @@
+import pytest
+
+from app.usecases.calc_profit import calc_profit
+from app.usecases.what_if import profit_grid, sale_price_steps
+
+
+def test_sale_price_steps_widens_long_ranges():
+    assert sale_price_steps(1000, 1300) == (1000, 1100, 1200, 1300)
+    assert sale_price_steps(1300, 1000) == (1000, 1100, 1200, 1300)
+    assert sale_price_steps(1000, 1250) == (1000, 1100, 1200, 1250)
+    steps = sale_price_steps(0, 100000, max_steps=50)
+    assert len(steps) <= 51
+    assert steps[0] == 0 and steps[-1] == 100000
+
+
+def test_profit_grid_matches_calc_profit_and_is_cached():
+    pytest.importorskip("numpy")
+    prices = sale_price_steps(2000, 4000)
+    grid = profit_grid(prices, [0.05, 0.1], [210, 750, 1000], 1200, 50, 0, 2000)
+
+    assert grid.profit.shape == (3, 2, len(prices))
+    for s, shipping in enumerate(grid.shipping_costs):
+        for f, fee in enumerate(grid.fee_rates):
+            for p, price in enumerate(grid.sale_prices):
+                expected = calc_profit(price, 1200, fee, shipping, 50, 0, 2000)
+                assert grid.batch.at((s, f, p)) == expected
+
+    again = profit_grid(list(prices), (0.05, 0.1), (210, 750, 1000), 1200, 50, 0, 2000)
+    assert again is grid
+    with pytest.raises(ValueError):
+        grid.profit[0, 0, 0] = 1